@@ -0,0 +1,272 @@
+from contextlib import contextmanager
+
+from django.db.models import Count, F, IntegerField, Q, Sum
+from django.db.models.functions import Cast
+
+from syncapp.batching import MAX_IN_PARAMS, batched
+from syncapp.bridges import FILM_CATEGORY
+from syncapp.models import (
+    AggDailyStoreRevenue,
+    AggMonthlyCategoryRentals,
+    AggMonthlyFilmRentals,
+    AggStoreMonthCustomerRentals,
+    AggStoreMonthCustomers,
+    FactPayment,
+    FactRental,
+)
+
+
+def month_key(field):
+    """YYYYMM of a YYYYMMDD date key column (integer division in SQLite)."""
+    return Cast(field, IntegerField()) / 100
+
+
+class Aggregate:
+    """
+    A summary table of a fact table: measures per group, e.g. payments and
+    revenue per (date_key, store_id). groups maps the summary model's group
+    fields to expressions over the fact model; measures maps its measure
+    fields to a summed fact field, or None for the row count, which comes
+    first. Groups whose row count falls to zero are deleted.
+
+    read() computes the groups of some facts with one GROUP BY. Loaders
+    wrap their writes in tracking(), which reads the groups of the facts
+    being written before and after the write and apply()s only the
+    difference, so a batch touches the groups of its own rows and nothing
+    is recomputed.
+    """
+
+    def __init__(self, name, model, fact, groups, measures):
+        self.name = name
+        self.model = model
+        self.fact = fact
+        self.groups = groups
+        self.measures = measures
+        self.table = model._meta.db_table
+        self.zero = (0,) * len(measures)
+        # aggregates maintained from this one's row counts (DistinctCount)
+        self.derived = []
+
+    def read(self, field=None, values=()):
+        """{group key: measures} of the facts whose field is in values, or of all facts."""
+        if field is None:
+            querysets = [self.fact.objects.all()]
+        else:
+            querysets = (
+                self.fact.objects.filter(**{f"{field}__in": batch})
+                for batch in batched(values, MAX_IN_PARAMS)
+            )
+
+        expressions = {f"_{name}": expression for name, expression in self.groups.items()}
+        aggregates = {
+            f"_{name}": Count("*") if summed is None else Sum(summed)
+            for name, summed in self.measures.items()
+        }
+        totals = {}
+        for queryset in querysets:
+            rows = queryset.values(**expressions).annotate(**aggregates).order_by()
+            for row in rows:
+                key = tuple(row[f"_{name}"] for name in self.groups)
+                if None in key:
+                    # e.g. a film without categories
+                    continue
+                measures = tuple(row[f"_{name}"] or 0 for name in self.measures)
+                totals[key] = add(totals.get(key, self.zero), measures)
+        return totals
+
+    def rows(self):
+        """{group key: measures} as stored in the summary table."""
+        return {
+            row[:len(self.groups)]: row[len(self.groups):]
+            for row in self.model.objects.values_list(*self.groups, *self.measures)
+        }
+
+    def apply(self, deltas):
+        """
+        Add {group key: measure deltas} to the summary table. Returns the
+        [(group key, old row count, new row count)] of the changed groups.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+        if not deltas:
+            return []
+
+        current = self.current(deltas)
+        rows, emptied, changes = [], [], []
+        for key, delta in deltas.items():
+            old = current.get(key, self.zero)
+            new = add(old, delta)
+            changes.append((key, old[0], new[0]))
+            if new[0]:
+                rows.append(self.model(**dict(zip([*self.groups, *self.measures], key + new))))
+            else:
+                emptied.append(key)
+
+        self.model.objects.bulk_create(
+            rows,
+            batch_size=MAX_IN_PARAMS,
+            update_conflicts=True,
+            unique_fields=list(self.groups),
+            update_fields=list(self.measures),
+        )
+        self.delete(emptied)
+
+        for aggregate in self.derived:
+            aggregate.changed(changes)
+        return changes
+
+    def current(self, keys):
+        """Stored measures of the group keys."""
+        current = {}
+        # one IN list per group field selects a superset of the keys
+        for batch in batched(keys, MAX_IN_PARAMS // len(self.groups)):
+            filters = {
+                f"{name}__in": {key[index] for key in batch}
+                for index, name in enumerate(self.groups)
+            }
+            wanted = set(batch)
+            for row in self.model.objects.filter(**filters).values_list(*self.groups, *self.measures):
+                key = row[:len(self.groups)]
+                if key in wanted:
+                    current[key] = row[len(self.groups):]
+        return current
+
+    def delete(self, keys):
+        # one parameter per group field and key
+        for batch in batched(keys, MAX_IN_PARAMS // len(self.groups)):
+            condition = Q()
+            for key in batch:
+                condition |= Q(**dict(zip(self.groups, key)))
+            self.model.objects.filter(condition).delete()
+
+    def rebuild(self):
+        """Recompute the whole summary table from the facts. Returns its row count."""
+        totals = self.read()
+        self.model.objects.all().delete()
+        self.model.objects.bulk_create(
+            [
+                self.model(**dict(zip([*self.groups, *self.measures], key + measures)))
+                for key, measures in totals.items()
+            ],
+            batch_size=MAX_IN_PARAMS,
+        )
+        return len(totals)
+
+
+class DistinctCount(Aggregate):
+    """
+    Distinct values per group, e.g. active customers per store and month,
+    kept from an Aggregate of row counts per group and value: a group gains
+    one when a value's count rises from zero and loses one when it falls
+    back to zero. It is never tracked itself; its counts aggregate applies
+    the changes.
+    """
+
+    def __init__(self, name, model, counts, measure):
+        super().__init__(
+            name, model, counts.fact,
+            groups={field: counts.groups[field] for field in list(counts.groups)[:-1]},
+            measures={measure: None},
+        )
+        self.counts = counts
+        counts.derived.append(self)
+
+    def read(self, field=None, values=()):
+        if field is not None:
+            raise ValueError(f"{self.name} can only be read for every fact.")
+        totals = {}
+        for key in self.counts.read():
+            totals[key[:-1]] = totals.get(key[:-1], 0) + 1
+        return {key: (count,) for key, count in totals.items()}
+
+    def changed(self, changes):
+        deltas = {}
+        for key, old, new in changes:
+            step = (new > 0) - (old > 0)
+            if step:
+                deltas[key[:-1]] = (deltas.get(key[:-1], (0,))[0] + step,)
+        self.apply(deltas)
+
+
+def add(measures, deltas):
+    return tuple(measure + delta for measure, delta in zip(measures, deltas))
+
+
+def difference(new, old, zero):
+    return {
+        key: tuple(a - b for a, b in zip(new.get(key, zero), old.get(key, zero)))
+        for key in new.keys() | old.keys()
+    }
+
+
+@contextmanager
+def tracking(aggregates, field, values):
+    """
+    Keep aggregates in step with a write to the facts whose field is in
+    values (natural ids of upserted or deleted facts, or the films whose
+    bridge links change): their groups are read before and after the block
+    and the difference is applied. Use inside the write's transaction.
+    """
+    values = sorted(set(values))
+    before = [aggregate.read(field, values) for aggregate in aggregates]
+    yield
+    for aggregate, old in zip(aggregates, before):
+        aggregate.apply(difference(aggregate.read(field, values), old, aggregate.zero))
+
+
+DAILY_STORE_REVENUE = Aggregate(
+    "daily_store_revenue", AggDailyStoreRevenue, FactPayment,
+    groups={"date_key": F("date_key_paid"), "store_id": F("store_key__store_id")},
+    measures={"payments": None, "revenue": "amount"},
+)
+
+MONTHLY_FILM_RENTALS = Aggregate(
+    "monthly_film_rentals", AggMonthlyFilmRentals, FactRental,
+    groups={"month": month_key("date_key_rented"), "film_id": F("film_key__film_id")},
+    measures={"rentals": None},
+)
+
+MONTHLY_CATEGORY_RENTALS = Aggregate(
+    "monthly_category_rentals", AggMonthlyCategoryRentals, FactRental,
+    groups={
+        "month": month_key("date_key_rented"),
+        "category_id": F("film_key__bridgefilmcategory__category_key__category_id"),
+    },
+    measures={"rentals": None},
+)
+
+STORE_MONTH_CUSTOMER_RENTALS = Aggregate(
+    "store_month_customer_rentals", AggStoreMonthCustomerRentals, FactRental,
+    groups={
+        "month": month_key("date_key_rented"),
+        "store_id": F("store_key__store_id"),
+        "customer_id": F("customer_key__customer_id"),
+    },
+    measures={"rentals": None},
+)
+
+STORE_MONTH_CUSTOMERS = DistinctCount(
+    "store_month_customers", AggStoreMonthCustomers, STORE_MONTH_CUSTOMER_RENTALS, "active_customers",
+)
+
+# name -> aggregate, in rebuild order
+AGGREGATES = {
+    aggregate.name: aggregate
+    for aggregate in (
+        DAILY_STORE_REVENUE,
+        MONTHLY_FILM_RENTALS,
+        MONTHLY_CATEGORY_RENTALS,
+        STORE_MONTH_CUSTOMER_RENTALS,
+        STORE_MONTH_CUSTOMERS,
+    )
+}
+
+# fact model -> aggregates tracked when its rows are written
+FACT_AGGREGATES = {
+    FactPayment: [DAILY_STORE_REVENUE],
+    FactRental: [MONTHLY_FILM_RENTALS, MONTHLY_CATEGORY_RENTALS, STORE_MONTH_CUSTOMER_RENTALS],
+}
+
+# bridge name -> aggregates that roll facts up through it, tracked by film
+BRIDGE_AGGREGATES = {
+    FILM_CATEGORY.name: [MONTHLY_CATEGORY_RENTALS],
+}
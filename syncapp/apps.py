@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import pre_migrate
 
 
 class SyncappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'syncapp'
+
+    def ready(self):
+        from syncapp.functions import register_functions
+        from syncapp.partitions import refuse_partitioned_migrations
+        from syncapp.pragmas import configure_connection
+
+        connection_created.connect(configure_connection, dispatch_uid="syncapp_sqlite_pragmas")
+        connection_created.connect(register_functions, dispatch_uid="syncapp_sqlite_functions")
+        pre_migrate.connect(
+            refuse_partitioned_migrations, sender=self, dispatch_uid="syncapp_partitioned_migrations",
+        )
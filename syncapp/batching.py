@@ -0,0 +1,123 @@
+from itertools import islice
+
+from django.db.models import Q
+
+# keep IN (...) lists well under SQLite's bound-parameter limit
+MAX_IN_PARAMS = 500
+
+
+def batched(iterable, size):
+    """Yield successive lists of at most size items from iterable."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_chunks(queryset, chunk_size, key="pk", after=None):
+    """
+    Stream a queryset as lists of at most chunk_size rows.
+
+    Uses keyset pagination on `key` (WHERE key > last ORDER BY key LIMIT n)
+    rather than one big cursor, so memory stays bounded even on backends
+    whose drivers buffer the full result set client-side (MySQL).
+    Works for model instances as well as values()/values_list() rows,
+    as long as `key` is part of the selected columns. With `after`, only
+    rows whose key is greater are read (resuming an earlier stream).
+    """
+    return iter_keyset(
+        queryset,
+        chunk_size,
+        (key,),
+        after=None if after is None else (after,),
+        key_of=lambda row: (_key_value(row, key),),
+    )
+
+
+def iter_keyset(queryset, chunk_size, fields, after=None, key_of=None):
+    """
+    Keyset pagination over a compound key, e.g. ("last_update", "rental_id"):
+    rows are read in key order strictly after the `after` tuple (or from the
+    start when after is None), chunk_size rows per query. key_of(row) must
+    return the row's key tuple.
+    """
+    queryset = queryset.order_by(*fields)
+
+    while True:
+        page = queryset if after is None else queryset.filter(_after(fields, after))
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+
+        yield chunk
+
+        if len(chunk) < chunk_size:
+            return
+        after = key_of(chunk[-1])
+
+
+def _after(fields, values):
+    """(f1, f2, ...) > (v1, v2, ...) as a Q object."""
+    condition = Q(**{f"{fields[-1]}__gt": values[-1]})
+    for field, value in zip(fields[-2::-1], values[-2::-1]):
+        condition = Q(**{f"{field}__gt": value}) | (Q(**{field: value}) & condition)
+    return condition
+
+
+def _key_value(row, key):
+    if isinstance(row, dict):
+        return row[key]
+    if isinstance(row, tuple):
+        # values_list(): key must be the first column
+        return row[0]
+    return getattr(row, key)
+
+
+def bulk_upsert(model, objs, unique_field, batch_size=1000, compare_field=None):
+    """
+    Insert-or-update objs keyed by unique_field with set-based statements.
+
+    Existing natural keys are fetched up front (one query per MAX_IN_PARAMS
+    keys) only to split the result into created/updated; the write itself
+    is bulk_create(update_conflicts=True), i.e. INSERT ... ON CONFLICT DO
+    UPDATE, batch_size rows per statement. With compare_field (e.g. a row
+    fingerprint), existing rows whose value is unchanged are not written.
+    Returns (created_ids, updated_ids) as lists of natural keys.
+    """
+    if not objs:
+        return [], []
+
+    fields = (unique_field, compare_field) if compare_field else (unique_field, unique_field)
+    existing = {}
+    for batch in batched([getattr(obj, unique_field) for obj in objs], MAX_IN_PARAMS):
+        existing.update(
+            model.objects.filter(**{f"{unique_field}__in": batch}).values_list(*fields)
+        )
+
+    if compare_field:
+        objs = [
+            obj for obj in objs
+            if existing.get(getattr(obj, unique_field)) != getattr(obj, compare_field)
+        ]
+        if not objs:
+            return [], []
+    natural_ids = [getattr(obj, unique_field) for obj in objs]
+
+    update_fields = [
+        field.name
+        for field in model._meta.concrete_fields
+        if not field.primary_key and field.name != unique_field
+    ]
+    model.objects.bulk_create(
+        objs,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=[unique_field],
+        update_fields=update_fields,
+    )
+
+    created = [nid for nid in natural_ids if nid not in existing]
+    updated = [nid for nid in natural_ids if nid in existing]
+    return created, updated
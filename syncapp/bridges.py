@@ -0,0 +1,141 @@
+from django.core.exceptions import ObjectDoesNotExist
+
+from syncapp.batching import MAX_IN_PARAMS, batched
+from syncapp.models_source import FilmActor, FilmCategory
+from syncapp.models import BridgeFilmActor, BridgeFilmCategory
+
+
+class BridgeSpec:
+    """
+    A film <-> X link table and the bridge it is loaded into.
+
+    sides holds (dimension, source column, bridge column) for both ends of
+    the link. Links are read as (left_id, right_id) pairs with values_list()
+    and mapped to surrogate key pairs through a DimensionKeyMap, so loading
+    and diffing work on Python sets instead of per-row queries.
+    """
+
+    def __init__(self, name, source, target, left, right):
+        self.name = name
+        self.source = source
+        self.target = target
+        self.sides = (left, right)
+
+    @property
+    def source_columns(self):
+        return tuple(column for _, column, _ in self.sides)
+
+    @property
+    def key_columns(self):
+        return tuple(column for _, _, column in self.sides)
+
+    def queryset(self, *fields, **filters):
+        return (
+            self.source.objects.using("source")
+            .filter(**filters)
+            .values_list(*fields, *self.source_columns)
+        )
+
+    def iter_chunks(self, chunk_size, **filters):
+        """Yield lists of natural (left_id, right_id) pairs."""
+        links = self.queryset(**filters).iterator(chunk_size=chunk_size)
+        return batched(links, chunk_size)
+
+    def to_keys(self, keys, pairs):
+        """
+        Map natural pairs to surrogate key pairs. Links whose film or other
+        side is not in the key map are skipped; returns (key pairs, skipped).
+        """
+        (left, _, _), (right, _, _) = self.sides
+
+        key_pairs = set()
+        skipped = 0
+        for left_id, right_id in pairs:
+            try:
+                key_pairs.add((keys.get(left, left_id), keys.get(right, right_id)))
+            except ObjectDoesNotExist:
+                skipped += 1
+        return key_pairs, skipped
+
+    def skipped_message(self, skipped):
+        (left, _, _), (right, _, _) = self.sides
+        return f"{skipped} {self.name} links skipped: {left} or {right} not in the warehouse"
+
+    def build(self, key_pairs, model=None):
+        model = model or self.target
+        left, right = self.key_columns
+        return [model(**{left: a, right: b}) for a, b in key_pairs]
+
+    def existing(self, model=None, **filters):
+        """Current bridge contents as {(left_key, right_key): row id}."""
+        model = model or self.target
+        rows = model.objects.filter(**filters).values_list("pk", *self.key_columns)
+        return {(a, b): pk for pk, a, b in rows}
+
+
+def insert_links(spec, key_pairs, batch_size=1000, model=None):
+    """
+    Insert the key pairs that are not bridged yet, reading existing links
+    only for the films involved. Returns the number inserted.
+    """
+    model = model or spec.target
+    left_column = spec.key_columns[0]
+    lefts = sorted({left for left, _ in key_pairs})
+
+    existing = set()
+    for batch in batched(lefts, MAX_IN_PARAMS):
+        existing.update(spec.existing(model, **{f"{left_column}__in": batch}))
+
+    missing = [pair for pair in key_pairs if pair not in existing]
+    model.objects.bulk_create(spec.build(missing, model), batch_size=batch_size)
+    return len(missing)
+
+
+def delete_links(spec, key_pairs, model=None):
+    """Delete the given key pairs from the bridge. Returns the number deleted."""
+    model = model or spec.target
+    left_column = spec.key_columns[0]
+    lefts = sorted({left for left, _ in key_pairs})
+
+    stale = []
+    for batch in batched(lefts, MAX_IN_PARAMS):
+        existing = spec.existing(model, **{f"{left_column}__in": batch})
+        stale.extend(pk for pair, pk in existing.items() if pair in key_pairs)
+
+    for batch in batched(stale, MAX_IN_PARAMS):
+        model.objects.filter(pk__in=batch).delete()
+    return len(stale)
+
+
+def diff_links(spec, key_pairs, batch_size=1000, model=None):
+    """
+    Make the bridge hold exactly key_pairs: one read of the current pairs,
+    then a bulk insert of the missing ones and id__in deletes of the stale
+    ones. Returns (inserted, deleted).
+    """
+    model = model or spec.target
+    existing = spec.existing(model)
+
+    missing = [pair for pair in key_pairs if pair not in existing]
+    stale = [pk for pair, pk in existing.items() if pair not in key_pairs]
+
+    model.objects.bulk_create(spec.build(missing, model), batch_size=batch_size)
+    for batch in batched(stale, MAX_IN_PARAMS):
+        model.objects.filter(pk__in=batch).delete()
+
+    return len(missing), len(stale)
+
+
+FILM_ACTOR = BridgeSpec(
+    "film_actor", FilmActor, BridgeFilmActor,
+    left=("film", "film_id", "film_key_id"),
+    right=("actor", "actor_id", "actor_key_id"),
+)
+
+FILM_CATEGORY = BridgeSpec(
+    "film_category", FilmCategory, BridgeFilmCategory,
+    left=("film", "film_id", "film_key_id"),
+    right=("category", "category_id", "category_key_id"),
+)
+
+BRIDGE_SPECS = {spec.name: spec for spec in (FILM_ACTOR, FILM_CATEGORY)}
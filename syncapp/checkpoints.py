@@ -0,0 +1,72 @@
+from syncapp.models import LoadCheckpoint
+
+
+class LoadCheckpoints:
+    """
+    Progress of a checkpointed full load, persisted in load_checkpoint so an
+    interrupted run can pick up after the last committed chunk of each stage.
+    Rows are cached here after start()/load(); advance() and complete() are
+    meant to run inside the transaction that writes the chunk itself.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    def start(self, names, watermarks):
+        """
+        Begin a new run with a fresh checkpoint per stage. watermarks maps
+        stage name -> source (timestamp, pk) high-watermark (or None).
+        """
+        checkpoints = []
+        for name in names:
+            watermark_update, watermark_pk = watermarks.get(name) or (None, None)
+            checkpoints.append(LoadCheckpoint(
+                stage=name, watermark_update=watermark_update, watermark_pk=watermark_pk
+            ))
+
+        LoadCheckpoint.objects.all().delete()
+        LoadCheckpoint.objects.bulk_create(checkpoints)
+        self.load()
+
+    def load(self):
+        self.stages = {checkpoint.stage: checkpoint for checkpoint in LoadCheckpoint.objects.all()}
+        return bool(self.stages)
+
+    def after(self, name):
+        """Last source key committed for the stage, or None to start from scratch."""
+        return self.stages[name].last_key
+
+    def rows(self, name):
+        return self.stages[name].rows
+
+    def completed(self, name):
+        return self.stages[name].completed
+
+    def advance(self, name, rows, last_key=None):
+        checkpoint = self.stages[name]
+        checkpoint.rows += rows
+        checkpoint.last_key = last_key
+        checkpoint.save(update_fields=["rows", "last_key", "updated_at"])
+
+    def reset(self, name):
+        checkpoint = self.stages[name]
+        checkpoint.rows = 0
+        checkpoint.last_key = None
+        checkpoint.save(update_fields=["rows", "last_key", "updated_at"])
+
+    def complete(self, name):
+        checkpoint = self.stages[name]
+        checkpoint.completed = True
+        checkpoint.save(update_fields=["completed", "updated_at"])
+
+    def watermarks(self):
+        """stage name -> source high-watermark captured when the run started."""
+        return {
+            name: None if checkpoint.watermark_update is None
+            else (checkpoint.watermark_update, checkpoint.watermark_pk)
+            for name, checkpoint in self.stages.items()
+        }
+
+    def clear(self):
+        LoadCheckpoint.objects.all().delete()
+        self.stages = {}
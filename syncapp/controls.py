@@ -0,0 +1,172 @@
+from datetime import datetime, time, timedelta, timezone
+from decimal import Decimal
+
+from django.db.models import CharField, Count, F, Q, Sum
+from django.db.models.functions import Cast
+
+from syncapp.batching import MAX_IN_PARAMS, batched
+from syncapp.dates import date_key_of, key_to_date
+from syncapp.functions import CRC32
+from syncapp.models import ControlTotal, FactPayment, FactRental
+from syncapp.models_source import Payment, Rental
+
+
+# (rows, amount, checksum) of a day without facts
+EMPTY_TOTALS = (0, Decimal("0.00"), 0)
+
+
+class ControlTotals:
+    """
+    Per-day control totals of one fact table, kept in sync_control_totals:
+    (rows, amount sum, key checksum) per date key, the checksum being the
+    sum of CRC32s of the day's natural keys.
+
+    Loaders call days_of() before writing or deleting facts and refresh()
+    with those days and the days they wrote, in the same transaction, so
+    the totals always describe the committed facts and every changed day
+    is pending again. validate compares the pending days with one GROUP BY
+    on the source restricted to them, then marks the matching days verified.
+    """
+
+    def __init__(self, name, target, date_field, key, source, source_date, amount=None):
+        self.name = name
+        self.target = target
+        self.date_field = target._meta.get_field(date_field).attname
+        self.key = key
+        self.source = source
+        self.source_date = source_date
+        self.amount = amount
+
+    def totals(self, queryset, day):
+        """{date_key: (rows, amount, checksum)} of queryset grouped by the day expression."""
+        aggregates = {"_rows": Count("*"), "_checksum": Sum(CRC32(Cast(self.key, CharField())))}
+        if self.amount:
+            aggregates["_amount"] = Sum(self.amount)
+        rows = queryset.annotate(_day=day).values("_day").annotate(**aggregates).order_by()
+        return {
+            int(row["_day"]): (row["_rows"], cents(row.get("_amount")), int(row["_checksum"] or 0))
+            for row in rows
+        }
+
+    # warehouse side
+    def days_of(self, ids):
+        """Date keys of the facts currently stored under the natural ids."""
+        days = set()
+        for batch in batched(ids, MAX_IN_PARAMS):
+            days.update(
+                self.target.objects.filter(**{f"{self.key}__in": batch})
+                .values_list(self.date_field, flat=True)
+                .distinct()
+            )
+        return days
+
+    def days_in(self, objs):
+        """Date keys of fact instances about to be written."""
+        return {getattr(obj, self.date_field) for obj in objs}
+
+    def refresh(self, days):
+        """Recompute the totals of days from the facts; they become pending."""
+        days = sorted(set(days))
+        totals = {}
+        for batch in batched(days, MAX_IN_PARAMS):
+            totals.update(self.totals(
+                self.target.objects.filter(**{f"{self.date_field}__in": batch}), F(self.date_field),
+            ))
+            ControlTotal.objects.filter(table_name=self.name, date_key__in=batch).delete()
+
+        # days left without facts keep a zero row, so the source is checked too
+        ControlTotal.objects.bulk_create(
+            [self.control(day, totals.get(day, EMPTY_TOTALS)) for day in days],
+            batch_size=MAX_IN_PARAMS,
+        )
+
+    def rebuild(self):
+        """Replace every day's totals with one GROUP BY over the whole fact table."""
+        ControlTotal.objects.filter(table_name=self.name).delete()
+        totals = self.totals(self.target.objects.all(), F(self.date_field))
+        ControlTotal.objects.bulk_create(
+            [self.control(day, totals[day]) for day in sorted(totals)],
+            batch_size=MAX_IN_PARAMS,
+        )
+        return len(totals)
+
+    def control(self, day, totals):
+        rows, amount, checksum = totals
+        return ControlTotal(
+            table_name=self.name, date_key=day, rows=rows, amount=amount, checksum=checksum,
+        )
+
+    # validation
+    def pending(self):
+        """Days changed since they were last verified, oldest first."""
+        return list(
+            ControlTotal.objects.filter(table_name=self.name, verified=False)
+            .order_by("date_key")
+            .values_list("date_key", flat=True)
+        )
+
+    def recorded(self, days):
+        totals = {}
+        for batch in batched(days, MAX_IN_PARAMS):
+            totals.update(
+                (day, (rows, cents(amount), checksum))
+                for day, rows, amount, checksum in ControlTotal.objects
+                .filter(table_name=self.name, date_key__in=batch)
+                .values_list("date_key", "rows", "amount", "checksum")
+            )
+        return totals
+
+    def source_totals(self, days):
+        """The same totals computed on the source, reading only rows of days."""
+        totals = {}
+        for condition in self.conditions(days):
+            queryset = self.source.objects.using("source").filter(condition)
+            totals.update(self.totals(queryset, date_key_of(self.source_date)))
+        return totals
+
+    def conditions(self, days):
+        """Q objects selecting source rows on days, one datetime range per run of consecutive days."""
+        runs = []
+        for day in sorted(days):
+            current = key_to_date(day)
+            if runs and runs[-1][1] + timedelta(days=1) == current:
+                runs[-1][1] = current
+            else:
+                runs.append([current, current])
+
+        # two parameters per range
+        for batch in batched(runs, MAX_IN_PARAMS // 2):
+            condition = Q()
+            for first, last in batch:
+                condition |= Q(**{
+                    f"{self.source_date}__gte": midnight(first),
+                    f"{self.source_date}__lt": midnight(last + timedelta(days=1)),
+                })
+            yield condition
+
+    def verify(self, days, checked_at):
+        """Mark days verified, unless the loaders changed them after checked_at."""
+        for batch in batched(days, MAX_IN_PARAMS):
+            ControlTotal.objects.filter(
+                table_name=self.name, date_key__in=batch, updated_at__lte=checked_at,
+            ).update(verified=True)
+
+
+def cents(amount):
+    return Decimal(amount or 0).quantize(Decimal("0.01"))
+
+
+def midnight(day):
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+# fact model -> its control totals
+CONTROL_TOTALS = {
+    FactRental: ControlTotals(
+        "rental", FactRental, "date_key_rented", "rental_id", Rental, "rental_date",
+    ),
+    FactPayment: ControlTotals(
+        "payment", FactPayment, "date_key_paid", "payment_id", Payment, "payment_date",
+        amount="amount",
+    ),
+}
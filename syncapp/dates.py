@@ -0,0 +1,150 @@
+from calendar import monthrange
+from datetime import date, datetime, timezone
+from functools import lru_cache
+
+from django.db.models import Max, Min
+from django.db.models.functions import ExtractDay, ExtractMonth, ExtractYear
+
+from syncapp.batching import batched
+from syncapp.models import DimDate
+from syncapp.models_source import Rental, Payment
+
+
+DEFAULT_START = date(1900, 1, 1)
+DEFAULT_END = date(2100, 12, 31)
+
+
+@lru_cache(maxsize=None)
+def _day_key(day):
+    return day.year * 10000 + day.month * 100 + day.day
+
+
+def date_key(value):
+    """
+    YYYYMMDD integer key for a date or datetime (None passes through).
+    Computed arithmetically and memoized per calendar day, replacing
+    int(value.strftime("%Y%m%d")) in the fact loaders.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        value = value.date()
+    return _day_key(value)
+
+
+def date_key_of(field):
+    """SQL counterpart of date_key(): the YYYYMMDD integer of a UTC datetime column."""
+    return (
+        ExtractYear(field, tzinfo=timezone.utc) * 10000
+        + ExtractMonth(field, tzinfo=timezone.utc) * 100
+        + ExtractDay(field, tzinfo=timezone.utc)
+    )
+
+
+def key_to_date(key):
+    return date(key // 10000, key // 100 % 100, key % 100)
+
+
+def iter_dim_dates(start, end):
+    """
+    Yield a DimDate for every day in [start, end].
+
+    Attributes are computed arithmetically a month at a time: date_key is
+    year*10000 + month*100 + day, quarter is fixed per month and the ISO
+    weekday just advances mod 7, so there is no strftime/isoweekday call
+    per day.
+    """
+    if start > end:
+        return
+
+    weekday = start.isoweekday()
+    year, month, first_day = start.year, start.month, start.day
+
+    while (year, month) <= (end.year, end.month):
+        last_day = end.day if (year, month) == (end.year, end.month) else monthrange(year, month)[1]
+        quarter = (month - 1) // 3 + 1
+        month_key = year * 10000 + month * 100
+
+        for day in range(first_day, last_day + 1):
+            yield DimDate(
+                date_key=month_key + day,
+                date=date(year, month, day),
+                year=year,
+                quarter=quarter,
+                month=month,
+                day_of_month=day,
+                day_of_week=weekday,
+                is_weekend=weekday >= 6,
+            )
+            weekday = weekday % 7 + 1
+
+        first_day = 1
+        month += 1
+        if month == 13:
+            year, month = year + 1, 1
+
+
+def ensure_date_range(start, end, batch_size=5000):
+    """
+    Make dim_date cover every day in [start, end], writing only missing
+    days in bulk_create batches. Returns the number of rows created.
+    """
+    if start > end:
+        return 0
+
+    in_range = DimDate.objects.filter(date_key__range=(date_key(start), date_key(end)))
+    if in_range.count() == (end - start).days + 1:
+        return 0
+
+    existing = set(in_range.values_list("date_key", flat=True))
+    missing = (row for row in iter_dim_dates(start, end) if row.date_key not in existing)
+
+    created = 0
+    for batch in batched(missing, batch_size):
+        DimDate.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+class DateKeyIndex:
+    """
+    The set of date_keys present in dim_date, loaded once per run.
+    ensure() only goes to SQLite for keys that are not known yet, so
+    fact batches whose dates already exist cost no queries.
+    """
+
+    def __init__(self):
+        self.known = None
+
+    def load(self):
+        self.known = set(DimDate.objects.values_list("date_key", flat=True))
+
+    def ensure(self, date_keys):
+        if self.known is None:
+            self.load()
+
+        missing = {key for key in date_keys if key is not None} - self.known
+        if not missing:
+            return 0
+
+        first, last = min(missing), max(missing)
+        created = ensure_date_range(key_to_date(first), key_to_date(last))
+        self.known.update(
+            DimDate.objects.filter(date_key__range=(first, last))
+            .values_list("date_key", flat=True)
+        )
+        return created
+
+
+def source_date_range():
+    """(first, last) calendar dates referenced by source rentals/payments, or None."""
+    rentals = Rental.objects.using("source").aggregate(
+        first=Min("rental_date"), last=Max("rental_date"), last_return=Max("return_date")
+    )
+    payments = Payment.objects.using("source").aggregate(
+        first=Min("payment_date"), last=Max("payment_date")
+    )
+    bounds = [value for value in (*rentals.values(), *payments.values()) if value]
+    if not bounds:
+        return None
+    return min(bounds).date(), max(bounds).date()
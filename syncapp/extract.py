@@ -0,0 +1,185 @@
+import hashlib
+
+from syncapp.batching import iter_chunks, iter_keyset
+from syncapp.models_source import (
+    Film,
+    Actor,
+    Category,
+    Store,
+    Customer,
+    Staff,
+)
+from syncapp.models import (
+    DimFilm,
+    DimActor,
+    DimCategory,
+    DimStore,
+    DimCustomer,
+    DimStaff,
+)
+
+
+class ExtractSpec:
+    """
+    Declarative extraction for one dimension.
+
+    columns maps each target (dimension) field to a source lookup path;
+    related paths such as "address__city__country__country" become joins
+    in a single values_list() query, so no source model instances are built
+    and no per-row related lookups happen. coalesce gives replacement values
+    for NULL source columns. Rows come out as dicts keyed by target field,
+    ready for target(**row). changed_field is the target field holding the
+    source change timestamp used for incremental watermarks. Built rows
+    carry a row_hash fingerprint of every other column, so updates that only
+    move the timestamp can be skipped.
+    """
+
+    def __init__(self, name, source, target, key, columns, coalesce=None,
+                 changed_field="last_update"):
+        if next(iter(columns.values())) != key:
+            # keyset pagination reads the key from the first column
+            raise ValueError(f"{name}: first column must be the key {key!r}")
+
+        self.name = name
+        self.source = source
+        self.target = target
+        self.key = key
+        self.columns = columns
+        self.coalesce = coalesce or {}
+        self.changed_field = changed_field
+
+    def queryset(self, **filters):
+        return (
+            self.source.objects.using("source")
+            .filter(**filters)
+            .values_list(*self.columns.values())
+        )
+
+    def iter_chunks(self, chunk_size, after=None, **filters):
+        """Yield lists of row dicts, chunk_size rows per keyset page, keys > after."""
+        fields = list(self.columns)
+        chunks = iter_chunks(self.queryset(**filters), chunk_size, key=self.key, after=after)
+        for chunk in chunks:
+            yield [self.to_row(fields, values) for values in chunk]
+
+    def iter_changed(self, chunk_size, after=None):
+        """
+        Yield lists of row dicts in (changed_field, key) order, strictly
+        after the `after` watermark tuple (everything when None).
+        """
+        fields = list(self.columns)
+        changed_index = fields.index(self.changed_field)
+        chunks = iter_keyset(
+            self.queryset(),
+            chunk_size,
+            (self.columns[self.changed_field], self.key),
+            after=after,
+            key_of=lambda values: (values[changed_index], values[0]),
+        )
+        for chunk in chunks:
+            yield [self.to_row(fields, values) for values in chunk]
+
+    def watermark(self, row):
+        return row[self.changed_field], row[self.key]
+
+    def to_row(self, fields, values):
+        row = dict(zip(fields, values))
+        for field, default in self.coalesce.items():
+            if row[field] is None:
+                row[field] = default
+        return row
+
+    def fingerprint(self, row):
+        """Compact hash of the row's columns, change timestamp excluded."""
+        values = [row[field] for field in self.columns if field != self.changed_field]
+        return hashlib.blake2b(repr(values).encode(), digest_size=8).hexdigest()
+
+    def build(self, rows, model=None):
+        """Target instances for rows; model overrides the target (e.g. a shadow copy)."""
+        model = model or self.target
+        return [model(**row, row_hash=self.fingerprint(row)) for row in rows]
+
+
+FILM = ExtractSpec(
+    "film", Film, DimFilm, key="film_id",
+    columns={
+        "film_id": "film_id",
+        "title": "title",
+        "rating": "rating",
+        "length": "length",
+        "language": "language__name",
+        "release_year": "release_year",
+        "last_update": "last_update",
+    },
+    coalesce={"rating": ""},
+)
+
+ACTOR = ExtractSpec(
+    "actor", Actor, DimActor, key="actor_id",
+    columns={
+        "actor_id": "actor_id",
+        "first_name": "first_name",
+        "last_name": "last_name",
+        "last_update": "last_update",
+    },
+)
+
+CATEGORY = ExtractSpec(
+    "category", Category, DimCategory, key="category_id",
+    columns={
+        "category_id": "category_id",
+        "name": "name",
+        "last_update": "last_update",
+    },
+)
+
+STORE = ExtractSpec(
+    "store", Store, DimStore, key="store_id",
+    columns={
+        "store_id": "store_id",
+        "city": "address__city__city",
+        "country": "address__city__country__country",
+        "last_update": "last_update",
+    },
+)
+
+CUSTOMER = ExtractSpec(
+    "customer", Customer, DimCustomer, key="customer_id",
+    columns={
+        "customer_id": "customer_id",
+        "first_name": "first_name",
+        "last_name": "last_name",
+        "active": "active",
+        "city": "address__city__city",
+        "country": "address__city__country__country",
+        "last_update": "last_update",
+    },
+)
+
+STAFF = ExtractSpec(
+    "staff", Staff, DimStaff, key="staff_id",
+    columns={
+        "staff_id": "staff_id",
+        "first_name": "first_name",
+        "last_name": "last_name",
+        "store_id": "store_id",
+        "active": "active",
+        "last_update": "last_update",
+    },
+)
+
+DIMENSION_SPECS = {
+    spec.name: spec for spec in (FILM, ACTOR, CATEGORY, STORE, CUSTOMER, STAFF)
+}
+
+
+def staff_stores(ids=None):
+    """
+    {staff_id: home store_id} for every source staff member (or those with
+    ids), read once per run (staff is tiny) so facts don't fetch each row's
+    staff to find it.
+    """
+    staff = Staff.objects.using("source")
+    if ids is not None:
+        staff = staff.filter(staff_id__in=ids)
+    return dict(staff.values_list("staff_id", "store_id"))
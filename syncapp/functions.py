@@ -0,0 +1,22 @@
+import zlib
+
+from django.db.models import BigIntegerField, Func
+
+
+class CRC32(Func):
+    """MySQL's CRC32(); SQLite connections get the same function registered."""
+    function = "CRC32"
+    output_field = BigIntegerField()
+
+
+def crc32(value):
+    return None if value is None else zlib.crc32(value.encode("utf-8"))
+
+
+def register_functions(sender, connection, **kwargs):
+    """
+    connection_created handler adding CRC32() to SQLite connections. Kept
+    out of reconcile so ready() does not import the unmanaged source models.
+    """
+    if connection.vendor == "sqlite":
+        connection.connection.create_function("CRC32", 1, crc32, deterministic=True)
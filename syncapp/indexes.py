@@ -0,0 +1,103 @@
+from django.db import OperationalError, connections
+
+
+def secondary_indexes(table, using="default"):
+    """
+    (name, CREATE INDEX sql) of the non-unique indexes declared on table.
+    Unique and primary key indexes are left out: they enforce constraints
+    and must stay in place while loading.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master"
+            " WHERE type = 'index' AND tbl_name = %s AND sql IS NOT NULL"
+            " AND sql NOT LIKE 'CREATE UNIQUE%%' ORDER BY name",
+            [table],
+        )
+        return cursor.fetchall()
+
+
+def drop_secondary_indexes(models, using="default"):
+    """
+    Drop the secondary indexes of models' tables before a bulk load, so rows
+    are not indexed one by one; returns what rebuild_indexes() needs to put
+    them back. Run both inside the load's transaction: if the load fails,
+    rolling back brings the indexes back.
+    """
+    connection = connections[using]
+    dropped = []
+    for model in models:
+        dropped.extend(secondary_indexes(model._meta.db_table, using))
+
+    with connection.cursor() as cursor:
+        for name, _ in dropped:
+            cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+    return dropped
+
+
+def rebuild_indexes(dropped, using="default"):
+    """Recreate indexes removed by drop_secondary_indexes(), one pass each."""
+    with connections[using].cursor() as cursor:
+        for _, sql in dropped:
+            cursor.execute(sql)
+
+
+def table_indexes(table, using="default"):
+    """
+    Every index on table as dicts with name, columns, unique and origin
+    ("c" declared, "u" unique constraint, "pk" primary key). An INTEGER
+    PRIMARY KEY is the rowid itself and is listed as origin "rowid".
+    """
+    connection = connections[using]
+    quoted = connection.ops.quote_name(table)
+    indexes = []
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA table_info({quoted})")
+        pk_columns = [row[1] for row in sorted(cursor.fetchall(), key=lambda row: row[5]) if row[5]]
+
+        cursor.execute(f"PRAGMA index_list({quoted})")
+        for _, name, unique, origin, _ in cursor.fetchall():
+            cursor.execute(f"PRAGMA index_info({connection.ops.quote_name(name)})")
+            columns = [row[2] for row in sorted(cursor.fetchall())]
+            indexes.append({"name": name, "columns": columns, "unique": bool(unique), "origin": origin})
+
+    if pk_columns and not any(index["origin"] == "pk" for index in indexes):
+        indexes.append({"name": "(rowid)", "columns": pk_columns, "unique": True, "origin": "rowid"})
+    return indexes
+
+
+def redundant_indexes(indexes):
+    """
+    Declared non-unique indexes that another index already covers: their
+    columns are a leading prefix of (or equal to) another index's columns.
+    Of two identical plain indexes the one with the smaller name is kept.
+    Returns {redundant index name: best covering index name}.
+    """
+    def covers(other, index):
+        if other is index or other["columns"][:len(index["columns"])] != index["columns"]:
+            return False
+        if other["unique"] or other["origin"] != "c" or len(other["columns"]) > len(index["columns"]):
+            return True
+        return other["name"] < index["name"]
+
+    redundant = {}
+    for index in indexes:
+        if index["unique"] or index["origin"] != "c":
+            continue
+        covering = [other for other in indexes if covers(other, index)]
+        if covering:
+            # prefer constraints, then wider indexes
+            best = max(covering, key=lambda other: (other["unique"], len(other["columns"])))
+            redundant[index["name"]] = best["name"]
+    return redundant
+
+
+def index_sizes(using="default"):
+    """{table or index name: bytes on disk}, or {} without the dbstat table."""
+    try:
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name")
+            return dict(cursor.fetchall())
+    except OperationalError:
+        return {}
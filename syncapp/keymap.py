@@ -0,0 +1,166 @@
+from bisect import bisect_right
+from collections import Counter
+
+from syncapp.batching import MAX_IN_PARAMS, batched
+from syncapp.history import is_versioned
+from syncapp.models import (
+    DimFilm,
+    DimActor,
+    DimCategory,
+    DimStore,
+    DimCustomer,
+    DimStaff,
+)
+
+
+# dimension name -> (model, natural key field, surrogate key field)
+DIMENSIONS = {
+    "film": (DimFilm, "film_id", "film_key"),
+    "actor": (DimActor, "actor_id", "actor_key"),
+    "category": (DimCategory, "category_id", "category_key"),
+    "store": (DimStore, "store_id", "store_key"),
+    "customer": (DimCustomer, "customer_id", "customer_key"),
+    "staff": (DimStaff, "staff_id", "staff_key"),
+}
+
+
+class DimensionKeyMap:
+    """
+    In-memory natural key -> surrogate key lookup for the analytics dimensions.
+
+    Each dimension map is loaded with a single values_list() query the first
+    time it is needed and then kept up to date in place as dimensions are
+    upserted, so fact and bridge loaders never query SQLite per row.
+    hits/misses/queries count lookups per dimension for reporting.
+    tables optionally maps a dimension model to the model keys are read
+    from instead, e.g. its shadow copy while a full load rebuilds it.
+
+    get() returns the current version's key. For versioned (SCD2)
+    dimensions get_as_of() picks the version valid at a point in time from
+    an in-memory interval index: per natural key, the valid_from of every
+    version after the first and the matching keys, searched with bisect.
+    """
+
+    def __init__(self, tables=None):
+        self.tables = tables or {}
+        self.maps = {}
+        self.versions = {}
+        self.hits = Counter()
+        self.misses = Counter()
+        self.queries = Counter()
+
+    def load(self, *names):
+        """(Re)load the full map for the given dimensions (default: all)."""
+        for name in names or DIMENSIONS:
+            model, natural, surrogate = self._dimension(name)
+            if is_versioned(model):
+                self.versions[name] = {}
+                self._add_versions(name, model.objects.all())
+                self.maps[name] = {
+                    natural_id: keys[-1] for natural_id, (_, keys) in self.versions[name].items()
+                }
+            else:
+                self.maps[name] = dict(model.objects.values_list(natural, surrogate))
+            self.queries[name] += 1
+
+    def refresh(self, name, natural_ids):
+        """Re-read surrogate keys (every version) for just the given natural keys."""
+        model, natural, surrogate = self._dimension(name)
+        key_map = self._map(name)
+        versioned = is_versioned(model)
+
+        for batch in batched(natural_ids, MAX_IN_PARAMS):
+            rows = model.objects.filter(**{f"{natural}__in": batch})
+            if versioned:
+                for natural_id in batch:
+                    self.versions[name].pop(natural_id, None)
+                self._add_versions(name, rows)
+                key_map.update(
+                    (natural_id, self.versions[name][natural_id][1][-1])
+                    for natural_id in batch if natural_id in self.versions[name]
+                )
+            else:
+                key_map.update(rows.values_list(natural, surrogate))
+            self.queries[name] += 1
+
+    def set(self, name, natural_id, key):
+        self._map(name)[natural_id] = key
+
+    def discard(self, name, natural_id):
+        self._map(name).pop(natural_id, None)
+        self.versions.get(name, {}).pop(natural_id, None)
+
+    def get(self, name, natural_id):
+        """
+        Return the surrogate key for natural_id.
+        Raises the dimension's DoesNotExist on a miss, like Model.objects.get().
+        """
+        try:
+            key = self._map(name)[natural_id]
+        except KeyError:
+            self.misses[name] += 1
+            model, natural, _ = self._dimension(name)
+            raise model.DoesNotExist(
+                f"{model.__name__} with {natural}={natural_id} not found in key map."
+            )
+
+        self.hits[name] += 1
+        return key
+
+    def get_as_of(self, name, natural_id, when):
+        """
+        Surrogate key of the natural_id version valid at `when`; the same as
+        get() for dimensions that are not versioned.
+        """
+        self._map(name)
+        if name not in self.versions:
+            return self.get(name, natural_id)
+
+        try:
+            starts, keys = self.versions[name][natural_id]
+        except KeyError:
+            self.misses[name] += 1
+            model, natural, _ = self._dimension(name)
+            raise model.DoesNotExist(
+                f"{model.__name__} with {natural}={natural_id} not found in key map."
+            )
+
+        self.hits[name] += 1
+        return keys[bisect_right(starts, when)]
+
+    def stats(self):
+        return {
+            name: {
+                "size": len(self.maps.get(name, ())),
+                "hits": self.hits[name],
+                "misses": self.misses[name],
+                "queries": self.queries[name],
+            }
+            for name in DIMENSIONS
+        }
+
+    def summary(self):
+        return (
+            f"key map: {sum(self.hits.values())} hits, "
+            f"{sum(self.misses.values())} misses, "
+            f"{sum(self.queries.values())} lookup queries"
+        )
+
+    def _add_versions(self, name, rows):
+        _, natural, surrogate = DIMENSIONS[name]
+        index = self.versions[name]
+        versions = rows.order_by(natural, "version").values_list(natural, "valid_from", surrogate)
+        for natural_id, valid_from, key in versions.iterator(chunk_size=10_000):
+            starts, keys = index.setdefault(natural_id, ([], []))
+            if keys:
+                starts.append(valid_from)
+            keys.append(key)
+
+    def _dimension(self, name):
+        model, natural, surrogate = DIMENSIONS[name]
+        return self.tables.get(model, model), natural, surrogate
+
+    def _map(self, name):
+        if name not in self.maps:
+            self.load(name)
+        return self.maps[name]
@@ -0,0 +1,57 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from syncapp.indexes import index_sizes, redundant_indexes, table_indexes
+
+
+class Command(BaseCommand):
+    help = "Report redundant indexes on the SQLite analytics schema and their write cost."
+
+    def handle(self, *args, **options):
+        self.stdout.write("🔎 Auditing analytics indexes...")
+
+        sizes = index_sizes()
+        found = 0
+        for model in apps.get_app_config("syncapp").get_models():
+            if model._meta.managed:
+                found += self.audit_table(model, sizes)
+
+        if found:
+            self.stdout.write(self.style.WARNING(f"{found} redundant index(es) found."))
+        else:
+            self.stdout.write(self.style.SUCCESS("No redundant indexes found."))
+
+    def audit_table(self, model, sizes):
+        table = model._meta.db_table
+        indexes = table_indexes(table)
+        redundant = redundant_indexes(indexes)
+
+        # every insert writes the table b-tree plus one entry per index
+        btrees = 1 + sum(1 for index in indexes if index["origin"] != "rowid")
+        self.stdout.write(
+            f"{table}: {model.objects.count()} rows, "
+            f"{btrees} b-trees written per inserted row{self.size(sizes, table)}"
+        )
+
+        for index in indexes:
+            kind = "unique" if index["unique"] else "index"
+            line = (
+                f"   → {index['name']} ({', '.join(index['columns'])}) "
+                f"[{kind}]{self.size(sizes, index['name'])}"
+            )
+            if index["name"] in redundant:
+                line += f" REDUNDANT: covered by {redundant[index['name']]}"
+            self.stdout.write(line)
+
+        if redundant:
+            self.stdout.write(
+                f"   → dropping {len(redundant)} redundant index(es) saves "
+                f"{len(redundant)}/{btrees} b-tree writes per row "
+                f"({100 * len(redundant) / btrees:.0f}% of {table}'s write amplification)."
+            )
+        return len(redundant)
+
+    def size(self, sizes, name):
+        if name not in sizes:
+            return ""
+        return f", {sizes[name] / 1024:.0f} KiB"
@@ -1,16 +1,12 @@
-from django.core.management.base import BaseCommand
-from django.db import transaction
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 from django.db.models import Max
-from django.utils import timezone
-from datetime import datetime  
 
 from syncapp.models_source import (
-    Film,
-    Actor,
-    Category,
-    FilmActor,
-    Store,
-    Customer,
     Inventory,
     Rental,
     Payment,
@@ -21,6 +17,7 @@ from syncapp.models import (
     DimCategory,
     DimStore,
     DimCustomer,
+    DimStaff,
     BridgeFilmActor,
     BridgeFilmCategory,
     FactRental,
@@ -28,321 +25,531 @@ from syncapp.models import (
     SyncState,
     DimDate,
 )
+from syncapp.aggregates import AGGREGATES
+from syncapp.batching import iter_chunks
+from syncapp.bridges import BRIDGE_SPECS
+from syncapp.checkpoints import LoadCheckpoints
+from syncapp.controls import CONTROL_TOTALS
+from syncapp.dates import DateKeyIndex, date_key, ensure_date_range, source_date_range
+from syncapp.extract import DIMENSION_SPECS, staff_stores
+from syncapp.history import copy_history, is_versioned, merge_versions
+from syncapp.indexes import drop_secondary_indexes, rebuild_indexes
+from syncapp.keymap import DimensionKeyMap
+from syncapp.metrics import LoadMetrics
+from syncapp.partitions import partitioned_facts
+from syncapp.pragmas import PROFILES, pragma_profile
+from syncapp.scheduler import SCHEDULERS, Stage
+from syncapp.shadow import ShadowTables
+from syncapp.watermarks import (
+    WATERMARK_COLUMNS,
+    mark_reconciled,
+    new_load_generation,
+    set_watermark,
+    source_high_watermark,
+)
+
+
+# analytics tables rebuilt by a full load, parents first
+TARGET_MODELS = [
+    DimFilm,
+    DimActor,
+    DimCategory,
+    DimStore,
+    DimCustomer,
+    DimStaff,
+    BridgeFilmActor,
+    BridgeFilmCategory,
+    FactRental,
+    FactPayment,
+]
+
+# load stage -> sync_state table whose watermark it establishes
+SYNC_TABLES = {
+    "dim_film": "film",
+    "dim_actor": "actor",
+    "dim_category": "category",
+    "dim_store": "store",
+    "dim_customer": "customer",
+    "dim_staff": "staff",
+    "fact_rental": "rental",
+    "fact_payment": "payment",
+    "bridge_film_actor": "film_actor",
+    "bridge_film_category": "film_category",
+}
 
 
 class Command(BaseCommand):
     help = "Full reload of all analytics tables from Sakila (MySQL → SQLite)."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Source rows read and written per chunk (default: 2000)",
+        )
+        parser.add_argument(
+            "--memory-report",
+            action="store_true",
+            help="Also trace peak Python memory per table with tracemalloc. This slows "
+                 "the load down, and with --workers > 1 the threads share one traced heap "
+                 "(default: only the process peak RSS is reported)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Threads extracting from the source concurrently (default: 1, inline)",
+        )
+        parser.add_argument(
+            "--pipeline",
+            choices=sorted(SCHEDULERS),
+            default="threads",
+            help="Extraction pipeline: worker threads, or asyncio producers that "
+                 "overlap source reads with writes even with one worker (default: threads)",
+        )
+        parser.add_argument(
+            "--checkpointed",
+            action="store_true",
+            help="Load into shadow tables, committing per chunk, and swap them in at the end",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue an interrupted --checkpointed load after its last committed chunk",
+        )
+        parser.add_argument(
+            "--defer-indexes",
+            action="store_true",
+            help="When reloading the live tables in place, drop their secondary indexes "
+                 "first and rebuild them in one pass afterwards. Only pays off for "
+                 "large loads; by default the indexes are maintained while loading",
+        )
+        parser.add_argument(
+            "--sqlite-profile",
+            choices=sorted(PROFILES),
+            default="full_load",
+            help="SQLite pragma profile used while loading; the connection's own "
+                 "profile is restored afterwards (default: full_load). full_load_unsafe "
+                 "turns fsync off (synchronous=OFF): faster, but an OS crash or power "
+                 "loss mid-load can corrupt the whole database file",
+        )
+
     def handle(self, *args, **options):
         self.stdout.write("Starting FULL LOAD (complete refresh of analytics DB)...")
 
-        with transaction.atomic():
-            # clear analytics tables
-            self.clear_target_tables()
+        self.chunk_size = options["chunk_size"]
+        self.dates = DateKeyIndex()
+        self.metrics = LoadMetrics(track_memory=options["memory_report"], threads=options["workers"])
+        self.shadow = None
+        self.checkpoints = None
+        self.timings = {}
+        self.skipped_links = Counter()
+        self.staff_stores = staff_stores()
+        self.partitions = partitioned_facts()
+
+        try:
+            with pragma_profile(options["sqlite_profile"]):
+                scheduler = self.load(options)
+        finally:
+            self.metrics.stop()
+
+        self.metrics.report(self.stdout.write)
+        for name, skipped in self.skipped_links.items():
+            if skipped:
+                message = BRIDGE_SPECS[name].skipped_message(skipped)
+                self.stdout.write(self.style.WARNING(f"   → {message}."))
+        scheduler.report(self.stdout.write)
+        self.report_timings()
+        self.stdout.write(f"   → {self.keys.summary()}.")
+        self.stdout.write(self.style.SUCCESS("FULL LOAD completed successfully!"))
 
-            # load dims
-            self.load_dim_film()
-            self.load_dim_actor()
-            self.load_dim_category()
-            self.load_dim_store()
-            self.load_dim_customer()
-            # load bridges
-            self.load_bridge_film_actor()
-            self.load_bridge_film_category()
-            # load facts
-            self.load_fact_rental()
-            self.load_fact_payment()
-            # update sync_state timestamps
-            self.update_sync_state()
+    def load(self, options):
+        if connection.in_atomic_block:
+            # shadow tables need DDL outside a transaction; a caller's
+            # atomic block would also swallow the per-chunk commits
+            self.stdout.write("   → inside a transaction: loading the live tables in place.")
+            return self.load_in_place(options)
 
-        self.stdout.write(self.style.SUCCESS("FULL LOAD completed successfully!"))
+        checkpointed = options["checkpointed"] or options["resume"]
+        return self.load_shadowed(options, checkpointed)
 
-    # clear all analytics tables completely
-    def clear_target_tables(self):
-        self.stdout.write("🧹 Clearing existing analytics tables...")
+    def load_in_place(self, options):
+        """Clear and reload the live tables in one transaction."""
+        self.keys = DimensionKeyMap()
+        scheduler = self.build_scheduler(options)
 
-        FactPayment.objects.all().delete()
-        FactRental.objects.all().delete()
-        BridgeFilmCategory.objects.all().delete()
-        BridgeFilmActor.objects.all().delete()
+        # read the source high-watermarks before extracting anything: rows
+        # changed while the load runs are then picked up by the next
+        # incremental sync instead of being skipped
+        watermarks = {table: source_high_watermark(table) for table in WATERMARK_COLUMNS}
 
-        DimCustomer.objects.all().delete()
-        DimStore.objects.all().delete()
-        DimCategory.objects.all().delete()
-        DimActor.objects.all().delete()
-        DimFilm.objects.all().delete()
+        with transaction.atomic():
+            # partitioned facts are loaded as plain tables and split again
+            self.collapse_partitions()
 
-        self.stdout.write("   → Target tables cleared.")
+            # clear analytics tables
+            self.clear_target_tables()
 
-    # dimensions
-    def load_dim_film(self):
-        self.stdout.write("Loading dim_film...")
+            # dims → bridges → facts, dim_date → facts; with --defer-indexes
+            # secondary indexes are not maintained row by row but rebuilt in
+            # one pass
+            with self.timed("load"):
+                dropped = drop_secondary_indexes(TARGET_MODELS) if options["defer_indexes"] else []
+                scheduler.run()
 
-        records = []
-        for film in Film.objects.using("source").all():
-            records.append(
-                DimFilm(
-                    film_id=film.film_id,
-                    title=film.title,
-                    rating=film.rating or "",
-                    length=film.length,
-                    language=film.language.name,
-                    release_year=film.release_year,
-                    last_update=film.last_update,
-                )
-            )
+            with self.timed("index"):
+                rebuild_indexes(dropped)
 
-        DimFilm.objects.bulk_create(records)
-        self.stdout.write(f"   → dim_film: {len(records)} rows loaded.")
+            self.split_partitions()
+            self.rebuild_control_totals()
+            self.rebuild_aggregates()
 
-    def load_dim_actor(self):
-        self.stdout.write("Loading dim_actor...")
+            # update sync_state watermarks
+            self.update_sync_state(watermarks)
 
-        records = []
-        for actor in Actor.objects.using("source").all():
-            records.append(
-                DimActor(
-                    actor_id=actor.actor_id,
-                    first_name=actor.first_name,
-                    last_name=actor.last_name,
-                    last_update=actor.last_update,
-                )
-            )
-        DimActor.objects.bulk_create(records)
-        self.stdout.write(f"   → dim_actor: {len(records)} rows loaded.")
+        return scheduler
 
-    def load_dim_category(self):
-        self.stdout.write("Loading dim_category...")
+    def load_shadowed(self, options, checkpointed):
+        """
+        Build every target table in a shadow copy and swap the shadows in at
+        the end, so readers keep seeing the previous warehouse until the swap
+        and the old rows go away with a DROP TABLE instead of deletes.
 
-        records = []
-        for cat in Category.objects.using("source").all():
-            records.append(
-                DimCategory(
-                    category_id=cat.category_id,
-                    name=cat.name,
-                    last_update=cat.last_update,
-                )
-            )
-        DimCategory.objects.bulk_create(records)
-        self.stdout.write(f"   → dim_category: {len(records)} rows loaded.")
+        Checkpointed loads commit every chunk together with its checkpoint;
+        with --resume they continue after the last committed chunks.
+        Otherwise the shadows are filled in one transaction.
+        """
+        self.shadow = ShadowTables(TARGET_MODELS)
+        self.keys = DimensionKeyMap(tables=self.shadow.shadows)
+        if checkpointed:
+            self.checkpoints = LoadCheckpoints()
+        scheduler = self.build_scheduler(options)
+
+        if options["resume"]:
+            if not (self.checkpoints.load() and self.shadow.exists()):
+                raise CommandError("No interrupted checkpointed full load to resume.")
+            done = [name for name in scheduler.order if self.checkpoints.completed(name)]
+            self.stdout.write(f"⏯️  Resuming full load ({len(done)}/{len(scheduler.order)} stages done)...")
+        else:
+            self.stdout.write("🧱 Creating shadow tables...")
+            self.shadow.create()
+            # versioned dimensions keep their history: earlier versions are
+            # copied over and the load only adds versions for changed rows
+            for model in TARGET_MODELS:
+                if is_versioned(model):
+                    copy_history(model, self.shadow.shadows[model])
+            # source high-watermarks are read before extracting anything (see load_in_place)
+            self.watermarks = {table: source_high_watermark(table) for table in WATERMARK_COLUMNS}
+            if checkpointed:
+                self.checkpoints.start(scheduler.order, {
+                    stage: self.watermarks[table] for stage, table in SYNC_TABLES.items()
+                })
+
+        with self.timed("load"):
+            if checkpointed:
+                scheduler.run()
+            else:
+                with transaction.atomic():
+                    scheduler.run()
+
+        self.stdout.write("🔀 Swapping shadow tables in...")
+        with self.timed("swap"):
+            self.shadow.swap(prepare=self.collapse_partitions, finalize=self.finish_shadowed)
+        self.timings["index"] = self.shadow.index_seconds
+        self.stdout.write("   → Live tables replaced.")
+        return scheduler
+
+    def finish_shadowed(self):
+        # runs inside the swap transaction
+        self.split_partitions()
+        self.rebuild_control_totals()
+        self.rebuild_aggregates()
+        if self.checkpoints is not None:
+            watermarks = self.checkpoints.watermarks()
+            self.watermarks = {table: watermarks[stage] for stage, table in SYNC_TABLES.items()}
+            self.checkpoints.clear()
+        self.update_sync_state(self.watermarks)
+
+    def collapse_partitions(self):
+        # the partition views and tables give way to plain fact tables, which
+        # the shadow swap can rename (and that are split again afterwards)
+        for partitions in self.partitions.values():
+            partitions.collapse()
+
+    def split_partitions(self):
+        for partitions in self.partitions.values():
+            partitions.split()
+            self.stdout.write(f"   → {partitions.table}: split into {len(partitions.months())} monthly partitions.")
+
+    def rebuild_control_totals(self):
+        # every day of the reloaded facts is pending until validated again
+        for controls in CONTROL_TOTALS.values():
+            days = controls.rebuild()
+            self.stdout.write(f"   → {controls.name}: control totals rebuilt for {days} days.")
+
+    def rebuild_aggregates(self):
+        # the summary tables are recomputed once instead of tracked row by row
+        for aggregate in AGGREGATES.values():
+            rows = aggregate.rebuild()
+            self.stdout.write(f"   → {aggregate.table}: {rows} rows.")
+
+    @contextmanager
+    def timed(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - started
+
+    def report_timings(self):
+        line = f"   → time to load: {self.timings.get('load', 0.0):.2f}s"
+        if "index" in self.timings:
+            line += f", time to index: {self.timings['index']:.2f}s"
+        if "swap" in self.timings:
+            line += f", time to swap: {self.timings['swap']:.2f}s"
+        self.stdout.write(line + ".")
+
+    def build_scheduler(self, options):
+        return SCHEDULERS[options["pipeline"]](
+            self.build_stages(),
+            workers=options["workers"],
+            metrics=self.metrics,
+        )
 
-    def load_dim_store(self):
-        self.stdout.write("Loading dim_store...")
+    def table(self, model):
+        """The model a stage writes to: the shadow copy when loading checkpointed."""
+        if self.shadow is None:
+            return model
+        return self.shadow.shadows.get(model, model)
+
+    def build_stages(self):
+        return [
+            self.stage("dim_date", self.extract_date_range, self.load_dim_date),
+            *[self.dimension_stage(spec) for spec in DIMENSION_SPECS.values()],
+            *[self.bridge_stage(spec) for spec in BRIDGE_SPECS.values()],
+            self.stage("fact_rental", self.extract_rentals, self.load_fact_rental,
+                       depends_on=["dim_date", "dim_film", "dim_store", "dim_customer", "dim_staff"],
+                       key_of=lambda r: r.rental_id),
+            self.stage("fact_payment", self.extract_payments, self.load_fact_payment,
+                       depends_on=["dim_date", "dim_store", "dim_customer", "dim_staff"],
+                       key_of=lambda p: p.payment_id),
+        ]
+
+    def stage(self, table, extract, load, depends_on=(), dimension=None,
+              key_of=None, target=None):
+        """
+        Wrap a table's extract/load pair as a scheduler stage. When loading
+        checkpointed, each chunk commits with the stage's checkpoint: key_of(row)
+        gives the source key extract(after) resumes from; stages without
+        key_of restart from scratch, clearing target's shadow rows first.
+        """
+        def start():
+            if self.checkpoints is not None and self.checkpoints.completed(table):
+                self.stdout.write(f"Skipping {table} (already loaded).")
+                return
+
+            self.stdout.write(f"Loading {table}...")
+            if self.checkpoints is not None and key_of is None and self.checkpoints.rows(table):
+                if target is not None:
+                    self.table(target).objects.all().delete()
+                self.checkpoints.reset(table)
+
+        def extract_chunks():
+            if self.checkpoints is None:
+                return extract()
+            if self.checkpoints.completed(table):
+                return ()
+            if key_of is None:
+                return extract()
+            return extract(after=self.checkpoints.after(table))
+
+        def load_chunk(chunk):
+            if self.checkpoints is None:
+                return load(chunk)
+
+            with transaction.atomic():
+                rows = load(chunk)
+                self.checkpoints.advance(table, rows, key_of(chunk[-1]) if key_of else None)
+            return rows
+
+        def complete(rows):
+            # dimension keys are complete once the whole table is written
+            if dimension:
+                self.keys.load(dimension)
+
+            if self.checkpoints is not None:
+                if self.checkpoints.completed(table):
+                    return
+                self.checkpoints.complete(table)
+                # includes chunks committed before a resume
+                rows = self.checkpoints.rows(table)
+            self.stdout.write(f"   → {table}: {rows} rows loaded.")
+
+        return Stage(
+            table, extract_chunks, load_chunk,
+            depends_on=depends_on, start=start, complete=complete,
+        )
 
-        records = []
-        stores = Store.objects.using("source").select_related("address__city__country")
+    def dimension_stage(self, spec):
+        return self.stage(
+            f"dim_{spec.name}",
+            lambda after=None: spec.iter_chunks(self.chunk_size, after=after),
+            lambda rows: self.load_dimension(spec, rows),
+            dimension=spec.name,
+            key_of=lambda row: row[spec.key],
+        )
+
+    def bridge_stage(self, spec):
+        # link tables have composite keys, so they are streamed with a
+        # cursor and restart from scratch on --resume
+        return self.stage(
+            f"bridge_{spec.name}",
+            lambda: spec.iter_chunks(self.chunk_size),
+            lambda pairs: self.load_bridge(spec, pairs),
+            depends_on=[f"dim_{dimension}" for dimension, _, _ in spec.sides],
+            target=spec.target,
+        )
 
-        for store in stores:
-            addr = store.address
-            city = addr.city
-            country = city.country
+    # clear all analytics tables completely, except the history of
+    # versioned dimensions
+    def clear_target_tables(self):
+        self.stdout.write("🧹 Clearing existing analytics tables...")
 
-            records.append(
-                DimStore(
-                    store_id=store.store_id,
-                    city=city.city,
-                    country=country.country,
-                    last_update=store.last_update,
-                )
-            )
+        # children first; _raw_delete() issues one set-based DELETE per table,
+        # where delete() would fetch the rows to run cascades and signals
+        for model in reversed(TARGET_MODELS):
+            if is_versioned(model):
+                continue
+            model.objects.all()._raw_delete(connection.alias)
 
-        DimStore.objects.bulk_create(records)
-        self.stdout.write(f"   → dim_store: {len(records)} rows loaded.")
+        self.stdout.write("   → Target tables cleared.")
 
-    def load_dim_customer(self):
-        self.stdout.write("Loading dim_customer...")
+    # extractors (may run on worker threads: source reads only)
+    def extract_date_range(self):
+        date_range = source_date_range()
+        if date_range:
+            yield date_range
 
-        records = []
-        customers = Customer.objects.using("source").select_related("address__city__country")
+    def extract_rentals(self, after=None):
+        # only inventory.film_id/store_id are needed, so don't join film/store/customer
+        rentals = Rental.objects.using("source").select_related("inventory")
+        return iter_chunks(rentals, self.chunk_size, key="rental_id", after=after)
 
-        for cust in customers:
-            addr = cust.address
-            city = addr.city
-            country = city.country
+    def extract_payments(self, after=None):
+        payments = Payment.objects.using("source").all()
+        return iter_chunks(payments, self.chunk_size, key="payment_id", after=after)
 
-            records.append(
-                DimCustomer(
-                    customer_id=cust.customer_id,
-                    first_name=cust.first_name,
-                    last_name=cust.last_name,
-                    active=cust.active,
-                    city=city.city,
-                    country=country.country,
-                    last_update=cust.last_update,
-                )
-            )
+    # dimensions
+    def load_dim_date(self, date_range):
+        return ensure_date_range(*date_range)
 
-        DimCustomer.objects.bulk_create(records)
-        self.stdout.write(f"   → dim_customer: {len(records)} rows loaded.")
+    def load_dimension(self, spec, rows):
+        model = self.table(spec.target)
+        if is_versioned(model):
+            merge_versions(spec, rows, model, self.chunk_size)
+            return len(rows)
 
+        records = spec.build(rows, model)
+        model.objects.bulk_create(records, batch_size=self.chunk_size)
+        return len(records)
 
     def ensure_dim_dates_exist(self, date_keys):
         """
         Ensure that all date_keys in date_keys exist as DimDate rows.
         This makes full_load safe even if INIT wasn't run beforehand.
         """
-        if not date_keys:
-            return
-
-        existing = set(
-            DimDate.objects.filter(date_key__in=date_keys).values_list("date_key", flat=True)
-        )
-        missing = date_keys - existing
-        if not missing:
-            return
-
-        records = []
-        for key in sorted(missing):
-            dt = datetime.strptime(str(key), "%Y%m%d").date()
-            records.append(
-                DimDate(
-                    date_key=key,
-                    date=dt,
-                    year=dt.year,
-                    quarter=((dt.month - 1) // 3) + 1,
-                    month=dt.month,
-                    day_of_month=dt.day,
-                    day_of_week=dt.isoweekday(),
-                    is_weekend=dt.isoweekday() >= 6,
-                )
-            )
-
-        DimDate.objects.bulk_create(records)
+        self.dates.ensure(date_keys)
 
     # bridge tables
-    def load_bridge_film_actor(self):
-        self.stdout.write("Loading bridge_film_actor...")
-
-        records = []
-        links = FilmActor.objects.using("source").all()
-
-        for link in links:
-            try:
-                film_key = DimFilm.objects.get(film_id=link.film_id).film_key
-                actor_key = DimActor.objects.get(actor_id=link.actor_id).actor_key
-
-                records.append(
-                    BridgeFilmActor(
-                        film_key_id=film_key,
-                        actor_key_id=actor_key,
-                    )
-                )
-            except Exception:
-                continue
-
-        BridgeFilmActor.objects.bulk_create(records)
-        self.stdout.write(f"   → bridge_film_actor: {len(records)} rows loaded.")
-
-    def load_bridge_film_category(self):
-        self.stdout.write("Loading bridge_film_category...")
-
-        from syncapp.models_source import FilmCategory  # import inside method to avoid circular
-
-        records = []
-        links = FilmCategory.objects.using("source").all()
-
-        for link in links:
-            film_key = DimFilm.objects.get(film_id=link.film_id).film_key
-            category_key = DimCategory.objects.get(category_id=link.category_id).category_key
-
-            records.append(
-                BridgeFilmCategory(
-                    film_key_id=film_key,
-                    category_key_id=category_key,
-            )
-        )
-
-        BridgeFilmCategory.objects.bulk_create(records)
-        self.stdout.write(f"   → bridge_film_category: {len(records)} rows loaded.")
+    def load_bridge(self, spec, pairs):
+        key_pairs, skipped = spec.to_keys(self.keys, pairs)
+        self.skipped_links[spec.name] += skipped
+        model = self.table(spec.target)
+        model.objects.bulk_create(spec.build(key_pairs, model), batch_size=self.chunk_size)
+        return len(key_pairs)
 
     # fact tables
-    def load_fact_rental(self):
-        self.stdout.write("Loading fact_rental...")
-
-        rentals = Rental.objects.using("source").select_related(
-            "inventory__film", "customer", "inventory__store"
-        )
-
+    def load_fact_rental(self, chunk):
+        model = self.table(FactRental)
         date_keys = set()
-        for r in rentals:
-            date_keys.add(int(r.rental_date.strftime("%Y%m%d")))
-            if r.return_date:
-                date_keys.add(int(r.return_date.strftime("%Y%m%d")))
-
-        self.ensure_dim_dates_exist(date_keys)
-
         records = []
-        for r in rentals:
-            film_key = DimFilm.objects.get(film_id=r.inventory.film_id).film_key
-            store_key = DimStore.objects.get(store_id=r.inventory.store_id).store_key
-            customer_key = DimCustomer.objects.get(customer_id=r.customer_id).customer_key
-
-            date_key_rented = int(r.rental_date.strftime("%Y%m%d"))
-            date_key_returned = (
-                int(r.return_date.strftime("%Y%m%d")) if r.return_date else None
-            )
+        for r in chunk:
+            film_key = self.keys.get("film", r.inventory.film_id)
+            store_key = self.keys.get_as_of("store", r.inventory.store_id, r.rental_date)
+            customer_key = self.keys.get_as_of("customer", r.customer_id, r.rental_date)
+            staff_key = self.keys.get("staff", r.staff_id)
+
+            date_key_rented = date_key(r.rental_date)
+            date_key_returned = date_key(r.return_date)
+            date_keys.add(date_key_rented)
+            date_keys.add(date_key_returned)
 
             rental_duration = (
                 (r.return_date - r.rental_date).days if r.return_date else None
             )
 
             records.append(
-                FactRental(
+                model(
                     rental_id=r.rental_id,
                     date_key_rented_id=date_key_rented,
                     date_key_returned_id=date_key_returned,
                     film_key_id=film_key,
                     store_key_id=store_key,
                     customer_key_id=customer_key,
-                    staff_id=r.staff_id,
+                    staff_key_id=staff_key,
                     rental_duration_days=rental_duration,
                 )
             )
 
-        FactRental.objects.bulk_create(records)
-        self.stdout.write(f"   → fact_rental: {len(records)} rows loaded.")
-
-    def load_fact_payment(self):
-        self.stdout.write("Loading fact_payment...")
-
-        payments = Payment.objects.using("source").all()
-        date_keys = {int(p.payment_date.strftime("%Y%m%d")) for p in payments}
         self.ensure_dim_dates_exist(date_keys)
+        model.objects.bulk_create(records, batch_size=self.chunk_size)
+        return len(records)
 
+    def load_fact_payment(self, chunk):
+        model = self.table(FactPayment)
+        date_keys = set()
         records = []
-        for p in payments:
-            customer_key = DimCustomer.objects.get(customer_id=p.customer_id).customer_key
-            store_key = DimStore.objects.get(store_id=p.staff.store_id).store_key
-            date_key = int(p.payment_date.strftime("%Y%m%d"))
+        for p in chunk:
+            customer_key = self.keys.get_as_of("customer", p.customer_id, p.payment_date)
+            # payments belong to the store of the staff member who took them
+            store_key = self.keys.get_as_of("store", self.staff_stores[p.staff_id], p.payment_date)
+            staff_key = self.keys.get("staff", p.staff_id)
+            date_key_paid = date_key(p.payment_date)
+            date_keys.add(date_key_paid)
 
             records.append(
-                FactPayment(
+                model(
                     payment_id=p.payment_id,
-                    date_key_paid_id=date_key,
+                    date_key_paid_id=date_key_paid,
                     customer_key_id=customer_key,
                     store_key_id=store_key,
-                    staff_id=p.staff_id,
+                    staff_key_id=staff_key,
                     amount=p.amount,
                 )
             )
 
-        FactPayment.objects.bulk_create(records)
-        self.stdout.write(f"   → fact_payment: {len(records)} rows loaded.")
+        self.ensure_dim_dates_exist(date_keys)
+        model.objects.bulk_create(records, batch_size=self.chunk_size)
+        return len(records)
 
 
     # sync state
-    def update_sync_state(self):
-        now = timezone.now()
-
-        for table in [
-            "film",
-            "actor",
-            "category",
-            "store",
-            "customer",
-            "rental",
-            "payment",
-        ]:
-            SyncState.objects.filter(table_name=table).update(last_update=now)
-
-        self.stdout.write("   → sync_state timestamps updated.")
+    def update_sync_state(self, watermarks):
+        for table, watermark in watermarks.items():
+            if watermark is None:
+                # empty source table: sync everything next time
+                SyncState.objects.filter(table_name=table).update(
+                    last_update=None, last_pk=None, last_link_id=None,
+                )
+            else:
+                set_watermark(table, watermark)
+
+        # the bridges were just rebuilt from every source link
+        for spec in BRIDGE_SPECS.values():
+            mark_reconciled(spec.name)
+
+        # long-running syncs reload their key maps
+        new_load_generation()
+
+        self.stdout.write("   → sync_state watermarks updated.")
@@ -1,253 +1,691 @@
-from django.core.management.base import BaseCommand
+from collections import Counter
+from contextlib import ExitStack
+from datetime import timedelta
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from django.utils import timezone
-from datetime import datetime
 
 from syncapp.models_source import (
-    Film,
-    Actor,
-    Category,
-    Customer,
-    Store,
     Rental,
     Payment,
-    FilmActor,
-    FilmCategory,
 )
 from syncapp.models import (
-    DimFilm,
-    DimActor,
-    DimCategory,
-    DimStore,
-    DimCustomer,
-    BridgeFilmActor,
-    BridgeFilmCategory,
     FactRental,
     FactPayment,
-    SyncState,
+)
+from syncapp.aggregates import BRIDGE_AGGREGATES, FACT_AGGREGATES, tracking
+from syncapp.batching import MAX_IN_PARAMS, batched, bulk_upsert, iter_keyset
+from syncapp.bridges import (
+    BRIDGE_SPECS,
+    FILM_ACTOR,
+    FILM_CATEGORY,
+    delete_links,
+    diff_links,
+    insert_links,
+)
+from syncapp.changefeed import (
+    BinlogFeed,
+    JsonLinesFeed,
+    batch_position,
+    iter_batches,
+    net_changes,
+)
+from syncapp.controls import CONTROL_TOTALS
+from syncapp.dates import DateKeyIndex, date_key
+from syncapp.extract import (
+    DIMENSION_SPECS,
+    FILM,
+    ACTOR,
+    CATEGORY,
+    STORE,
+    CUSTOMER,
+    STAFF,
+    staff_stores,
+)
+from syncapp.history import close_versions, is_versioned, merge_versions
+from syncapp.keymap import DimensionKeyMap
+from syncapp.partitions import partitioned_facts
+from syncapp.scheduler import SCHEDULERS, Stage
+from syncapp.watermarks import (
+    get_position,
+    get_watermark,
+    mark_reconciled,
+    reconcile_due,
+    set_position,
+    set_watermark,
 )
 
 
 class Command(BaseCommand):
     help = "Incremental sync from MySQL Sakila into SQLite analytics warehouse."
 
+    # a threading.Event set by a long-running caller (sync_daemon) to end the
+    # run once the batch in flight has committed
+    stop_requested = None
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Changed source rows upserted per statement batch (default: 1000)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Threads extracting from the source concurrently (default: 1, inline)",
+        )
+        parser.add_argument(
+            "--pipeline",
+            choices=sorted(SCHEDULERS),
+            default="threads",
+            help="Extraction pipeline: worker threads, or asyncio producers that "
+                 "overlap source reads with writes even with one worker (default: threads)",
+        )
+        parser.add_argument(
+            "--bridge-diff-hours",
+            type=float,
+            default=24,
+            help="Fully diff bridge tables against the source when the last diff "
+                 "is older than this, to catch deleted links (default: 24, 0 = every run)",
+        )
+        parser.add_argument(
+            "--feed",
+            choices=["poll", "file", "binlog"],
+            help="Where changes come from: poll the source tables past their "
+                 "watermarks (default), replay a JSON-lines event file "
+                 "(--changes-file) or read the source MySQL binlog",
+        )
+        parser.add_argument(
+            "--changes-file",
+            help="JSON-lines file of row-change events to apply (implies --feed file)",
+        )
+
     def handle(self, *args, **options):
         self.stdout.write("🔄 Starting INCREMENTAL SYNC...")
 
-        with transaction.atomic():
-            self.sync_films()
-            self.sync_actors()
-            self.sync_categories()
-            self.sync_stores()
-            self.sync_customers()
-            self.sync_rentals()
-            self.sync_payments()
-            self.update_sync_state()
+        self.setup(options)
+        self.sync(options)
 
+        self.stdout.write(f"   → {self.keys.summary()}.")
         self.stdout.write(self.style.SUCCESS("🎉 Incremental sync completed!"))
 
-    # helpers
-    def get_last_sync(self, table_name):
-        state = SyncState.objects.get(table_name=table_name)
-        return state.last_update
+    def setup(self, options):
+        """
+        State kept for the whole process: the dimension key map, dim_date
+        index, staff -> store map, partitioned facts and the change feed.
+        The loaders keep the maps current as they write, so sync_daemon
+        sets one Command up once and calls sync() every cycle.
+        """
+        self.batch_size = options["batch_size"]
+        self.bridge_diff_interval = timedelta(hours=options["bridge_diff_hours"])
+        self.keys = DimensionKeyMap()
+        self.dates = DateKeyIndex()
+        self.staff_stores = staff_stores()
+        self.partitions = partitioned_facts()
+        self.feed = self.change_feed(options)
+
+    def sync(self, options):
+        """One incremental run; sets self.changed to the rows (or events) applied."""
+        if self.feed is None:
+            self.sync_by_polling(options)
+        else:
+            self.sync_from_feed(self.feed)
+
+    def change_feed(self, options):
+        """The change feed selected by --feed/--changes-file, None when polling."""
+        feed = options["feed"] or ("file" if options["changes_file"] else "poll")
+        if feed == "file":
+            if not options["changes_file"]:
+                raise CommandError("--feed file needs --changes-file.")
+            return JsonLinesFeed(options["changes_file"])
+        if feed == "binlog":
+            return BinlogFeed()
+        return None
+
+    def sync_by_polling(self, options):
+        # stages are built (and watermarks read) up front on this thread;
+        # extraction may then fan out to worker threads
+        scheduler = SCHEDULERS[options["pipeline"]](
+            [
+                self.sync_films(),
+                self.sync_actors(),
+                self.sync_categories(),
+                self.sync_stores(),
+                self.sync_customers(),
+                self.sync_staff(),
+                self.sync_film_actors(),
+                self.sync_film_categories(),
+                self.sync_rentals(),
+                self.sync_payments(),
+            ],
+            workers=options["workers"],
+        )
+
+        # every batch commits together with its table's watermark, so an
+        # interrupted run resumes after the last committed batch
+        scheduler.run()
+
+        scheduler.report(self.stdout.write)
+        self.changed = sum(timing.rows for timing in scheduler.timings.values())
+
+    def stopping(self):
+        return self.stop_requested is not None and self.stop_requested.is_set()
+
+    def until_stopped(self, chunks):
+        """Stop extracting once a stop is requested; committed batches stay."""
+        for chunk in chunks:
+            if self.stopping():
+                return
+            yield chunk
 
-    def set_sync(self, table_name, timestamp):
-        SyncState.objects.filter(table_name=table_name).update(last_update=timestamp)
+    # helpers
+    def upsert_stage(self, name, extract, build, model, unique_field, watermark,
+                     title, summary, dimension=None, depends_on=(), compare_field=None,
+                     upsert=None):
+        """
+        Build the scheduler stage for one table: extract() streams batches of
+        changed source rows in (change timestamp, pk) order, each batch is
+        transformed with build(rows) and applied as one set-based upsert in
+        the same transaction that advances the table's watermark to
+        watermark(last row). With compare_field, rows whose value of it is
+        unchanged are touched but not written. upsert(rows), when given,
+        replaces the build-and-upsert step and returns (new_ids, changed_ids)
+        like bulk_upsert(). Dimension keys are refreshed with one query per
+        batch. title is printed when the
+        stage starts and summary (formatted with touched/total/created
+        counts) when it completes.
+        """
+        counts = {"touched": 0, "created": 0, "updated": 0}
+
+        def load(rows):
+            if self.stopping():
+                return 0
+
+            with transaction.atomic():
+                if upsert is not None:
+                    new_ids, changed_ids = upsert(rows)
+                else:
+                    new_ids, changed_ids = bulk_upsert(
+                        model, build(rows), unique_field,
+                        batch_size=self.batch_size, compare_field=compare_field,
+                    )
+                set_watermark(name, watermark(rows[-1]))
+
+            if dimension:
+                self.refresh_keys(dimension, new_ids, changed_ids)
+
+            counts["touched"] += len(rows)
+            counts["created"] += len(new_ids)
+            counts["updated"] += len(changed_ids)
+            return len(rows)
+
+        def start():
+            self.stdout.write(title)
+
+        def complete(rows):
+            self.stdout.write(summary.format(
+                touched=counts["touched"],
+                total=counts["created"] + counts["updated"],
+                created=counts["created"],
+            ))
+
+        return Stage(
+            name, lambda: self.until_stopped(extract()), load,
+            depends_on=depends_on, start=start, complete=complete,
+        )
+
+    def dimension_stage(self, spec, title, summary):
+        after = get_watermark(spec.name)
+
+        return self.upsert_stage(
+            spec.name,
+            lambda: spec.iter_changed(self.batch_size, after=after),
+            spec.build,
+            spec.target,
+            spec.key,
+            spec.watermark,
+            title=title,
+            summary=summary,
+            dimension=spec.name,
+            compare_field="row_hash",
+            upsert=partial(self.merge_dimension_rows, spec) if is_versioned(spec.target) else None,
+        )
+
+    def merge_dimension_rows(self, spec, rows):
+        """Versioned dimensions add a version per changed row instead of upserting."""
+        return merge_versions(spec, rows, batch_size=self.batch_size)
+
+    def refresh_keys(self, dimension, new_ids, changed_ids):
+        # a changed row of a versioned dimension has a new current key
+        if is_versioned(DIMENSION_SPECS[dimension].target):
+            new_ids = [*new_ids, *changed_ids]
+        if new_ids:
+            self.keys.refresh(dimension, new_ids)
+        if dimension == "staff" and (new_ids or changed_ids):
+            # a staff member may have moved to another store
+            self.staff_stores.update(staff_stores([*new_ids, *changed_ids]))
 
     # dimension tables
     def sync_films(self):
-        self.stdout.write("🎬 Incremental sync: films")
-
-        last = self.get_last_sync("film") or datetime(1900, 1, 1)
-
         # Only fetch changed/new films
-        updated = Film.objects.using("source").filter(last_update__gt=last)
-
-        count = 0
-        for f in updated:
-            DimFilm.objects.update_or_create(
-                film_id=f.film_id,
-                defaults={
-                    "title": f.title,
-                    "rating": f.rating or "",
-                    "length": f.length,
-                    "language": f.language.name,
-                    "release_year": f.release_year,
-                    "last_update": f.last_update,
-                },
-            )
-            count += 1
-
-        self.stdout.write(f"   → Updated/created {count} films.")
+        return self.dimension_stage(
+            FILM,
+            title="🎬 Incremental sync: films",
+            summary="   → {touched} films touched, {total} changed ({created} new).",
+        )
 
 
     def sync_actors(self):
-        self.stdout.write("🎭 Incremental sync: actors")
-
-        last = self.get_last_sync("actor") or datetime(1900, 1, 1)
-
-        updated = Actor.objects.using("source").filter(last_update__gt=last)
-
-        for a in updated:
-            DimActor.objects.update_or_create(
-                actor_id=a.actor_id,
-                defaults={
-                    "first_name": a.first_name,
-                    "last_name": a.last_name,
-                    "last_update": a.last_update,
-                },
-            )
-
-        self.stdout.write(f"   → Updated/created {updated.count()} actors.")
+        return self.dimension_stage(
+            ACTOR,
+            title="🎭 Incremental sync: actors",
+            summary="   → {touched} actors touched, {total} changed ({created} new).",
+        )
 
     def sync_categories(self):
-        self.stdout.write("🏷️  Incremental sync: categories")
-
-        last = self.get_last_sync("category") or datetime(1900, 1, 1)
-
-        updated = Category.objects.using("source").filter(last_update__gt=last)
-
-        for c in updated:
-            DimCategory.objects.update_or_create(
-                category_id=c.category_id,
-                defaults={
-                    "name": c.name,
-                    "last_update": c.last_update,
-                },
-            )
-
-        self.stdout.write(f"   → Updated/created {updated.count()} categories.")
+        return self.dimension_stage(
+            CATEGORY,
+            title="🏷️  Incremental sync: categories",
+            summary="   → {touched} categories touched, {total} changed ({created} new).",
+        )
 
     def sync_stores(self):
-        self.stdout.write("🏬 Incremental sync: stores")
-
-        last = self.get_last_sync("store") or datetime(1900, 1, 1)
-
-        updated = Store.objects.using("source").filter(last_update__gt=last)
-
-        for s in updated:
-            addr = s.address
-            city = addr.city
-            country = city.country
-
-            DimStore.objects.update_or_create(
-                store_id=s.store_id,
-                defaults={
-                    "city": city.city,
-                    "country": country.country,
-                    "last_update": s.last_update,
-                },
-            )
-
-        self.stdout.write(f"   → Updated/created {updated.count()} stores.")
+        return self.dimension_stage(
+            STORE,
+            title="🏬 Incremental sync: stores",
+            summary="   → {touched} stores touched, {total} changed ({created} new).",
+        )
 
     def sync_customers(self):
-        self.stdout.write("👤 Incremental sync: customers")
-
-        last = self.get_last_sync("customer") or datetime(1900, 1, 1)
-
-        updated = Customer.objects.using("source").filter(last_update__gt=last)
-
-        for c in updated:
-            addr = c.address
-            city = addr.city
-            country = city.country
-
-            DimCustomer.objects.update_or_create(
-                customer_id=c.customer_id,
-                defaults={
-                    "first_name": c.first_name,
-                    "last_name": c.last_name,
-                    "active": c.active,
-                    "city": city.city,
-                    "country": country.country,
-                    "last_update": c.last_update,
-                },
+        return self.dimension_stage(
+            CUSTOMER,
+            title="👤 Incremental sync: customers",
+            summary="   → {touched} customers touched, {total} changed ({created} new).",
+        )
+
+    def sync_staff(self):
+        return self.dimension_stage(
+            STAFF,
+            title="🧑‍💼 Incremental sync: staff",
+            summary="   → {touched} staff touched, {total} changed ({created} new).",
+        )
+
+    # bridge tables
+    def bridge_stage(self, spec, title, summary):
+        """
+        Links past the (last_update, film_id, other id) watermark are
+        inserted batch by batch, read by keyset so links sharing a timestamp
+        are never skipped when a run stops between them. Deleting a link
+        leaves no last_update behind, so when the last full diff is older
+        than --bridge-diff-hours the stage instead reads every source link
+        and diffs the whole bridge as sets.
+        """
+        watermark = get_watermark(spec.name)
+        if watermark is not None:
+            # a (last_update, film_id) watermark, e.g. from full_load, resumes
+            # at that film's first link
+            watermark = (*watermark, 0)[:3]
+        full_diff = reconcile_due(spec.name, self.bridge_diff_interval)
+        counts = {"inserted": 0, "deleted": 0, "skipped": 0}
+
+        def extract():
+            if full_diff:
+                # one chunk, possibly empty: the diff needs every link
+                yield list(spec.queryset("last_update"))
+                return
+
+            yield from iter_keyset(
+                spec.queryset("last_update"), self.batch_size,
+                ("last_update", *spec.source_columns), after=watermark, key_of=tuple,
             )
 
-        self.stdout.write(f"   → Updated/created {updated.count()} customers.")
+        def load(rows):
+            if self.stopping():
+                return 0
+
+            key_pairs, skipped = spec.to_keys(self.keys, [(left, right) for _, left, right in rows])
+
+            with transaction.atomic():
+                with self.tracking_links(spec, key_pairs, full_diff=full_diff):
+                    if full_diff:
+                        inserted, deleted = diff_links(spec, key_pairs, self.batch_size)
+                        mark_reconciled(spec.name)
+                    else:
+                        inserted, deleted = insert_links(spec, key_pairs, self.batch_size), 0
+
+                if rows:
+                    set_watermark(spec.name, max(rows))
+
+            counts["inserted"] += inserted
+            counts["deleted"] += deleted
+            counts["skipped"] += skipped
+            return len(rows)
+
+        def start():
+            self.stdout.write(title + (" (full diff)" if full_diff else ""))
+
+        def complete(rows):
+            self.stdout.write(summary.format(**counts))
+            self.report_skipped_links(spec, counts["skipped"])
+
+        return Stage(
+            spec.name, lambda: self.until_stopped(extract()), load,
+            depends_on=[dimension for dimension, _, _ in spec.sides],
+            start=start, complete=complete,
+        )
+
+    def report_skipped_links(self, spec, skipped):
+        """Warn about links to_keys() dropped because a side had no key."""
+        if skipped:
+            self.stdout.write(self.style.WARNING(f"   → {spec.skipped_message(skipped)}."))
+
+    def tracking_links(self, spec, key_pairs, full_diff=False):
+        """
+        tracking() of the aggregates rolled up through spec's bridge, for
+        the films whose links key_pairs add or remove (or, for a full diff,
+        the films whose links differ from key_pairs).
+        """
+        aggregates = BRIDGE_AGGREGATES.get(spec.name, [])
+        if aggregates and full_diff:
+            key_pairs = set(spec.existing()) ^ set(key_pairs)
+        films = {film for film, _ in key_pairs} if aggregates else ()
+        return tracking(aggregates, spec.key_columns[0], films)
+
+    def sync_film_actors(self):
+        return self.bridge_stage(
+            FILM_ACTOR,
+            title="🔗 Incremental sync: film actors",
+            summary="   → Inserted {inserted} / deleted {deleted} film-actor links.",
+        )
+
+    def sync_film_categories(self):
+        return self.bridge_stage(
+            FILM_CATEGORY,
+            title="🔗 Incremental sync: film categories",
+            summary="   → Inserted {inserted} / deleted {deleted} film-category links.",
+        )
 
     # fact tables
-    def sync_rentals(self):
-        self.stdout.write("📀 Incremental sync: rentals")
-
-        last = self.get_last_sync("rental") or datetime(1900, 1, 1)
-
-        updated = Rental.objects.using("source").filter(
-            last_update__gt=last
-        ).select_related("inventory__film", "inventory__store", "customer")
-
-        count = 0
-        for r in updated:
-            film_key = DimFilm.objects.get(film_id=r.inventory.film_id).film_key
-            store_key = DimStore.objects.get(store_id=r.inventory.store_id).store_key
-            customer_key = DimCustomer.objects.get(customer_id=r.customer_id).customer_key
-
-            date_key_rented = int(r.rental_date.strftime("%Y%m%d"))
-            date_key_returned = (
-                int(r.return_date.strftime("%Y%m%d")) if r.return_date else None
-            )
+    def rentals(self):
+        # only inventory.film_id/store_id are needed, so don't join film/store/customer
+        return Rental.objects.using("source").select_related("inventory")
+
+    def build_rentals(self, rows):
+        date_keys = set()
+        records = []
+        for r in rows:
+            film_key = self.keys.get("film", r.inventory.film_id)
+            store_key = self.keys.get_as_of("store", r.inventory.store_id, r.rental_date)
+            customer_key = self.keys.get_as_of("customer", r.customer_id, r.rental_date)
+            staff_key = self.keys.get("staff", r.staff_id)
+
+            date_key_rented = date_key(r.rental_date)
+            date_key_returned = date_key(r.return_date)
+            date_keys.add(date_key_rented)
+            date_keys.add(date_key_returned)
 
             rental_duration = (
                 (r.return_date - r.rental_date).days if r.return_date else None
             )
 
-            FactRental.objects.update_or_create(
-                rental_id=r.rental_id,
-                defaults={
-                    "date_key_rented_id": date_key_rented,
-                    "date_key_returned_id": date_key_returned,
-                    "film_key_id": film_key,
-                    "store_key_id": store_key,
-                    "customer_key_id": customer_key,
-                    "staff_id": r.staff_id,
-                    "rental_duration_days": rental_duration,
-                },
+            records.append(
+                FactRental(
+                    rental_id=r.rental_id,
+                    date_key_rented_id=date_key_rented,
+                    date_key_returned_id=date_key_returned,
+                    film_key_id=film_key,
+                    store_key_id=store_key,
+                    customer_key_id=customer_key,
+                    staff_key_id=staff_key,
+                    rental_duration_days=rental_duration,
+                )
             )
-            count += 1
-
-        self.stdout.write(f"   → Upserted {count} rentals.")
 
-    def sync_payments(self):
-        self.stdout.write("💰 Incremental sync: payments")
-
-        last = self.get_last_sync("payment") or datetime(1900, 1, 1)
-
-        updated = Payment.objects.using("source").filter(payment_date__gt=last)
-
-        count = 0
-        for p in updated:
-            customer_key = DimCustomer.objects.get(customer_id=p.customer_id).customer_key
-            store_key = DimStore.objects.get(store_id=p.staff.store_id).store_key
-            date_key = int(p.payment_date.strftime("%Y%m%d"))
-
-            FactPayment.objects.update_or_create(
-                payment_id=p.payment_id,
-                defaults={
-                    "date_key_paid_id": date_key,
-                    "customer_key_id": customer_key,
-                    "store_key_id": store_key,
-                    "staff_id": p.staff_id,
-                    "amount": p.amount,
-                },
+        # dim_date may be initialised lazily; extend it to cover this batch
+        self.dates.ensure(date_keys)
+        return records
+
+    def payments(self):
+        return Payment.objects.using("source")
+
+    def build_payments(self, rows):
+        date_keys = set()
+        records = []
+        for p in rows:
+            customer_key = self.keys.get_as_of("customer", p.customer_id, p.payment_date)
+            store_key = self.keys.get_as_of("store", self.staff_stores[p.staff_id], p.payment_date)
+            staff_key = self.keys.get("staff", p.staff_id)
+            date_key_paid = date_key(p.payment_date)
+            date_keys.add(date_key_paid)
+
+            records.append(
+                FactPayment(
+                    payment_id=p.payment_id,
+                    date_key_paid_id=date_key_paid,
+                    customer_key_id=customer_key,
+                    store_key_id=store_key,
+                    staff_key_id=staff_key,
+                    amount=p.amount,
+                )
             )
-            count += 1
 
-        self.stdout.write(f"   → Upserted {count} payments.")
+        self.dates.ensure(date_keys)
+        return records
 
-    # sync state
+    def sync_rentals(self):
+        after = get_watermark("rental")
 
-    def update_sync_state(self):
-        now = timezone.now()
-        for table in [
-            "film",
-            "actor",
-            "category",
-            "customer",
-            "store",
+        return self.upsert_stage(
             "rental",
-            "payment",
-        ]:
-            self.set_sync(table, now)
+            lambda: iter_keyset(
+                self.rentals(), self.batch_size, ("last_update", "rental_id"),
+                after=after, key_of=lambda r: (r.last_update, r.rental_id),
+            ),
+            self.build_rentals, FactRental, "rental_id",
+            lambda r: (r.last_update, r.rental_id),
+            title="📀 Incremental sync: rentals",
+            summary="   → Upserted {total} rentals ({created} new).",
+            depends_on=["film", "store", "customer", "staff"],
+            upsert=self.fact_upsert(self.build_rentals, FactRental, "rental_id"),
+        )
 
-        self.stdout.write("   → Sync state updated.")
+    def sync_payments(self):
+        after = get_watermark("payment")
+
+        return self.upsert_stage(
+            "payment",
+            lambda: iter_keyset(
+                self.payments(), self.batch_size, ("payment_date", "payment_id"),
+                after=after, key_of=lambda p: (p.payment_date, p.payment_id),
+            ),
+            self.build_payments, FactPayment, "payment_id",
+            lambda p: (p.payment_date, p.payment_id),
+            title="💰 Incremental sync: payments",
+            summary="   → Upserted {total} payments ({created} new).",
+            depends_on=["store", "customer", "staff"],
+            upsert=self.fact_upsert(self.build_payments, FactPayment, "payment_id"),
+        )
+
+    def fact_upsert(self, build, model, key):
+        """Upsert of a batch of source rows into a fact table, see write_facts()."""
+        return lambda rows: self.write_facts(model, key, build(rows))
+
+    def write_facts(self, model, key, objs):
+        """
+        Upsert fact rows (routed by month when the table is partitioned),
+        refresh the control totals of the days they left and landed on and
+        move the aggregate tables by the rows' old and new contributions.
+        Returns (created_ids, updated_ids) like bulk_upsert().
+        """
+        natural_ids = [getattr(obj, key) for obj in objs]
+        controls = CONTROL_TOTALS[model]
+        days = controls.days_of(natural_ids)
+
+        with tracking(FACT_AGGREGATES[model], key, natural_ids):
+            if model in self.partitions:
+                ids = self.partitions[model].upsert(objs, key, batch_size=self.batch_size)
+            else:
+                ids = bulk_upsert(model, objs, key, batch_size=self.batch_size)
+
+        controls.refresh(days | controls.days_in(objs))
+        return ids
+
+    # change feeds
+    def feed_tables(self):
+        """
+        Source table -> (key columns, upsert(keys), delete(keys)) for every
+        table a change feed is applied to, parents first.
+        """
+        tables = {}
+        for spec in DIMENSION_SPECS.values():
+            tables[spec.source._meta.db_table] = (
+                (spec.key,),
+                partial(self.upsert_dimension_rows, spec),
+                partial(self.delete_dimension_rows, spec),
+            )
+        for spec in BRIDGE_SPECS.values():
+            tables[spec.source._meta.db_table] = (
+                spec.source_columns,
+                partial(self.upsert_links, spec),
+                partial(self.remove_links, spec),
+            )
+        tables["rental"] = (
+            ("rental_id",),
+            partial(self.upsert_fact_rows, self.rentals(), self.build_rentals, FactRental, "rental_id"),
+            partial(self.delete_fact_rows, FactRental, "rental_id"),
+        )
+        tables["payment"] = (
+            ("payment_id",),
+            partial(self.upsert_fact_rows, self.payments(), self.build_payments, FactPayment, "payment_id"),
+            partial(self.delete_fact_rows, FactPayment, "payment_id"),
+        )
+        return tables
+
+    def sync_from_feed(self, feed):
+        """
+        Apply row-change events from feed in batches of about --batch-size.
+        Each batch is collapsed to the last change per row, then upserted
+        parents first and deleted children first, in one transaction with the
+        feed's position. Changed rows are re-read from the source by key, so
+        events only need key columns and replaying them is harmless.
+        """
+        self.stdout.write(f"📜 Applying change feed: {feed.name}")
+
+        state = f"changefeed:{feed.name}"
+        tables = self.feed_tables()
+        key_columns = {table: columns for table, (columns, _, _) in tables.items()}
+        counts = {table: Counter() for table in tables}
+        self.skipped_links = Counter()
+        events = 0
+
+        batches = iter_batches(feed.events(get_position(state), tables=tables), self.batch_size)
+        for batch in batches:
+            if self.stopping():
+                break
+            changes = net_changes(batch, key_columns)
+
+            with transaction.atomic():
+                for table, (_, upsert, _) in tables.items():
+                    if table in changes and changes[table][0]:
+                        counts[table]["upserted"] += upsert(changes[table][0])
+                for table, (_, _, delete) in reversed(tables.items()):
+                    if table in changes and changes[table][1]:
+                        counts[table]["deleted"] += delete(changes[table][1])
+
+                position = batch_position(batch)
+                if position is not None:
+                    set_position(state, position)
+
+            events += len(batch)
+
+        for table, count in counts.items():
+            if count:
+                self.stdout.write(
+                    f"   → {table}: {count['upserted']} upserted, {count['deleted']} deleted."
+                )
+        for name, skipped in self.skipped_links.items():
+            self.report_skipped_links(BRIDGE_SPECS[name], skipped)
+        self.stdout.write(f"   → {events} change events applied.")
+        self.changed = events
+
+    def upsert_dimension_rows(self, spec, ids):
+        rows = [
+            row
+            for batch in batched(ids, MAX_IN_PARAMS)
+            for chunk in spec.iter_chunks(self.batch_size, **{f"{spec.key}__in": batch})
+            for row in chunk
+        ]
+        if is_versioned(spec.target):
+            new_ids, changed_ids = self.merge_dimension_rows(spec, rows)
+        else:
+            new_ids, changed_ids = bulk_upsert(
+                spec.target, spec.build(rows), spec.key,
+                batch_size=self.batch_size, compare_field="row_hash",
+            )
+        self.refresh_keys(spec.name, new_ids, changed_ids)
+        return len(new_ids) + len(changed_ids)
+
+    def delete_dimension_rows(self, spec, ids):
+        if is_versioned(spec.target):
+            # facts keep pointing at the closed versions
+            return close_versions(spec.target, spec.key, ids)
+
+        deleted = 0
+        with ExitStack() as stack:
+            # bridge links to the deleted rows go with them
+            for bridge in BRIDGE_SPECS.values():
+                if bridge.sides[1][0] == spec.name and bridge.name in BRIDGE_AGGREGATES:
+                    stack.enter_context(self.tracking_links(bridge, self.cascaded_links(spec, bridge, ids)))
+            for batch in batched(ids, MAX_IN_PARAMS):
+                _, per_model = spec.target.objects.filter(**{f"{spec.key}__in": batch}).delete()
+                deleted += per_model.get(spec.target._meta.label, 0)
+        for natural_id in ids:
+            self.keys.discard(spec.name, natural_id)
+        return deleted
+
+    def cascaded_links(self, spec, bridge, ids):
+        """Key pairs of bridge linking to the spec rows with natural ids."""
+        column = bridge.key_columns[1].removesuffix("_id")
+        links = set()
+        for batch in batched(ids, MAX_IN_PARAMS):
+            links.update(bridge.existing(**{f"{column}__{spec.key}__in": batch}))
+        return links
+
+    def upsert_links(self, spec, pairs):
+        key_pairs, skipped = spec.to_keys(self.keys, pairs)
+        self.skipped_links[spec.name] += skipped
+        with self.tracking_links(spec, key_pairs):
+            return insert_links(spec, key_pairs, self.batch_size)
+
+    def remove_links(self, spec, pairs):
+        key_pairs, skipped = spec.to_keys(self.keys, pairs)
+        self.skipped_links[spec.name] += skipped
+        with self.tracking_links(spec, key_pairs):
+            return delete_links(spec, key_pairs)
+
+    def upsert_fact_rows(self, queryset, build, model, key, ids):
+        rows = [
+            row
+            for batch in batched(ids, MAX_IN_PARAMS)
+            for row in queryset.filter(**{f"{key}__in": batch})
+        ]
+        self.write_facts(model, key, build(rows))
+        return len(rows)
+
+    def delete_fact_rows(self, model, key, ids):
+        controls = CONTROL_TOTALS[model]
+        days = controls.days_of(ids)
+
+        with tracking(FACT_AGGREGATES[model], key, ids):
+            if model in self.partitions:
+                deleted = self.partitions[model].delete(key, ids)
+            else:
+                deleted = 0
+                for batch in batched(ids, MAX_IN_PARAMS):
+                    deleted += model.objects.filter(**{f"{key}__in": batch}).delete()[0]
+
+        controls.refresh(days)
+        return deleted
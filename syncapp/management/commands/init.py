@@ -1,14 +1,36 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.core.management import call_command
 from django.db import connections
-from datetime import date, timedelta
+from datetime import date
 
+from syncapp.dates import DEFAULT_END, DEFAULT_START, ensure_date_range, source_date_range
 from syncapp.models import DimDate, SyncState
+from syncapp.watermarks import WATERMARK_COLUMNS
 
 
 class Command(BaseCommand):
     help = "Initialize the analytics database: create dim_date and sync_state."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date-start",
+            type=date.fromisoformat,
+            default=DEFAULT_START,
+            help=f"First dim_date day, YYYY-MM-DD (default: {DEFAULT_START})",
+        )
+        parser.add_argument(
+            "--date-end",
+            type=date.fromisoformat,
+            default=DEFAULT_END,
+            help=f"Last dim_date day, YYYY-MM-DD (default: {DEFAULT_END})",
+        )
+        parser.add_argument(
+            "--lazy-dates",
+            action="store_true",
+            help="Only cover the days actually used by source rentals/payments; "
+                 "full_load/incremental extend the range as needed",
+        )
+
     def handle(self, *args, **options):
         self.stdout.write("Running INIT process...")
 
@@ -16,12 +38,18 @@ class Command(BaseCommand):
         self.stdout.write("Ensuring analytics schema is migrated...")
         call_command("migrate", interactive=False)
 
-        # populate dim_date if empty
-        if DimDate.objects.count() == 0:
-            self.stdout.write("Populating dim_date table...")
-            self.populate_dim_date()
+        # populate (or extend) dim_date
+        self.stdout.write("Populating dim_date table...")
+        if options["lazy_dates"]:
+            date_range = source_date_range()
+            if date_range is None:
+                self.stdout.write("   → no source rentals/payments yet; dim_date left as is.")
+            else:
+                self.populate_dim_date(*date_range)
         else:
-            self.stdout.write("dim_date already populated.")
+            if options["date_start"] > options["date_end"]:
+                raise CommandError("--date-start must not be after --date-end.")
+            self.populate_dim_date(options["date_start"], options["date_end"])
 
         # init sync_state rows
         self.stdout.write("Initializing sync_state records...")
@@ -34,47 +62,16 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS("INIT completed successfully!"))
 
     # func to populate dim_date
-    def populate_dim_date(self):
-        start = date(1900, 1, 1)
-        end = date(2100, 12, 31)
-
-        delta = timedelta(days=1)
-
-        records = []
-        current = start
-
-        while current <= end:
-            date_key = int(current.strftime("%Y%m%d"))
-            records.append(
-                DimDate(
-                    date_key=date_key,
-                    date=current,
-                    year=current.year,
-                    quarter=((current.month - 1) // 3) + 1,
-                    month=current.month,
-                    day_of_month=current.day,
-                    day_of_week=current.isoweekday(),
-                    is_weekend=current.isoweekday() >= 6,
-                )
-            )
-            current += delta
-
-        DimDate.objects.bulk_create(records)
-        self.stdout.write(f"   → dim_date populated with {len(records)} rows.")
+    def populate_dim_date(self, start, end):
+        created = ensure_date_range(start, end)
+        if created:
+            self.stdout.write(f"   → dim_date populated with {created} rows ({start} – {end}).")
+        else:
+            self.stdout.write(f"dim_date already populated ({start} – {end}).")
 
     # func to nitialize sync_state table
     def init_sync_state(self):
-        tables = [
-            "film",
-            "actor",
-            "category",
-            "customer",
-            "store",
-            "rental",
-            "payment",
-        ]
-
-        for t in tables:
+        for t in WATERMARK_COLUMNS:
             SyncState.objects.get_or_create(table_name=t)
 
         self.stdout.write("   → sync_state initialized.")
@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from syncapp.partitions import PARTITION_KEYS, MonthlyPartitions
+
+
+class Command(BaseCommand):
+    help = "Store the fact tables in monthly partitions behind a view (or merge them back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--table",
+            choices=sorted(model._meta.db_table for model in PARTITION_KEYS),
+            action="append",
+            help="Fact table to work on; repeatable (default: all fact tables)",
+        )
+        parser.add_argument(
+            "--merge",
+            action="store_true",
+            help="Merge the partitions back into a single table",
+        )
+        parser.add_argument(
+            "--compact",
+            metavar="YYYY-MM",
+            action="append",
+            default=[],
+            help="Rewrite one month's partition and rebuild its indexes; repeatable",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("🗂️  Partitioning fact tables by month...")
+
+        months = [self.parse_month(value) for value in options["compact"]]
+        tables = options["table"]
+
+        for model in PARTITION_KEYS:
+            if tables and model._meta.db_table not in tables:
+                continue
+            partitions = MonthlyPartitions(model)
+
+            # partition DDL runs in one transaction per table
+            with transaction.atomic():
+                self.apply(partitions, options["merge"], months)
+
+        self.stdout.write(self.style.SUCCESS("Fact partitioning done."))
+
+    def apply(self, partitions, merge, months):
+        table = partitions.table
+
+        if merge:
+            if not partitions.enabled():
+                self.stdout.write(f"   → {table}: not partitioned.")
+                return
+            partitions.merge()
+            self.stdout.write(f"   → {table}: partitions merged back into one table.")
+            return
+
+        if not partitions.enabled():
+            partitions.split()
+            self.stdout.write(f"   → {table}: split into {len(partitions.months())} monthly partitions.")
+
+        for month in months:
+            if month not in partitions.months():
+                raise CommandError(f"{table} has no partition for {month // 100}-{month % 100:02d}.")
+            partitions.compact(month)
+            self.stdout.write(f"   → {partitions.partition_table(month)}: compacted.")
+
+        for month, rows in partitions.rows().items():
+            self.stdout.write(f"   → {partitions.partition_table(month)}: {rows} rows")
+
+    def parse_month(self, value):
+        try:
+            year, month = (int(part) for part in value.split("-"))
+        except ValueError:
+            raise CommandError(f"--compact expects YYYY-MM, got {value!r}.")
+        if not 1 <= month <= 12:
+            raise CommandError(f"--compact expects YYYY-MM, got {value!r}.")
+        return year * 100 + month
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from syncapp.aggregates import AGGREGATES
+
+
+class Command(BaseCommand):
+    help = "Recompute the aggregate tables from the fact tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--aggregate",
+            choices=list(AGGREGATES),
+            action="append",
+            help="Rebuild only this aggregate; repeatable (default: all)",
+        )
+
+    def handle(self, *args, **options):
+        names = set(options["aggregate"] or AGGREGATES)
+        self.stdout.write("📊 Rebuilding aggregate tables...")
+
+        # readers see either the old or the rebuilt tables, never an empty one
+        with transaction.atomic():
+            for name, aggregate in AGGREGATES.items():
+                if name not in names:
+                    continue
+                started = time.perf_counter()
+                rows = aggregate.rebuild()
+                self.stdout.write(
+                    f"   → {aggregate.table}: {rows} rows ({time.perf_counter() - started:.2f}s)"
+                )
+
+        self.stdout.write(self.style.SUCCESS("Aggregate tables rebuilt."))
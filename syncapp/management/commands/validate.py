@@ -1,26 +1,12 @@
-from django.core.management.base import BaseCommand
-from django.db.models import Sum
+import json
+from datetime import date, timedelta
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
-from datetime import timedelta
 
-from syncapp.models_source import (
-    Film,
-    Actor,
-    Category,
-    Customer,
-    Store,
-    Rental,
-    Payment,
-)
-from syncapp.models import (
-    DimFilm,
-    DimActor,
-    DimCategory,
-    DimCustomer,
-    DimStore,
-    FactRental,
-    FactPayment,
-)
+from syncapp.validation import CHECKS, CheckContext, run_checks
 
 
 class Command(BaseCommand):
@@ -33,91 +19,106 @@ class Command(BaseCommand):
             default=30,
             help="Number of days to validate (default: 30)",
         )
+        parser.add_argument(
+            "--from",
+            dest="date_from",
+            type=date.fromisoformat,
+            help="First day to validate, YYYY-MM-DD (default: --days before --to)",
+        )
+        parser.add_argument(
+            "--to",
+            dest="date_to",
+            type=date.fromisoformat,
+            help="Last day to validate, YYYY-MM-DD (default: today)",
+        )
+        parser.add_argument(
+            "--check",
+            choices=list(CHECKS),
+            action="append",
+            help="Run only this check; repeatable (default: "
+                 + ", ".join(name for name, check in CHECKS.items() if check.default) + ")",
+        )
+        parser.add_argument(
+            "--control-totals",
+            action="store_true",
+            help="Only compare the daily control totals of days changed since "
+                 "they were last validated (cheap enough to run after every sync)",
+        )
+        parser.add_argument(
+            "--reconcile",
+            action="store_true",
+            help="Also compare every row by checksum and list the keys that differ",
+        )
+        parser.add_argument(
+            "--max-keys",
+            type=int,
+            default=20,
+            help="Differing keys listed per table and kind with --reconcile, or groups per "
+                 "aggregate with --check aggregates (default: 20)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Threads running checks concurrently, each with its own "
+                 "connections (default: 1, inline)",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["text", "json"],
+            default="text",
+            help="Report as text, or as one JSON document for schedulers (default: text)",
+        )
 
     def handle(self, *args, **options):
-        days = options["days"]
-        self.stdout.write(f"Running VALIDATION checks for the last {days} days...")
-
-        self.check_counts()
-        self.check_recent_rentals(days)
-        self.check_recent_payments(days)
-        self.check_payment_totals(days)
-
+        start, end = self.window(options)
+        checks = [CHECKS[name] for name in self.selected(options)]
+        context = CheckContext(start, end, max_keys=options["max_keys"])
+
+        started = perf_counter()
+        results = run_checks(checks, context, workers=options["workers"])
+        seconds = perf_counter() - started
+
+        if options["format"] == "json":
+            self.stdout.write(json.dumps({
+                "ok": all(result.ok for result in results),
+                "from": start.isoformat(),
+                "to": end.isoformat(),
+                "seconds": round(seconds, 4),
+                "checks": [result.as_dict() for result in results],
+            }, cls=DjangoJSONEncoder, ensure_ascii=False))
+            return
+
+        self.stdout.write(f"Running VALIDATION checks for {start} – {end}...")
+        for result in results:
+            self.stdout.write(f"\n{result.title}")
+            for failed, text in result.lines:
+                self.stdout.write(self.style.ERROR(text) if failed else text)
+
+        self.stdout.write("\nCheck timings (wall / source queries / analytics queries):")
+        for result in results:
+            self.stdout.write(
+                f"   → {result.name}: {result.seconds:.2f}s / {result.queries['source']}"
+                f" / {result.queries['default']}"
+            )
+        self.stdout.write(f"   → total: {seconds:.2f}s")
         self.stdout.write(self.style.SUCCESS("Validation completed."))
 
-    # dim counts
-    def check_counts(self):
-        self.stdout.write("\nChecking dimension table counts...")
-
-        checks = [
-            ("Films", Film.objects.using("source").count(), DimFilm.objects.count()),
-            ("Actors", Actor.objects.using("source").count(), DimActor.objects.count()),
-            ("Categories", Category.objects.using("source").count(), DimCategory.objects.count()),
-            ("Customers", Customer.objects.using("source").count(), DimCustomer.objects.count()),
-            ("Stores", Store.objects.using("source").count(), DimStore.objects.count()),
-        ]
-
-        for label, src, tgt in checks:
-            if src == tgt:
-                self.stdout.write(f"   ✔ {label}: {src} rows (OK)")
-            else:
-                self.stdout.write(self.style.ERROR(
-                    f"   ✖ {label}: SOURCE={src} TARGET={tgt} (Mismatch!)"
-                ))
-
-    # rentals
-    def check_recent_rentals(self, days):
-        self.stdout.write("\n📀 Checking rentals...")
-
-        cutoff = timezone.now() - timedelta(days=days)
-
-        src = Rental.objects.using("source").filter(rental_date__gte=cutoff).count()
-        tgt = FactRental.objects.filter(date_key_rented__date__gte=cutoff.date()).count()
-
-        if src == tgt:
-            self.stdout.write(f"   ✔ Rentals: {src} rows match (OK)")
-        else:
-            self.stdout.write(self.style.ERROR(
-                f"   ✖ Rentals mismatch: SOURCE={src} TARGET={tgt}"
-            ))
-
-    # payments
-    def check_recent_payments(self, days):
-        self.stdout.write("\n💰 Checking payments...")
-
-        cutoff = timezone.now() - timedelta(days=days)
-
-        src = Payment.objects.using("source").filter(payment_date__gte=cutoff).count()
-        tgt = FactPayment.objects.filter(date_key_paid__date__gte=cutoff.date()).count()
-
-        if src == tgt:
-            self.stdout.write(f"   ✔ Payments: {src} rows match (OK)")
-        else:
-            self.stdout.write(self.style.ERROR(
-                f"   ✖ Payments mismatch: SOURCE={src} TARGET={tgt}"
-            ))
-
-    # revenue totals
-    def check_payment_totals(self, days):
-        self.stdout.write("\nChecking payment totals...")
-
-        cutoff = timezone.now() - timedelta(days=days)
-
-        src_total = (
-            Payment.objects.using("source")
-            .filter(payment_date__gte=cutoff)
-            .aggregate(Sum("amount"))["amount__sum"] or 0
-        )
-
-        tgt_total = (
-            FactPayment.objects
-            .filter(date_key_paid__date__gte=cutoff.date())
-            .aggregate(Sum("amount"))["amount__sum"] or 0
-        )
-
-        if abs(src_total - tgt_total) < 0.01:
-            self.stdout.write(f"   ✔ Revenue totals match: ${src_total:.2f} (OK)")
+    def window(self, options):
+        end = options["date_to"] or timezone.now().date()
+        start = options["date_from"] or end - timedelta(days=options["days"])
+        if start > end:
+            raise CommandError(f"--from {start} is after --to {end}.")
+        return start, end
+
+    def selected(self, options):
+        """Names of the checks to run, in registration order."""
+        if options["check"]:
+            names = set(options["check"])
+        elif options["control_totals"]:
+            names = {"control_totals"}
         else:
-            self.stdout.write(self.style.ERROR(
-                f"   ✖ Revenue mismatch: SOURCE=${src_total:.2f} TARGET=${tgt_total:.2f}"
-            ))
+            names = {name for name, check in CHECKS.items() if check.default}
+            if options["reconcile"]:
+                names.add("checksums")
+        return [name for name in CHECKS if name in names]
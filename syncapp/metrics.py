@@ -0,0 +1,70 @@
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class LoadMetrics:
+    """
+    Per-table wall time and row counts for a run, plus the process's peak
+    RSS. With track_memory, tracemalloc also records the peak traced Python
+    memory per table; it slows every allocation down, and with several
+    worker threads the traced heap is shared, so a table's peak includes
+    whatever the other threads held at the time.
+    """
+
+    def __init__(self, track_memory=False, threads=1):
+        self.track_memory = track_memory
+        self.threads = threads
+        self.tables = {}
+
+    @contextmanager
+    def track(self, name):
+        entry = self.tables.setdefault(
+            name, {"rows": 0, "seconds": 0.0, "peak_bytes": 0}
+        )
+
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+
+        started = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["seconds"] += time.perf_counter() - started
+            if self.track_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                entry["peak_bytes"] = max(entry["peak_bytes"], peak)
+
+    def stop(self):
+        if self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def report(self, write):
+        write("Per-table load summary:")
+        label = "peak traced memory" if self.threads <= 1 else "peak traced memory (all threads)"
+        for name, entry in self.tables.items():
+            line = f"   → {name}: {entry['rows']} rows in {entry['seconds']:.2f}s"
+            if self.track_memory:
+                line += f", {label} {entry['peak_bytes'] / (1024 * 1024):.1f} MiB"
+            write(line)
+
+        peak = peak_rss_bytes()
+        if peak is not None:
+            write(f"   → process peak RSS: {peak / (1024 * 1024):.1f} MiB")
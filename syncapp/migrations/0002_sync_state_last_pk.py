@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('syncapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncstate',
+            name='last_pk',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
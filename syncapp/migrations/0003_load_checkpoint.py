@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('syncapp', '0002_sync_state_last_pk'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoadCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(max_length=50, unique=True)),
+                ('last_key', models.IntegerField(blank=True, null=True)),
+                ('rows', models.IntegerField(default=0)),
+                ('completed', models.BooleanField(default=False)),
+                ('watermark_update', models.DateTimeField(blank=True, null=True)),
+                ('watermark_pk', models.IntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'load_checkpoint',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('syncapp', '0003_load_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncstate',
+            name='last_reconciled',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,112 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:18
+
+from datetime import datetime, timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_staff_keys(apps, schema_editor):
+    """
+    Point existing facts at dim_staff. Staff rows are created from the
+    staff_ids the facts carry, with their home store taken from the
+    payments attributed to them; names are left blank and the epoch
+    last_update lets the next incremental sync fill them in.
+    """
+    DimStaff = apps.get_model("syncapp", "DimStaff")
+    FactRental = apps.get_model("syncapp", "FactRental")
+    FactPayment = apps.get_model("syncapp", "FactPayment")
+    db = schema_editor.connection.alias
+
+    stores = dict(FactRental.objects.using(db).values_list("staff_id", "store_key__store_id").distinct())
+    stores.update(FactPayment.objects.using(db).values_list("staff_id", "store_key__store_id").distinct())
+
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    DimStaff.objects.using(db).bulk_create([
+        DimStaff(staff_id=staff_id, first_name="", last_name="", store_id=store_id,
+                 active=True, last_update=epoch)
+        for staff_id, store_id in stores.items()
+    ])
+
+    for staff_id, staff_key in DimStaff.objects.using(db).values_list("staff_id", "staff_key"):
+        FactRental.objects.using(db).filter(staff_id=staff_id).update(staff_key=staff_key)
+        FactPayment.objects.using(db).filter(staff_id=staff_id).update(staff_key=staff_key)
+
+
+def restore_staff_ids(apps, schema_editor):
+    """Copy the staff_id of each fact's dim_staff row back onto the fact."""
+    DimStaff = apps.get_model("syncapp", "DimStaff")
+    FactRental = apps.get_model("syncapp", "FactRental")
+    FactPayment = apps.get_model("syncapp", "FactPayment")
+    db = schema_editor.connection.alias
+
+    for staff_key, staff_id in DimStaff.objects.using(db).values_list("staff_key", "staff_id"):
+        FactRental.objects.using(db).filter(staff_key=staff_key).update(staff_id=staff_id)
+        FactPayment.objects.using(db).filter(staff_key=staff_key).update(staff_id=staff_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('syncapp', '0004_sync_state_last_reconciled'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DimStaff',
+            fields=[
+                ('staff_key', models.AutoField(primary_key=True, serialize=False)),
+                ('staff_id', models.IntegerField(unique=True)),
+                ('first_name', models.CharField(max_length=45)),
+                ('last_name', models.CharField(max_length=45)),
+                ('store_id', models.IntegerField()),
+                ('active', models.BooleanField()),
+                ('last_update', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'dim_staff',
+                'indexes': [models.Index(fields=['last_name', 'first_name'], name='dim_staff_last_na_9a2d43_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='factpayment',
+            name='staff_key',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='syncapp.dimstaff'),
+        ),
+        migrations.AddField(
+            model_name='factrental',
+            name='staff_key',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='syncapp.dimstaff'),
+        ),
+        # nullable while it goes away, so a reverse can re-add it to
+        # populated tables before restore_staff_ids fills it in
+        migrations.AlterField(
+            model_name='factpayment',
+            name='staff_id',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='factrental',
+            name='staff_id',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.RunPython(backfill_staff_keys, restore_staff_ids),
+        migrations.RemoveField(
+            model_name='factpayment',
+            name='staff_id',
+        ),
+        migrations.RemoveField(
+            model_name='factrental',
+            name='staff_id',
+        ),
+        migrations.AlterField(
+            model_name='factpayment',
+            name='staff_key',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='syncapp.dimstaff'),
+        ),
+        migrations.AlterField(
+            model_name='factrental',
+            name='staff_key',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='syncapp.dimstaff'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('syncapp', '0005_dim_staff'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncstate',
+            name='position',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
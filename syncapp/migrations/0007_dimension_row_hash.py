@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('syncapp', '0006_sync_state_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dimactor',
+            name='row_hash',
+            field=models.CharField(default='', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='dimcategory',
+            name='row_hash',
+            field=models.CharField(default='', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='dimcustomer',
+            name='row_hash',
+            field=models.CharField(default='', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='dimfilm',
+            name='row_hash',
+            field=models.CharField(default='', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='dimstaff',
+            name='row_hash',
+            field=models.CharField(default='', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='dimstore',
+            name='row_hash',
+            field=models.CharField(default='', max_length=16),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('syncapp', '0007_dimension_row_hash'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='dimcustomer',
+            name='dim_custome_custome_b1d371_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='dimstore',
+            name='dim_store_store_i_d5c4e4_idx',
+        ),
+        migrations.AddField(
+            model_name='dimcustomer',
+            name='is_current',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='dimcustomer',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dimcustomer',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dimcustomer',
+            name='version',
+            field=models.IntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='dimstore',
+            name='is_current',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='dimstore',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dimstore',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dimstore',
+            name='version',
+            field=models.IntegerField(default=1),
+        ),
+        migrations.AlterField(
+            model_name='dimcustomer',
+            name='customer_id',
+            field=models.IntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='dimstore',
+            name='store_id',
+            field=models.IntegerField(),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dimcustomer',
+            unique_together={('customer_id', 'version')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='dimstore',
+            unique_together={('store_id', 'version')},
+        ),
+        migrations.AddConstraint(
+            model_name='dimcustomer',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_current', True)), fields=('customer_id',), name='dim_customer_one_current'),
+        ),
+        migrations.AddConstraint(
+            model_name='dimstore',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_current', True)), fields=('store_id',), name='dim_store_one_current'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('syncapp', '0008_dimension_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ControlTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table_name', models.CharField(max_length=50)),
+                ('date_key', models.IntegerField()),
+                ('rows', models.IntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('checksum', models.BigIntegerField(default=0)),
+                ('verified', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'sync_control_totals',
+                'constraints': [models.UniqueConstraint(fields=('table_name', 'date_key'), name='sync_control_totals_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('syncapp', '0009_control_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AggDailyStoreRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_key', models.IntegerField()),
+                ('store_id', models.IntegerField()),
+                ('payments', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'db_table': 'agg_daily_store_revenue',
+                'constraints': [models.UniqueConstraint(fields=('date_key', 'store_id'), name='agg_daily_store_revenue_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AggMonthlyCategoryRentals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.IntegerField()),
+                ('category_id', models.IntegerField()),
+                ('rentals', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'agg_monthly_category_rentals',
+                'constraints': [models.UniqueConstraint(fields=('month', 'category_id'), name='agg_monthly_category_rentals_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AggMonthlyFilmRentals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.IntegerField()),
+                ('film_id', models.IntegerField()),
+                ('rentals', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'agg_monthly_film_rentals',
+                'constraints': [models.UniqueConstraint(fields=('month', 'film_id'), name='agg_monthly_film_rentals_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AggStoreMonthCustomerRentals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.IntegerField()),
+                ('store_id', models.IntegerField()),
+                ('customer_id', models.IntegerField()),
+                ('rentals', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'agg_store_month_customer_rentals',
+                'constraints': [models.UniqueConstraint(fields=('month', 'store_id', 'customer_id'), name='agg_store_month_customer_rentals_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AggStoreMonthCustomers',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.IntegerField()),
+                ('store_id', models.IntegerField()),
+                ('active_customers', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'agg_store_month_customers',
+                'constraints': [models.UniqueConstraint(fields=('month', 'store_id'), name='agg_store_month_customers_key')],
+            },
+        ),
+    ]
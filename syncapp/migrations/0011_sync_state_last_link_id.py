@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('syncapp', '0010_aggregate_tables'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncstate',
+            name='last_link_id',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
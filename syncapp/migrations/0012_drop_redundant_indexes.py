@@ -0,0 +1,92 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('syncapp', '0011_sync_state_last_link_id'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='bridgefilmactor',
+            name='bridge_film_film_ke_e08e3d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='bridgefilmactor',
+            name='bridge_film_actor_k_1a5f70_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='bridgefilmcategory',
+            name='bridge_film_film_ke_7ab2bc_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='bridgefilmcategory',
+            name='bridge_film_categor_1af8ac_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='dimactor',
+            name='dim_actor_actor_i_2f6c14_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='dimcategory',
+            name='dim_categor_categor_f3296b_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='dimfilm',
+            name='dim_film_film_id_c26f36_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='factpayment',
+            name='fact_paymen_payment_fe23d0_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='factpayment',
+            name='fact_paymen_date_ke_5559e6_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='factpayment',
+            name='fact_paymen_custome_473720_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='factpayment',
+            name='fact_paymen_store_k_a90f6f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='factrental',
+            name='fact_rental_rental__7aa763_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='factrental',
+            name='fact_rental_date_ke_2b4bee_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='factrental',
+            name='fact_rental_date_ke_2c46ba_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='factrental',
+            name='fact_rental_film_ke_0a0b8f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='factrental',
+            name='fact_rental_store_k_d71866_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='factrental',
+            name='fact_rental_custome_f96b60_idx',
+        ),
+        migrations.AlterField(
+            model_name='bridgefilmactor',
+            name='film_key',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='syncapp.dimfilm'),
+        ),
+        migrations.AlterField(
+            model_name='bridgefilmcategory',
+            name='film_key',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='syncapp.dimfilm'),
+        ),
+    ]
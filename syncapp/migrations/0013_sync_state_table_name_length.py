@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('syncapp', '0012_drop_redundant_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='syncstate',
+            name='table_name',
+            field=models.CharField(max_length=255, unique=True),
+        ),
+    ]
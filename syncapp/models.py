@@ -39,11 +39,11 @@ class DimFilm(models.Model):
     language = models.CharField(max_length=50)
     release_year = models.IntegerField(null=True, blank=True)
     last_update = models.DateTimeField()
+    row_hash = models.CharField(max_length=16, default="")  # fingerprint of the synced columns
 
     class Meta:
         db_table = "dim_film"
         indexes = [
-            models.Index(fields=["film_id"]),
             models.Index(fields=["title"]),
         ]
 
@@ -57,12 +57,12 @@ class DimActor(models.Model):
     first_name = models.CharField(max_length=45)
     last_name = models.CharField(max_length=45)
     last_update = models.DateTimeField()
+    row_hash = models.CharField(max_length=16, default="")  # fingerprint of the synced columns
 
     class Meta:
         db_table = "dim_actor"
         indexes = [
             models.Index(fields=["last_name", "first_name"]),
-            models.Index(fields=["actor_id"]),
         ]
 
     def __str__(self):
@@ -74,12 +74,12 @@ class DimCategory(models.Model):
     category_id = models.IntegerField(unique=True)  # Sakila category.category_id
     name = models.CharField(max_length=25)
     last_update = models.DateTimeField()
+    row_hash = models.CharField(max_length=16, default="")  # fingerprint of the synced columns
 
     class Meta:
         db_table = "dim_category"
         indexes = [
             models.Index(fields=["name"]),
-            models.Index(fields=["category_id"]),
         ]
 
     def __str__(self):
@@ -87,18 +87,32 @@ class DimCategory(models.Model):
 
 
 class DimStore(models.Model):
+    """
+    Store dimension, versioned (SCD type 2): see DimCustomer.
+    """
     store_key = models.AutoField(primary_key=True)
-    store_id = models.IntegerField(unique=True)  # Sakila store.store_id
+    store_id = models.IntegerField()  # Sakila store.store_id
     city = models.CharField(max_length=50)
     country = models.CharField(max_length=50)
     last_update = models.DateTimeField()
+    row_hash = models.CharField(max_length=16, default="")  # fingerprint of the synced columns
+    version = models.IntegerField(default=1)
+    valid_from = models.DateTimeField(null=True, blank=True)
+    valid_to = models.DateTimeField(null=True, blank=True)
+    is_current = models.BooleanField(default=True)
 
     class Meta:
         db_table = "dim_store"
+        unique_together = ("store_id", "version")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["store_id"], condition=models.Q(is_current=True),
+                name="dim_store_one_current",
+            ),
+        ]
         indexes = [
             models.Index(fields=["city"]),
             models.Index(fields=["country"]),
-            models.Index(fields=["store_id"]),
         ]
 
     def __str__(self):
@@ -106,28 +120,71 @@ class DimStore(models.Model):
 
 
 class DimCustomer(models.Model):
+    """
+    Customer dimension, versioned (SCD type 2): a change to the synced
+    columns closes the current row (valid_to, is_current=False) and adds
+    version + 1, valid from the source change timestamp. The first version
+    has no valid_from, so it covers everything before the first change.
+    customer_key identifies one version; facts point at the version that
+    was valid when they happened.
+    """
     customer_key = models.AutoField(primary_key=True)
-    customer_id = models.IntegerField(unique=True)  # Sakila customer.customer_id
+    customer_id = models.IntegerField()  # Sakila customer.customer_id
     first_name = models.CharField(max_length=45)
     last_name = models.CharField(max_length=45)
     active = models.BooleanField()
     city = models.CharField(max_length=50)
     country = models.CharField(max_length=50)
     last_update = models.DateTimeField()
+    row_hash = models.CharField(max_length=16, default="")  # fingerprint of the synced columns
+    version = models.IntegerField(default=1)
+    valid_from = models.DateTimeField(null=True, blank=True)
+    valid_to = models.DateTimeField(null=True, blank=True)
+    is_current = models.BooleanField(default=True)
 
     class Meta:
         db_table = "dim_customer"
+        unique_together = ("customer_id", "version")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["customer_id"], condition=models.Q(is_current=True),
+                name="dim_customer_one_current",
+            ),
+        ]
         indexes = [
             models.Index(fields=["last_name", "first_name"]),
             models.Index(fields=["city"]),
             models.Index(fields=["country"]),
-            models.Index(fields=["customer_id"]),
         ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} (customer_id={self.customer_id})"
 
 
+class DimStaff(models.Model):
+    """
+    Staff dimension. store_id is the natural key of the staff member's
+    home store, which payments are attributed to.
+    """
+    staff_key = models.AutoField(primary_key=True)
+    staff_id = models.IntegerField(unique=True)  # Sakila staff.staff_id
+    first_name = models.CharField(max_length=45)
+    last_name = models.CharField(max_length=45)
+    store_id = models.IntegerField()
+    active = models.BooleanField()
+    last_update = models.DateTimeField()
+    row_hash = models.CharField(max_length=16, default="")  # fingerprint of the synced columns
+
+    class Meta:
+        db_table = "dim_staff"
+        indexes = [
+            models.Index(fields=["last_name", "first_name"]),
+        ]
+
+    def __str__(self):
+        return f"{self.first_name} {self.last_name} (staff_id={self.staff_id})"
+
+
 
 # bridge tables
 
@@ -136,16 +193,13 @@ class BridgeFilmActor(models.Model):
     Bridge between DimFilm and DimActor.
     """
     id = models.AutoField(primary_key=True)
-    film_key = models.ForeignKey(DimFilm, on_delete=models.CASCADE)
+    # the unique (film_key, actor_key) index serves lookups by film
+    film_key = models.ForeignKey(DimFilm, on_delete=models.CASCADE, db_index=False)
     actor_key = models.ForeignKey(DimActor, on_delete=models.CASCADE)
 
     class Meta:
         db_table = "bridge_film_actor"
         unique_together = ("film_key", "actor_key")
-        indexes = [
-            models.Index(fields=["film_key"]),
-            models.Index(fields=["actor_key"]),
-        ]
 
     def __str__(self):
         return f"FilmKey {self.film_key_id} - ActorKey {self.actor_key_id}"
@@ -156,16 +210,13 @@ class BridgeFilmCategory(models.Model):
     Bridge between DimFilm and DimCategory.
     """
     id = models.AutoField(primary_key=True)
-    film_key = models.ForeignKey(DimFilm, on_delete=models.CASCADE)
+    # the unique (film_key, category_key) index serves lookups by film
+    film_key = models.ForeignKey(DimFilm, on_delete=models.CASCADE, db_index=False)
     category_key = models.ForeignKey(DimCategory, on_delete=models.CASCADE)
 
     class Meta:
         db_table = "bridge_film_category"
         unique_together = ("film_key", "category_key")
-        indexes = [
-            models.Index(fields=["film_key"]),
-            models.Index(fields=["category_key"]),
-        ]
 
     def __str__(self):
         return f"FilmKey {self.film_key_id} - CategoryKey {self.category_key_id}"
@@ -199,20 +250,13 @@ class FactRental(models.Model):
     film_key = models.ForeignKey(DimFilm, on_delete=models.PROTECT)
     store_key = models.ForeignKey(DimStore, on_delete=models.PROTECT)
     customer_key = models.ForeignKey(DimCustomer, on_delete=models.PROTECT)
+    staff_key = models.ForeignKey(DimStaff, on_delete=models.PROTECT)
 
-    staff_id = models.IntegerField()  # staff natural key from Sakila
     rental_duration_days = models.IntegerField(null=True, blank=True)
 
     class Meta:
+        # rental_id and every foreign key are already indexed
         db_table = "fact_rental"
-        indexes = [
-            models.Index(fields=["rental_id"]),
-            models.Index(fields=["date_key_rented"]),
-            models.Index(fields=["date_key_returned"]),
-            models.Index(fields=["film_key"]),
-            models.Index(fields=["store_key"]),
-            models.Index(fields=["customer_key"]),
-        ]
 
     def __str__(self):
         return f"Rental {self.rental_id}"
@@ -233,18 +277,13 @@ class FactPayment(models.Model):
     )
     customer_key = models.ForeignKey(DimCustomer, on_delete=models.PROTECT)
     store_key = models.ForeignKey(DimStore, on_delete=models.PROTECT)
+    staff_key = models.ForeignKey(DimStaff, on_delete=models.PROTECT)
 
-    staff_id = models.IntegerField()
     amount = models.DecimalField(max_digits=8, decimal_places=2)
 
     class Meta:
+        # payment_id and every foreign key are already indexed
         db_table = "fact_payment"
-        indexes = [
-            models.Index(fields=["payment_id"]),
-            models.Index(fields=["date_key_paid"]),
-            models.Index(fields=["customer_key"]),
-            models.Index(fields=["store_key"]),
-        ]
 
     def __str__(self):
         return f"Payment {self.payment_id} - {self.amount}"
@@ -255,14 +294,173 @@ class FactPayment(models.Model):
 
 class SyncState(models.Model):
     """
-    Tracks the last update timestamp for each logical source table
-    (e.g. 'film', 'actor', 'rental', 'payment', 'customer', etc.).
+    Tracks the high-watermark for each logical source table
+    (e.g. 'film', 'actor', 'rental', 'payment', 'customer', etc.):
+    the largest source (last_update, primary key) pair already synced.
+    last_pk breaks ties between rows sharing the same last_update; bridge
+    links, keyed by (film_id, other id), keep the film in last_pk and the
+    other side in last_link_id.
+    last_reconciled is when the table was last fully diffed against the
+    source (bridge tables, whose deletions leave no last_update behind).
+    Change feeds store their resume point in position instead
+    (e.g. a binlog "file:offset"), and the "full_load" row's last_update
+    is when full_load last rebuilt the warehouse.
     """
-    table_name = models.CharField(max_length=50, unique=True)
+    table_name = models.CharField(max_length=255, unique=True)
     last_update = models.DateTimeField(null=True, blank=True)
+    last_pk = models.IntegerField(null=True, blank=True)
+    last_link_id = models.IntegerField(null=True, blank=True)
+    last_reconciled = models.DateTimeField(null=True, blank=True)
+    position = models.CharField(max_length=255, null=True, blank=True)
 
     class Meta:
         db_table = "sync_state"
 
     def __str__(self):
-        return f"{self.table_name}: {self.last_update}"
+        return f"{self.table_name}: {self.last_update} (pk {self.last_pk})"
+
+
+class LoadCheckpoint(models.Model):
+    """
+    Progress of a checkpointed full load, one row per load stage
+    (e.g. 'dim_film', 'fact_rental'). last_key is the last source key
+    committed into the stage's shadow table; completed marks finished stages.
+    watermark_update/watermark_pk hold the source high-watermark captured
+    when the run started, written to sync_state once the load is swapped in.
+    """
+    stage = models.CharField(max_length=50, unique=True)
+    last_key = models.IntegerField(null=True, blank=True)
+    rows = models.IntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    watermark_update = models.DateTimeField(null=True, blank=True)
+    watermark_pk = models.IntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "load_checkpoint"
+
+    def __str__(self):
+        state = "done" if self.completed else f"after {self.last_key}"
+        return f"{self.stage}: {self.rows} rows ({state})"
+
+
+class ControlTotal(models.Model):
+    """
+    Control totals of one day of a fact table (e.g. 'rental', 'payment'),
+    kept current by the loaders as they write facts: the day's row count,
+    amount sum and key checksum (the sum of CRC32s of its natural keys).
+    verified is cleared whenever the day's facts change and set again once
+    validate has matched the day against the source.
+    """
+    table_name = models.CharField(max_length=50)
+    date_key = models.IntegerField()  # YYYYMMDD
+    rows = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    checksum = models.BigIntegerField(default=0)
+    verified = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "sync_control_totals"
+        constraints = [
+            models.UniqueConstraint(fields=["table_name", "date_key"], name="sync_control_totals_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.table_name} {self.date_key}: {self.rows} rows, {self.amount}"
+
+
+
+# aggregate tables (rolled up from the facts, see syncapp/aggregates.py)
+
+class AggDailyStoreRevenue(models.Model):
+    """
+    Payments and revenue per day and store. store_id is the Sakila store
+    id, so every version of a store adds to the same row.
+    """
+    date_key = models.IntegerField()  # YYYYMMDD
+    store_id = models.IntegerField()
+    payments = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "agg_daily_store_revenue"
+        constraints = [
+            models.UniqueConstraint(fields=["date_key", "store_id"], name="agg_daily_store_revenue_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.date_key} store {self.store_id}: {self.revenue}"
+
+
+class AggMonthlyFilmRentals(models.Model):
+    """Rentals per month (YYYYMM) and film."""
+    month = models.IntegerField()
+    film_id = models.IntegerField()
+    rentals = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "agg_monthly_film_rentals"
+        constraints = [
+            models.UniqueConstraint(fields=["month", "film_id"], name="agg_monthly_film_rentals_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.month} film {self.film_id}: {self.rentals} rentals"
+
+
+class AggMonthlyCategoryRentals(models.Model):
+    """
+    Rentals per month (YYYYMM) and category, through bridge_film_category:
+    a rental counts once for every category of its film.
+    """
+    month = models.IntegerField()
+    category_id = models.IntegerField()
+    rentals = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "agg_monthly_category_rentals"
+        constraints = [
+            models.UniqueConstraint(fields=["month", "category_id"], name="agg_monthly_category_rentals_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.month} category {self.category_id}: {self.rentals} rentals"
+
+
+class AggStoreMonthCustomerRentals(models.Model):
+    """
+    Rentals per month (YYYYMM), store and customer: the counts behind
+    AggStoreMonthCustomers, which gains a customer when one appears here.
+    """
+    month = models.IntegerField()
+    store_id = models.IntegerField()
+    customer_id = models.IntegerField()
+    rentals = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "agg_store_month_customer_rentals"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["month", "store_id", "customer_id"], name="agg_store_month_customer_rentals_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.month} store {self.store_id} customer {self.customer_id}: {self.rentals} rentals"
+
+
+class AggStoreMonthCustomers(models.Model):
+    """Active customers (with at least one rental) per month (YYYYMM) and store."""
+    month = models.IntegerField()
+    store_id = models.IntegerField()
+    active_customers = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "agg_store_month_customers"
+        constraints = [
+            models.UniqueConstraint(fields=["month", "store_id"], name="agg_store_month_customers_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.month} store {self.store_id}: {self.active_customers} active customers"
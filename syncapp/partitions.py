@@ -0,0 +1,365 @@
+from django.apps import apps
+from django.apps.registry import Apps
+from django.core.management.base import CommandError
+from django.db import connections, models
+from django.db.migrations.state import ModelState
+
+from syncapp.batching import MAX_IN_PARAMS, batched, bulk_upsert
+from syncapp.models import FactPayment, FactRental
+
+
+# partitioned fact model -> the date key it is partitioned by
+PARTITION_KEYS = {
+    FactRental: "date_key_rented",
+    FactPayment: "date_key_paid",
+}
+
+
+def month_of(date_key):
+    """YYYYMM partition of a YYYYMMDD date key."""
+    return date_key // 100
+
+
+class MonthlyPartitions:
+    """
+    Monthly partitions of a fact table, stored as one SQLite table per month
+    ("fact_rental_p200505") next to the other analytics tables.
+
+    A partitioned fact table's own name becomes a UNION ALL view over its
+    partitions, so readers (the ORM included) keep querying fact_rental
+    while SQLite pushes their WHERE clauses down into every partition. The
+    loaders write through upsert()/delete(), which route each row to the
+    partition of its date key and create partitions for new months.
+
+    Partition models are rendered in a private app registry like shadow
+    tables; their foreign keys point at the live dimension tables. The
+    natural key (rental_id, payment_id) is only unique within a partition;
+    upsert() keeps it unique across them and validate checks it.
+
+    Migrations know nothing of the view, so migrate refuses to apply ones
+    that touch a partitioned fact table (see refuse_partitioned_migrations).
+    """
+
+    def __init__(self, model, using="default"):
+        self.model = model
+        self.using = using
+        self.table = model._meta.db_table
+        self.key = model._meta.get_field(PARTITION_KEYS[model])
+
+        self.registry = Apps()
+        for other in apps.get_app_config("syncapp").get_models():
+            ModelState.from_model(other).render(self.registry)
+        self.partitions = {}
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def partition_table(self, month):
+        return f"{self.table}_p{month}"
+
+    def enabled(self):
+        """Whether the fact table is partitioned (its name is a view)."""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = %s", [self.table]
+            )
+            return cursor.fetchone() is not None
+
+    def months(self):
+        """Months that have a partition table, oldest first."""
+        prefix = f"{self.table}_p"
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB %s",
+                [prefix + "[0-9][0-9][0-9][0-9][0-9][0-9]"],
+            )
+            return sorted(int(name[len(prefix):]) for name, in cursor.fetchall())
+
+    def partition(self, month):
+        """The model of month's partition (its table may not exist yet)."""
+        if month not in self.partitions:
+            table = self.partition_table(month)
+            state = ModelState.from_model(self.model)
+            state.name = f"{self.model.__name__}P{month}"
+            state.options["db_table"] = table
+            # index names are global in SQLite: prefix them with the partition
+            state.options["indexes"] = [
+                models.Index(fields=index.fields, name=f"{table}_{'_'.join(index.fields)}")
+                for index in self.model._meta.indexes
+            ]
+            self.partitions[month] = state.render(self.registry)
+        return self.partitions[month]
+
+    def rows(self):
+        """{month: row count} per partition."""
+        quote = self.connection.ops.quote_name
+        counts = {}
+        with self.connection.cursor() as cursor:
+            for month in self.months():
+                cursor.execute(f"SELECT COUNT(*) FROM {quote(self.partition_table(month))}")
+                counts[month] = cursor.fetchone()[0]
+        return counts
+
+    # conversions
+    def split(self):
+        """
+        Move the rows of the plain fact table into monthly partitions, one
+        INSERT ... SELECT per month with indexes built after the copy, then
+        replace the table with the view.
+        """
+        quote = self.connection.ops.quote_name
+        column = quote(self.key.column)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"SELECT DISTINCT {column} / 100 FROM {quote(self.table)}")
+            months = sorted(month for month, in cursor.fetchall())
+
+        for month in months:
+            self.create_partition(month, source=self.table, where=(
+                f"{column} BETWEEN %s AND %s", [month * 100, month * 100 + 99],
+            ))
+        self.execute(f"DROP TABLE {quote(self.table)}")
+        self.create_view()
+
+    def merge(self):
+        """Turn the partitions back into the plain fact table."""
+        editor = self.editor()
+        self.drop_view()
+        editor.create_model(self.model)
+        for month in self.months():
+            self.copy(self.partition_table(month), self.table)
+            editor.delete_model(self.partition(month))
+        # indexes are built once, after the rows are copied
+        self.flush(editor)
+
+    def collapse(self):
+        """
+        Drop the view and every partition, leaving an empty plain fact
+        table, e.g. for a full load that rebuilds the table anyway.
+        """
+        editor = self.editor()
+        self.drop_view()
+        for month in self.months():
+            editor.delete_model(self.partition(month))
+        editor.create_model(self.model)
+        self.flush(editor)
+
+    def compact(self, month):
+        """
+        Rewrite one partition in date key order into a fresh table, rebuilding
+        its indexes, without touching the other partitions.
+        """
+        quote = self.connection.ops.quote_name
+        table = self.partition_table(month)
+        old = f"{table}_old"
+
+        self.drop_view()
+        self.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(old)}")
+        editor = self.editor()
+        editor.create_model(self.partition(month))
+        self.copy(old, table, order_by=(self.key.column, self.model._meta.pk.column))
+        # the old table's indexes keep their names until it is dropped
+        self.execute(f"DROP TABLE {quote(old)}")
+        self.flush(editor)
+        self.create_view()
+
+    # routed writes
+    def upsert(self, objs, unique_field, batch_size=1000):
+        """
+        Insert-or-update fact rows in the partitions of their date keys.
+        Rows whose date key moved to another month are deleted from their
+        old partition; new rows get surrogate keys above the current maximum
+        so keys stay unique across partitions. Returns (created_ids,
+        updated_ids) like bulk_upsert().
+        """
+        if not objs:
+            return [], []
+
+        pk = self.model._meta.pk.attname
+        existing = {}
+        for batch in batched([getattr(obj, unique_field) for obj in objs], MAX_IN_PARAMS):
+            existing.update(
+                (natural_id, (pk_value, month_of(key)))
+                for natural_id, pk_value, key in self.model.objects.using(self.using)
+                .filter(**{f"{unique_field}__in": batch})
+                .values_list(unique_field, pk, self.key.attname)
+            )
+
+        next_pk = self.next_key()
+        routed = {}
+        moved = {}
+        for obj in objs:
+            natural_id = getattr(obj, unique_field)
+            month = month_of(getattr(obj, self.key.attname))
+            if natural_id in existing:
+                pk_value, old_month = existing[natural_id]
+                if old_month != month:
+                    moved.setdefault(old_month, []).append(natural_id)
+            else:
+                pk_value, next_pk = next_pk, next_pk + 1
+            setattr(obj, pk, pk_value)
+            routed.setdefault(month, []).append(obj)
+
+        for month, natural_ids in moved.items():
+            self.delete_from(month, unique_field, natural_ids)
+
+        self.ensure(routed)
+        for month, month_objs in routed.items():
+            partition = self.partition(month)
+            bulk_upsert(partition, [self.cast(obj, partition) for obj in month_objs],
+                        unique_field, batch_size=batch_size)
+
+        natural_ids = [getattr(obj, unique_field) for obj in objs]
+        created = [natural_id for natural_id in natural_ids if natural_id not in existing]
+        updated = [natural_id for natural_id in natural_ids if natural_id in existing]
+        return created, updated
+
+    def delete(self, unique_field, natural_ids):
+        """Delete fact rows by natural key from the partitions holding them."""
+        months = {}
+        for batch in batched(natural_ids, MAX_IN_PARAMS):
+            for natural_id, key in (
+                self.model.objects.using(self.using)
+                .filter(**{f"{unique_field}__in": batch})
+                .values_list(unique_field, self.key.attname)
+            ):
+                months.setdefault(month_of(key), []).append(natural_id)
+
+        return sum(
+            self.delete_from(month, unique_field, ids) for month, ids in months.items()
+        )
+
+    def delete_from(self, month, unique_field, natural_ids):
+        partition = self.partition(month)
+        deleted = 0
+        for batch in batched(natural_ids, MAX_IN_PARAMS):
+            deleted += partition.objects.using(self.using).filter(
+                **{f"{unique_field}__in": batch}
+            ).delete()[0]
+        return deleted
+
+    def next_key(self):
+        """
+        First unused surrogate key across all partitions, from one
+        MAX(primary key) per partition (an index lookup each, where MAX
+        over the view would scan every row).
+        """
+        quote = self.connection.ops.quote_name
+        pk = quote(self.model._meta.pk.column)
+        top = 0
+        with self.connection.cursor() as cursor:
+            for month in self.months():
+                cursor.execute(f"SELECT MAX({pk}) FROM {quote(self.partition_table(month))}")
+                top = max(top, cursor.fetchone()[0] or 0)
+        return top + 1
+
+    def ensure(self, months):
+        """Create the partitions of months that do not exist yet."""
+        missing = sorted(set(months) - set(self.months()))
+        for month in missing:
+            self.create_partition(month)
+        if missing:
+            self.create_view()
+
+    # DDL helpers
+    def create_partition(self, month, source=None, where=None):
+        """
+        Create month's partition, optionally filled from the rows of table
+        source matching where, and index it after the copy.
+        """
+        editor = self.editor()
+        editor.create_model(self.partition(month))
+        if source is not None:
+            self.copy(source, self.partition_table(month), where=where)
+        self.flush(editor)
+
+    def copy(self, source, target, where=None, order_by=()):
+        """INSERT ... SELECT every fact column from table source into target."""
+        quote = self.connection.ops.quote_name
+        columns = ", ".join(quote(field.column) for field in self.model._meta.concrete_fields)
+        sql = f"INSERT INTO {quote(target)} ({columns}) SELECT {columns} FROM {quote(source)}"
+        params = []
+        if where:
+            sql += f" WHERE {where[0]}"
+            params = where[1]
+        if order_by:
+            sql += " ORDER BY " + ", ".join(quote(column) for column in order_by)
+        self.execute(sql, params)
+
+    def create_view(self):
+        """(Re)create the UNION ALL view over the current partitions."""
+        quote = self.connection.ops.quote_name
+        columns = ", ".join(quote(field.column) for field in self.model._meta.concrete_fields)
+        selects = [
+            f"SELECT {columns} FROM {quote(self.partition_table(month))}"
+            for month in self.months()
+        ] or [
+            # no partitions yet: an empty row set with the table's columns
+            "SELECT " + ", ".join(
+                f"NULL AS {quote(field.column)}" for field in self.model._meta.concrete_fields
+            ) + " WHERE 0"
+        ]
+
+        self.drop_view()
+        self.execute(f"CREATE VIEW {quote(self.table)} AS " + " UNION ALL ".join(selects))
+
+    def drop_view(self):
+        self.execute(f"DROP VIEW IF EXISTS {self.connection.ops.quote_name(self.table)}")
+
+    def editor(self):
+        # used without entering it: DDL then joins any open transaction
+        # (SQLite's schema editor refuses to open inside atomic blocks)
+        editor = self.connection.schema_editor(atomic=False)
+        editor.deferred_sql = []
+        return editor
+
+    def flush(self, editor):
+        """Run the index statements an unentered schema editor deferred."""
+        for sql in editor.deferred_sql:
+            editor.execute(sql)
+        editor.deferred_sql = []
+
+    def execute(self, sql, params=None):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def cast(self, obj, partition):
+        return partition(**{
+            field.attname: getattr(obj, field.attname) for field in self.model._meta.concrete_fields
+        })
+
+
+def partitioned_facts(using="default"):
+    """MonthlyPartitions of the fact tables that are currently partitioned."""
+    partitions = {model: MonthlyPartitions(model, using) for model in PARTITION_KEYS}
+    return {model: parts for model, parts in partitions.items() if parts.enabled()}
+
+
+def refuse_partitioned_migrations(sender, using, plan=None, **kwargs):
+    """
+    pre_migrate handler: stop migrate before it applies (or reverts) a
+    migration touching a fact table that is currently a view over monthly
+    partitions, since its operations would run against the view. The
+    partitions have to be merged back first and split again afterwards.
+    """
+    if not plan or connections[using].vendor != "sqlite":
+        return
+
+    partitioned = partitioned_facts(using)
+    touched = sorted({
+        (str(migration), model._meta.db_table)
+        for migration, _ in plan
+        for operation in migration.operations
+        for model in partitioned
+        # other apps' migrations cannot alter the facts, but their RunSQL and
+        # RunPython count as referencing every model, so only ours are checked
+        if migration.app_label == model._meta.app_label
+        and operation.references_model(model._meta.model_name, model._meta.app_label)
+    })
+    if touched:
+        raise CommandError(
+            "Cannot migrate while fact tables are partitioned: "
+            + ", ".join(f"{migration} alters {table}" for migration, table in touched)
+            + ". Run 'manage.py partition_facts --merge' first and partition_facts "
+            "again after migrating."
+        )
@@ -0,0 +1,101 @@
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+
+# SQLite pragma profiles for the analytics database
+PROFILES = {
+    # SQLite's own defaults: rollback journal, synchronous=FULL, ~2 MiB cache
+    "default": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "temp_store": "DEFAULT",
+        "mmap_size": 0,
+    },
+    # WAL lets readers run during writes and NORMAL only syncs at checkpoints;
+    # still safe against application crashes, the last commits may be lost
+    # on power failure
+    "bulk": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64 * 1024,  # KiB
+        "temp_store": "MEMORY",
+        "mmap_size": 256 * 1024 * 1024,
+    },
+    # full rebuilds: bigger cache and mmap, and let the WAL grow instead of
+    # checkpointing mid-load. NORMAL is still safe under WAL: a crash loses
+    # at most the last commits, which --checkpointed runs redo on --resume
+    "full_load": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -256 * 1024,
+        "temp_store": "MEMORY",
+        "mmap_size": 1024 * 1024 * 1024,
+        "wal_autocheckpoint": 100000,
+    },
+    # full_load without any fsync. An OS crash or power loss mid-load can
+    # corrupt the whole database file, not just the load, so only use it on
+    # a warehouse file nobody else relies on and that can be rebuilt
+    "full_load_unsafe": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -256 * 1024,
+        "temp_store": "MEMORY",
+        "mmap_size": 1024 * 1024 * 1024,
+        "wal_autocheckpoint": 100000,
+    },
+}
+
+# SQLite refuses to change these inside an open transaction
+OUTSIDE_TRANSACTION = ("journal_mode", "synchronous")
+
+
+def connection_profile(alias):
+    """Profile name configured for new connections to alias, or None."""
+    return getattr(settings, "SQLITE_CONNECTION_PROFILE", {}).get(alias)
+
+
+def apply_profile(connection, profile):
+    """
+    Set the pragmas of profile (a name or a dict) on connection and return
+    the values they replaced, so the caller can restore them.
+    """
+    pragmas = PROFILES[profile] if isinstance(profile, str) else profile
+    previous = {}
+
+    with connection.cursor() as cursor:
+        for pragma, value in pragmas.items():
+            if pragma in OUTSIDE_TRANSACTION and connection.in_atomic_block:
+                continue
+            cursor.execute(f"PRAGMA {pragma}")
+            previous[pragma] = cursor.fetchone()[0]
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+
+    return previous
+
+
+@contextmanager
+def pragma_profile(profile, using="default"):
+    """Run a block under profile, restoring the connection's pragmas afterwards."""
+    connection = connections[using]
+    if connection.vendor != "sqlite" or profile is None:
+        yield
+        return
+
+    previous = apply_profile(connection, profile)
+    try:
+        yield
+    finally:
+        apply_profile(connection, previous)
+
+
+def configure_connection(sender, connection, **kwargs):
+    """connection_created handler applying the alias's configured profile."""
+    if connection.vendor != "sqlite":
+        return
+
+    profile = connection_profile(connection.alias)
+    if profile:
+        apply_profile(connection, profile)
@@ -0,0 +1,193 @@
+from django.db.models import (
+    CharField,
+    Count,
+    F,
+    IntegerField,
+    Max,
+    Q,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Cast, Concat, Mod, Round
+
+from syncapp.batching import MAX_IN_PARAMS, batched
+from syncapp.dates import date_key_of
+from syncapp.extract import DIMENSION_SPECS
+from syncapp.functions import CRC32
+from syncapp.history import is_versioned
+from syncapp.models import FactPayment, FactRental
+from syncapp.models_source import Payment, Rental
+
+
+def cents(field):
+    return Cast(Round(F(field) * 100), IntegerField())
+
+
+class ReconcileSpec:
+    """
+    One table compared between the source and the warehouse.
+
+    source and target are (queryset, key field, projection) triples: the
+    projection lists expressions (or lookup paths) that produce the same
+    values on both sides, e.g. a source film_id against the target's
+    film_key__film_id. Each row is digested in SQL as CRC32 of its
+    projection joined into one string, so only digests leave the databases.
+    """
+
+    def __init__(self, name, source, target):
+        self.name = name
+        self.sides = (source, target)
+
+    def digest(self, projection):
+        parts = []
+        for expression in projection:
+            if parts:
+                parts.append(Value("|"))
+            expression = F(expression) if isinstance(expression, str) else expression
+            parts.append(Cast(expression, CharField()))
+        return CRC32(Concat(*parts, output_field=CharField()))
+
+    def queryset(self, side):
+        queryset, key, projection = self.sides[side]
+        return queryset.annotate(_key=F(key), _digest=self.digest(projection))
+
+    def max_key(self, side):
+        queryset, key, _ = self.sides[side]
+        return queryset.aggregate(top=Max(key))["top"]
+
+    def buckets(self, side, ranges, width):
+        """{bucket start: (rows, digest sum)} of the keys in ranges, width keys per bucket."""
+        digests = {}
+        for condition in self.conditions(ranges):
+            rows = (
+                self.queryset(side)
+                .filter(condition)
+                .annotate(_bucket=F("_key") - Mod(F("_key"), width))
+                .values("_bucket")
+                .annotate(_rows=Count("*"), _sum=Sum("_digest"))
+                .values_list("_bucket", "_rows", "_sum")
+                .order_by()
+            )
+            digests.update((int(bucket), (count, int(total))) for bucket, count, total in rows)
+        return digests
+
+    def rows(self, side, ranges):
+        """{key: digest} of every row in ranges (leaf buckets only)."""
+        digests = {}
+        for condition in self.conditions(ranges):
+            digests.update(
+                self.queryset(side).filter(condition).values_list("_key", "_digest").order_by()
+            )
+        return digests
+
+    def conditions(self, ranges):
+        if ranges is None:
+            yield Q()
+            return
+        # two parameters per range
+        for batch in batched(ranges, MAX_IN_PARAMS // 2):
+            condition = Q()
+            for low, high in batch:
+                condition |= Q(_key__gte=low, _key__lte=high)
+            yield condition
+
+
+class Differences:
+    """Keys that differ between source and target, found by reconcile()."""
+
+    def __init__(self, missing, extra, changed, queries):
+        self.missing = sorted(missing)  # in the source only
+        self.extra = sorted(extra)  # in the warehouse only
+        self.changed = sorted(changed)  # in both, different values
+        self.queries = queries
+
+    def __bool__(self):
+        return bool(self.missing or self.extra or self.changed)
+
+    def __len__(self):
+        return len(self.missing) + len(self.extra) + len(self.changed)
+
+
+def reconcile(spec, fanout=32):
+    """
+    Merkle-style comparison of spec's table on both sides. Keys are grouped
+    into aligned buckets of fanout**n keys and each side returns one
+    (row count, digest sum) per bucket from a GROUP BY query. Buckets that
+    differ are split fanout ways and compared again, down to buckets of at
+    most fanout keys, whose rows' digests are compared key by key. Returns
+    the Differences.
+    """
+    top = max(spec.max_key(0) or 0, spec.max_key(1) or 0)
+    width = 1
+    while width * fanout <= top:
+        width *= fanout
+
+    ranges = None
+    queries = 0
+    while True:
+        source, target = spec.buckets(0, ranges, width), spec.buckets(1, ranges, width)
+        queries += 2
+        mismatched = sorted(
+            bucket for bucket in source.keys() | target.keys()
+            if source.get(bucket) != target.get(bucket)
+        )
+        if not mismatched:
+            return Differences((), (), (), queries)
+
+        ranges = [(bucket, bucket + width - 1) for bucket in mismatched]
+        if width <= fanout:
+            break
+        width //= fanout
+
+    source, target = spec.rows(0, ranges), spec.rows(1, ranges)
+    return Differences(
+        source.keys() - target.keys(),
+        target.keys() - source.keys(),
+        [key for key in source.keys() & target.keys() if source[key] != target[key]],
+        queries + 2,
+    )
+
+
+def dimension_spec(spec):
+    """ReconcileSpec of a dimension from its ExtractSpec column map."""
+    fields = [field for field in spec.columns if field != spec.changed_field]
+    target = spec.target.objects.all()
+    if is_versioned(spec.target):
+        target = target.filter(is_current=True)
+
+    return ReconcileSpec(
+        spec.name,
+        (spec.source.objects.using("source"), spec.columns[spec.key], [spec.columns[f] for f in fields]),
+        (target, spec.key, fields),
+    )
+
+
+RENTAL = ReconcileSpec(
+    "rental",
+    (Rental.objects.using("source"), "rental_id", [
+        "rental_id", date_key_of("rental_date"), date_key_of("return_date"),
+        "inventory__film_id", "inventory__store_id", "customer_id", "staff_id",
+    ]),
+    (FactRental.objects.all(), "rental_id", [
+        "rental_id", "date_key_rented_id", "date_key_returned_id",
+        "film_key__film_id", "store_key__store_id", "customer_key__customer_id", "staff_key__staff_id",
+    ]),
+)
+
+PAYMENT = ReconcileSpec(
+    "payment",
+    (Payment.objects.using("source"), "payment_id", [
+        "payment_id", date_key_of("payment_date"), "customer_id", "staff__store_id", "staff_id",
+        cents("amount"),
+    ]),
+    (FactPayment.objects.all(), "payment_id", [
+        "payment_id", "date_key_paid_id", "customer_key__customer_id", "store_key__store_id",
+        "staff_key__staff_id", cents("amount"),
+    ]),
+)
+
+RECONCILE_SPECS = {
+    **{name: dimension_spec(spec) for name, spec in DIMENSION_SPECS.items()},
+    RENTAL.name: RENTAL,
+    PAYMENT.name: PAYMENT,
+}
@@ -0,0 +1,274 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connections
+
+
+class Stage:
+    """
+    One node of the load DAG.
+
+    extract() yields chunks of source rows and may run on a worker thread;
+    load(chunk) transforms and writes a chunk, returns the number of rows
+    written, and always runs on the scheduler's (single) writer thread.
+    start() and complete(rows) run on the writer thread before the first
+    and after the last chunk is loaded.
+    """
+
+    def __init__(self, name, extract, load, depends_on=(), start=None, complete=None):
+        self.name = name
+        self.extract = extract
+        self.load = load
+        self.depends_on = tuple(depends_on)
+        self.start = start
+        self.complete = complete
+
+
+class StageTiming:
+    def __init__(self):
+        self.started = None
+        self.finished = None
+        self.extract_seconds = 0.0
+        self.load_seconds = 0.0
+        self.rows = 0
+
+    @property
+    def wall(self):
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+
+class _Done:
+    pass
+
+
+class _Failed:
+    def __init__(self, exc):
+        self.exc = exc
+
+
+class DagScheduler:
+    """
+    Runs stages in dependency order: extraction fans out over a thread pool
+    (each worker thread gets its own `source` connection) while every write
+    is funnelled through the calling thread, so SQLite only ever sees one
+    writer and the caller's transaction.atomic() covers all of it.
+
+    With workers <= 1 everything runs inline on the calling thread.
+    """
+
+    def __init__(self, stages, workers=1, queue_size=4, metrics=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.workers = workers
+        self.queue_size = queue_size
+        self.metrics = metrics
+        self.timings = {name: StageTiming() for name in self.stages}
+        self.order = self._topological_order()
+
+    def _topological_order(self):
+        order = []
+        remaining = dict(self.stages)
+
+        while remaining:
+            ready = [
+                name for name, stage in remaining.items()
+                if all(dep not in remaining for dep in stage.depends_on)
+            ]
+            if not ready:
+                raise ValueError(f"Dependency cycle between stages: {sorted(remaining)}")
+
+            for name in ready:
+                missing = [dep for dep in remaining[name].depends_on if dep not in self.stages]
+                if missing:
+                    raise ValueError(f"Stage {name} depends on unknown stages {missing}")
+                order.append(name)
+                del remaining[name]
+
+        return order
+
+    def run(self):
+        if self.workers <= 1:
+            for name in self.order:
+                self._consume(name, self._timed_extract(name))
+            return
+
+        queues = {name: queue.Queue(maxsize=self.queue_size) for name in self.order}
+        cancelled = threading.Event()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="extract") as pool:
+            # submission order == writer consumption order, so the stage the
+            # writer waits on has always been started by some worker
+            for name in self.order:
+                pool.submit(self._produce, name, queues[name], cancelled)
+
+            try:
+                for name in self.order:
+                    self._consume(name, self._drain(queues[name]))
+            except BaseException:
+                cancelled.set()
+                raise
+
+    def _timed_extract(self, name):
+        timing = self.timings[name]
+        iterator = iter(self.stages[name].extract())
+
+        while True:
+            started = time.perf_counter()
+            if timing.started is None:
+                timing.started = started
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                timing.extract_seconds += time.perf_counter() - started
+                return
+            timing.extract_seconds += time.perf_counter() - started
+            yield chunk
+
+    def _produce(self, name, out, cancelled):
+        try:
+            for chunk in self._timed_extract(name):
+                if not self._put(out, chunk, cancelled):
+                    return
+            self._put(out, _Done(), cancelled)
+        except BaseException as exc:
+            self._put(out, _Failed(exc), cancelled)
+        finally:
+            # connections are per thread; release this worker's source connection
+            connections.close_all()
+
+    def _put(self, out, item, cancelled):
+        while not cancelled.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _drain(self, source):
+        while True:
+            item = source.get()
+            if isinstance(item, _Done):
+                return
+            if isinstance(item, _Failed):
+                raise item.exc
+            yield item
+
+    def _consume(self, name, chunks):
+        stage = self.stages[name]
+        timing = self.timings[name]
+        if stage.start:
+            stage.start()
+
+        if self.metrics is not None:
+            with self.metrics.track(name) as entry:
+                self._load_chunks(stage, timing, chunks)
+                entry["rows"] += timing.rows
+        else:
+            self._load_chunks(stage, timing, chunks)
+
+        if stage.complete:
+            stage.complete(timing.rows)
+        timing.finished = time.perf_counter()
+        if timing.started is None:
+            timing.started = timing.finished
+
+    def _load_chunks(self, stage, timing, chunks):
+        for chunk in chunks:
+            started = time.perf_counter()
+            timing.rows += stage.load(chunk) or 0
+            timing.load_seconds += time.perf_counter() - started
+
+    def critical_path(self):
+        """Longest chain of dependent stages by wall time: (names, seconds)."""
+        best = {}
+        for name in self.order:
+            deps = self.stages[name].depends_on
+            prev = max((best[dep] for dep in deps), key=lambda item: item[1], default=((), 0.0))
+            best[name] = (prev[0] + (name,), prev[1] + self.timings[name].wall)
+
+        return max(best.values(), key=lambda item: item[1], default=((), 0.0))
+
+    def report(self, write):
+        write("Stage timings (wall / extract / load):")
+        for name in self.order:
+            timing = self.timings[name]
+            write(
+                f"   → {name}: {timing.wall:.2f}s / {timing.extract_seconds:.2f}s"
+                f" / {timing.load_seconds:.2f}s ({timing.rows} rows)"
+            )
+
+        path, seconds = self.critical_path()
+        write(f"   → critical path: {' → '.join(path)} ({seconds:.2f}s)")
+
+
+class AsyncDagScheduler(DagScheduler):
+    """
+    DagScheduler on an asyncio event loop: every stage's extractor is a
+    producer task streaming chunks into a bounded asyncio.Queue, at most
+    `workers` stages reading at once (each on its own thread, since the
+    source driver blocks), while a single writer task consumes the queues
+    in dependency order. Loads run on the calling thread, inside the
+    caller's transaction, so even with one worker the next chunk is read
+    from the source while the current one is transformed and written.
+    """
+
+    def run(self):
+        async_to_sync(self._run)()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        readers = asyncio.Semaphore(max(self.workers, 1))
+        queues = {name: asyncio.Queue(maxsize=self.queue_size) for name in self.order}
+
+        # created in writer consumption order; the semaphore is FIFO, so the
+        # stage the writer waits on is always reading or about to
+        producers = [
+            asyncio.create_task(self._produce_async(name, queues[name], readers))
+            for name in self.order
+        ]
+        consume = sync_to_async(self._consume, thread_sensitive=True)
+        try:
+            for name in self.order:
+                await consume(name, self._receive(queues[name], loop))
+        finally:
+            for producer in producers:
+                producer.cancel()
+            await asyncio.gather(*producers, return_exceptions=True)
+
+    async def _produce_async(self, name, out, readers):
+        async with readers:
+            loop = asyncio.get_running_loop()
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"extract-{name}") as reader:
+                done = _Done()
+                try:
+                    chunks = self._timed_extract(name)
+                    while True:
+                        chunk = await loop.run_in_executor(reader, next, chunks, done)
+                        await out.put(chunk)
+                        if chunk is done:
+                            return
+                except Exception as exc:
+                    await out.put(_Failed(exc))
+                finally:
+                    # release the reader thread's source connection
+                    await loop.run_in_executor(reader, connections.close_all)
+
+    def _receive(self, source, loop):
+        """Chunks of one stage's queue, read from the (blocked) calling thread."""
+        while True:
+            item = asyncio.run_coroutine_threadsafe(source.get(), loop).result()
+            if isinstance(item, _Done):
+                return
+            if isinstance(item, _Failed):
+                raise item.exc
+            yield item
+
+
+# --pipeline choices of full_load and incremental
+SCHEDULERS = {"threads": DagScheduler, "asyncio": AsyncDagScheduler}
@@ -0,0 +1,126 @@
+import time
+
+from django.apps import apps
+from django.apps.registry import Apps
+from django.db import connections
+from django.db.migrations.state import ModelState
+
+
+SHADOW_PREFIX = "shadow_"
+RETIRED_PREFIX = "retired_"
+
+
+class ShadowTables:
+    """
+    Shadow copies of analytics tables, so a full rebuild can be loaded (and
+    committed in pieces) while readers keep seeing the live tables.
+
+    Each shadow is a model rendered in a private app registry with db_table
+    "shadow_<table>"; foreign keys between rebuilt tables point at the other
+    shadows, while tables that are not rebuilt (dim_date) are shared. Shadows
+    carry no secondary indexes: swap() renames them over the live tables in
+    one transaction (SQLite rewrites foreign key references on rename), drops
+    the old tables and then builds the canonical indexes of the live models.
+
+    models must be listed parents first.
+    """
+
+    def __init__(self, models, using="default"):
+        self.live = list(models)
+        self.using = using
+        self.registry = Apps()
+        self.index_seconds = 0.0
+
+        self.shadows = {}
+        for model in apps.get_app_config("syncapp").get_models():
+            state = ModelState.from_model(model)
+            if model in self.live:
+                state.options["db_table"] = SHADOW_PREFIX + model._meta.db_table
+                state.options["indexes"] = []
+                state.options["unique_together"] = set()
+                state.options["constraints"] = []
+                for field in state.fields.values():
+                    field.db_index = False
+
+            rendered = state.render(self.registry)
+            if model in self.live:
+                self.shadows[model] = rendered
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def model(self, live):
+        return self.shadows[live]
+
+    def exists(self):
+        tables = set(self.connection.introspection.table_names())
+        return all(shadow._meta.db_table in tables for shadow in self.shadows.values())
+
+    def create(self):
+        """(Re)create empty shadow tables, dropping leftovers of an earlier run."""
+        tables = set(self.connection.introspection.table_names())
+
+        with self.connection.schema_editor() as editor:
+            for model in reversed(self.live):
+                shadow = self.shadows[model]
+                if shadow._meta.db_table in tables:
+                    editor.delete_model(shadow)
+            for model in self.live:
+                editor.create_model(self.shadows[model])
+
+    def drop(self):
+        tables = set(self.connection.introspection.table_names())
+
+        with self.connection.schema_editor() as editor:
+            for model in reversed(self.live):
+                shadow = self.shadows[model]
+                if shadow._meta.db_table in tables:
+                    editor.delete_model(shadow)
+
+    def swap(self, prepare=None, finalize=None):
+        """
+        Replace the live tables with the shadows in a single transaction.
+        prepare() runs inside that transaction before any table is renamed,
+        finalize() once the tables are in place.
+        """
+        with self.connection.schema_editor() as editor:
+            if prepare:
+                prepare()
+
+            for model in self.live:
+                table = model._meta.db_table
+                editor.alter_db_table(model, table, RETIRED_PREFIX + table)
+
+            for model in self.live:
+                shadow = self.shadows[model]
+                editor.alter_db_table(shadow, shadow._meta.db_table, model._meta.db_table)
+
+            for model in reversed(self.live):
+                editor.execute(editor.sql_delete_table % {
+                    "table": editor.quote_name(RETIRED_PREFIX + model._meta.db_table),
+                })
+
+            started = time.perf_counter()
+            for model in self.live:
+                build_indexes(editor, model)
+            self.index_seconds = time.perf_counter() - started
+
+            if finalize:
+                finalize()
+
+
+def build_indexes(editor, model):
+    """
+    Create the secondary indexes, unique_together indexes and constraints
+    declared on model.
+    """
+    for sql in editor._model_indexes_sql(model):
+        editor.execute(sql)
+
+    for field_names in model._meta.unique_together:
+        fields = [model._meta.get_field(name) for name in field_names]
+        editor.execute(editor._create_unique_sql(model, fields))
+
+    for constraint in model._meta.constraints:
+        editor.execute(constraint.create_sql(model, editor))
@@ -0,0 +1,151 @@
+import json
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from syncapp.aggregates import (
+    AGGREGATES,
+    BRIDGE_AGGREGATES,
+    FACT_AGGREGATES,
+    MONTHLY_CATEGORY_RENTALS,
+    STORE_MONTH_CUSTOMERS,
+    tracking,
+)
+from syncapp.bridges import FILM_CATEGORY
+from syncapp.dates import ensure_date_range
+from syncapp.models import (
+    AggDailyStoreRevenue,
+    AggStoreMonthCustomers,
+    BridgeFilmCategory,
+    DimCategory,
+    DimCustomer,
+    DimFilm,
+    DimStaff,
+    DimStore,
+    FactPayment,
+    FactRental,
+)
+
+
+class AggregatesTest(TestCase):
+    databases = {"default", "source"}
+
+    def setUp(self):
+        now = timezone.now()
+        ensure_date_range(date(2005, 5, 1), date(2005, 7, 31))
+        self.films = [
+            DimFilm.objects.create(film_id=i, title=f"F{i}", language="English", last_update=now)
+            for i in (1, 2)
+        ]
+        self.category = DimCategory.objects.create(category_id=7, name="Drama", last_update=now)
+        BridgeFilmCategory.objects.create(film_key=self.films[0], category_key=self.category)
+        self.store = DimStore.objects.create(store_id=1, city="C", country="X", last_update=now)
+        self.customers = [
+            DimCustomer.objects.create(
+                customer_id=i, first_name="A", last_name="B", active=True, city="C", country="X",
+                last_update=now,
+            )
+            for i in (1, 2)
+        ]
+        self.staff = DimStaff.objects.create(
+            staff_id=1, first_name="A", last_name="B", store_id=1, active=True, last_update=now,
+        )
+        FactRental.objects.bulk_create([
+            self.rental(1, 20050524, film=0, customer=0),
+            self.rental(2, 20050530, film=0, customer=0),
+            self.rental(3, 20050601, film=1, customer=1),
+        ])
+        FactPayment.objects.bulk_create([
+            self.payment(1, 20050524, "2.99"), self.payment(2, 20050524, "4.99"),
+        ])
+        call_command("rebuild_aggregates", stdout=StringIO())
+
+    def rental(self, rental_id, rented, film, customer):
+        return FactRental(
+            rental_id=rental_id,
+            date_key_rented_id=rented,
+            film_key=self.films[film],
+            store_key=self.store,
+            customer_key=self.customers[customer],
+            staff_key=self.staff,
+        )
+
+    def payment(self, payment_id, paid, amount):
+        return FactPayment(
+            payment_id=payment_id,
+            date_key_paid_id=paid,
+            customer_key=self.customers[0],
+            store_key=self.store,
+            staff_key=self.staff,
+            amount=Decimal(amount),
+        )
+
+    def assertAggregatesMatchFacts(self):
+        for aggregate in AGGREGATES.values():
+            self.assertEqual(aggregate.rows(), aggregate.read(), aggregate.name)
+
+    def test_rebuild_summarises_the_facts(self):
+        self.assertEqual(
+            list(AggDailyStoreRevenue.objects.values_list("date_key", "store_id", "payments", "revenue")),
+            [(20050524, 1, 2, Decimal("7.98"))],
+        )
+        self.assertEqual(MONTHLY_CATEGORY_RENTALS.rows(), {(200505, 7): (2,)})
+        self.assertEqual(
+            sorted(AggStoreMonthCustomers.objects.values_list("month", "store_id", "active_customers")),
+            [(200505, 1, 1), (200506, 1, 1)],
+        )
+
+    def test_tracking_applies_the_difference_of_each_write(self):
+        aggregates = FACT_AGGREGATES[FactRental]
+
+        # rental 2 moves to June and to the other film, rental 4 is new
+        with tracking(aggregates, "rental_id", [2, 4]):
+            FactRental.objects.filter(rental_id=2).update(
+                date_key_rented_id=20050602, film_key=self.films[1],
+            )
+            FactRental.objects.bulk_create([self.rental(4, 20050603, film=0, customer=1)])
+        self.assertAggregatesMatchFacts()
+        self.assertEqual(MONTHLY_CATEGORY_RENTALS.rows(), {(200505, 7): (1,), (200506, 7): (1,)})
+        self.assertEqual(STORE_MONTH_CUSTOMERS.rows(), {(200505, 1): (1,), (200506, 1): (2,)})
+
+        # the last rentals of a group delete it
+        with tracking(aggregates, "rental_id", [1]):
+            FactRental.objects.filter(rental_id=1).delete()
+        self.assertAggregatesMatchFacts()
+        self.assertEqual(STORE_MONTH_CUSTOMERS.rows(), {(200506, 1): (2,)})
+
+        with tracking(FACT_AGGREGATES[FactPayment], "payment_id", [1]):
+            FactPayment.objects.filter(payment_id=1).update(amount=Decimal("0.99"))
+        self.assertAggregatesMatchFacts()
+        self.assertEqual(AggDailyStoreRevenue.objects.get().revenue, Decimal("5.98"))
+
+    def test_bridge_links_move_category_rentals(self):
+        second = DimCategory.objects.create(category_id=8, name="Comedy", last_update=timezone.now())
+
+        with tracking(BRIDGE_AGGREGATES[FILM_CATEGORY.name], "film_key_id", [self.films[0].pk]):
+            BridgeFilmCategory.objects.filter(film_key=self.films[0]).update(category_key=second)
+
+        self.assertAggregatesMatchFacts()
+        self.assertEqual(MONTHLY_CATEGORY_RENTALS.rows(), {(200505, 8): (2,)})
+
+    def test_validate_check_lists_differing_groups(self):
+        out = StringIO()
+        call_command("validate", check=["aggregates"], format="json", stdout=out)
+        self.assertTrue(json.loads(out.getvalue())["ok"])
+
+        AggDailyStoreRevenue.objects.update(payments=5)
+        out = StringIO()
+        call_command("validate", check=["aggregates"], format="json", stdout=out)
+        report = json.loads(out.getvalue())
+
+        self.assertFalse(report["ok"])
+        self.assertEqual(report["checks"][0]["details"]["daily_store_revenue"]["differing"], [[20050524, 1]])
+
+        out = StringIO()
+        call_command("rebuild_aggregates", aggregate=["daily_store_revenue"], stdout=out)
+        self.assertIn("agg_daily_store_revenue: 1 rows", out.getvalue())
+        self.assertAggregatesMatchFacts()
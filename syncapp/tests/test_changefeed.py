@@ -0,0 +1,47 @@
+import os
+
+from django.test import SimpleTestCase
+
+from syncapp.changefeed import ChangeEvent, JsonLinesFeed, batch_position, iter_batches, net_changes
+
+
+class ChangeFeedTest(SimpleTestCase):
+
+    def test_batches_end_on_resume_points(self):
+        # rows of one source transaction: only the last one can be resumed after
+        events = [
+            ChangeEvent("film", "insert", {"film_id": 1}),
+            ChangeEvent("film", "insert", {"film_id": 2}),
+            ChangeEvent("film", "insert", {"film_id": 3}, position="log.1:300"),
+            ChangeEvent("film", "update", {"film_id": 1}, position="log.1:400"),
+        ]
+
+        batches = list(iter_batches(events, 2))
+
+        self.assertEqual([len(batch) for batch in batches], [3, 1])
+        self.assertEqual([batch_position(batch) for batch in batches], ["log.1:300", "log.1:400"])
+
+    def test_last_change_per_row_wins(self):
+        events = [
+            ChangeEvent("film", "insert", {"film_id": 1}),
+            ChangeEvent("film", "delete", {"film_id": 1}),
+            ChangeEvent("film", "delete", {"film_id": 2}),
+            ChangeEvent("film", "insert", {"film_id": 2}),
+            ChangeEvent("film_actor", "delete", {"film_id": 1, "actor_id": 5}),
+            ChangeEvent("address", "update", {"address_id": 9}),
+        ]
+
+        changes = net_changes(events, {"film": ("film_id",), "film_actor": ("film_id", "actor_id")})
+
+        self.assertEqual(changes, {"film": ([2], [1]), "film_actor": ([], [(1, 5)])})
+
+    def test_unknown_operation_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ChangeEvent("film", "truncate", {})
+
+    def test_files_are_told_apart_by_directory(self):
+        first = JsonLinesFeed(os.path.join("exports", "a", "changes.jsonl"))
+        second = JsonLinesFeed(os.path.join("exports", "b", "changes.jsonl"))
+
+        self.assertNotEqual(first.name, second.name)
+        self.assertEqual(first.name, "file:" + os.path.abspath("exports/a/changes.jsonl"))
@@ -0,0 +1,82 @@
+import os
+import time
+import unittest
+from datetime import date, datetime, timedelta, timezone
+
+from django.test import SimpleTestCase, TestCase
+
+from syncapp.dates import DateKeyIndex, date_key, ensure_date_range, iter_dim_dates
+from syncapp.models import DimDate
+
+
+class DimDateGeneratorTest(TestCase):
+
+    def test_generated_attributes_match_calendar(self):
+        start, end = date(1999, 12, 25), date(2001, 3, 5)  # spans a leap-year February
+        rows = list(iter_dim_dates(start, end))
+
+        self.assertEqual(len(rows), (end - start).days + 1)
+        for offset, row in enumerate(rows):
+            day = start + timedelta(days=offset)
+            self.assertEqual(row.date, day)
+            self.assertEqual(row.date_key, int(day.strftime("%Y%m%d")))
+            self.assertEqual(row.quarter, (day.month - 1) // 3 + 1)
+            self.assertEqual(row.day_of_week, day.isoweekday())
+            self.assertEqual(row.is_weekend, day.isoweekday() >= 6)
+
+    def test_ensure_date_range_only_writes_missing_days(self):
+        ensure_date_range(date(2005, 5, 1), date(2005, 5, 31))
+        DimDate.objects.filter(date_key=20050515).delete()
+
+        created = ensure_date_range(date(2005, 5, 10), date(2005, 6, 9), batch_size=7)
+
+        self.assertEqual(created, 1 + 9)  # the deleted day plus June 1–9
+        self.assertEqual(
+            DimDate.objects.filter(date_key__range=(20050501, 20050609)).count(), 40
+        )
+        self.assertEqual(ensure_date_range(date(2005, 5, 1), date(2005, 6, 9)), 0)
+
+    def test_date_key_index_skips_known_days(self):
+        ensure_date_range(date(2005, 5, 1), date(2005, 5, 31))
+        index = DateKeyIndex()
+        index.load()
+
+        with self.assertNumQueries(0):
+            index.ensure({20050501, 20050531, None})
+
+        index.ensure({20050602})
+        self.assertTrue(DimDate.objects.filter(date_key=20050602).exists())
+        self.assertIn(20050602, index.known)
+
+
+class DateKeyTest(SimpleTestCase):
+
+    def test_date_key_matches_strftime(self):
+        moment = datetime(2006, 2, 14, 23, 59, tzinfo=timezone.utc)
+        self.assertEqual(date_key(moment), 20060214)
+        self.assertEqual(date_key(moment.date()), 20060214)
+        self.assertIsNone(date_key(None))
+
+
+@unittest.skipUnless(os.environ.get("SYNC_BENCHMARKS"), "set SYNC_BENCHMARKS=1 to run benchmarks")
+class DateKeyBenchmark(SimpleTestCase):
+
+    def test_per_row_date_key_cost(self):
+        start = datetime(2005, 5, 24, tzinfo=timezone.utc)
+        timestamps = [start + timedelta(seconds=37 * i) for i in range(1_000_000)]
+
+        began = time.perf_counter()
+        before = [int(ts.strftime("%Y%m%d")) for ts in timestamps]
+        strftime_seconds = time.perf_counter() - began
+
+        began = time.perf_counter()
+        after = [date_key(ts) for ts in timestamps]
+        date_key_seconds = time.perf_counter() - began
+
+        print(
+            f"\n1M timestamps: strftime {strftime_seconds:.3f}s, "
+            f"date_key {date_key_seconds:.3f}s "
+            f"({strftime_seconds / date_key_seconds:.1f}x)"
+        )
+        self.assertEqual(before, after)
+        self.assertLess(date_key_seconds, strftime_seconds)
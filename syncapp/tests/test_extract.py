@@ -0,0 +1,118 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from syncapp.extract import DIMENSION_SPECS
+from syncapp.models_source import (
+    Actor,
+    Address,
+    Category,
+    City,
+    Country,
+    Customer,
+    Film,
+    Language,
+    Staff,
+    Store,
+)
+
+
+class ExtractSpecTest(TestCase):
+    databases = {"default", "source"}
+
+    def setUp(self):
+        now = timezone.now()
+        Language.objects.using("source").update_or_create(
+            language_id=1, defaults={"name": "English", "last_update": now},
+        )
+        Country.objects.using("source").update_or_create(
+            country_id=1, defaults={"country": "USA", "last_update": now},
+        )
+        City.objects.using("source").update_or_create(
+            city_id=1, defaults={"city": "Chicago", "country_id": 1, "last_update": now},
+        )
+        Address.objects.using("source").update_or_create(
+            address_id=1,
+            defaults={
+                "address": "123 Test St",
+                "district": "District",
+                "city_id": 1,
+                "postal_code": "00000",
+                "phone": "555-1111",
+                "last_update": now,
+            },
+        )
+
+        for i in (1, 2, 3):
+            Film.objects.using("source").update_or_create(
+                film_id=5000 + i,
+                defaults={
+                    "title": f"EXTRACT MOVIE {i}",
+                    "language_id": 1,
+                    "rental_duration": 3,
+                    "rental_rate": 0.99,
+                    "replacement_cost": 20,
+                    "last_update": now,
+                },
+            )
+            Actor.objects.using("source").update_or_create(
+                actor_id=5000 + i,
+                defaults={"first_name": "A", "last_name": f"B{i}", "last_update": now},
+            )
+            Category.objects.using("source").update_or_create(
+                category_id=500 + i, defaults={"name": f"Cat{i}", "last_update": now},
+            )
+            Store.objects.using("source").update_or_create(
+                store_id=500 + i,
+                defaults={"manager_staff_id": None, "address_id": 1, "last_update": now},
+            )
+            Customer.objects.using("source").update_or_create(
+                customer_id=5000 + i,
+                defaults={
+                    "store_id": 501,
+                    "first_name": "F",
+                    "last_name": f"L{i}",
+                    "address_id": 1,
+                    "active": True,
+                    "create_date": now.date(),
+                    "last_update": now,
+                },
+            )
+            Staff.objects.using("source").update_or_create(
+                staff_id=500 + i,
+                defaults={
+                    "first_name": "S",
+                    "last_name": f"T{i}",
+                    "address_id": 1,
+                    "store_id": 500 + i,
+                    "active": True,
+                    "username": f"staff{i}",
+                    "last_update": now,
+                },
+            )
+
+    def test_each_dimension_is_extracted_in_one_query(self):
+        for name, spec in DIMENSION_SPECS.items():
+            with self.subTest(dimension=name):
+                # language / address → city → country are joined in, not walked per row
+                with self.assertNumQueries(1, using="source"):
+                    rows = [row for chunk in spec.iter_chunks(10_000) for row in chunk]
+
+                self.assertGreaterEqual(len(rows), 3)
+                self.assertEqual(set(rows[0]), set(spec.columns))
+
+    def test_rows_carry_joined_columns(self):
+        rows = [
+            row
+            for chunk in DIMENSION_SPECS["customer"].iter_chunks(10_000, customer_id=5001)
+            for row in chunk
+        ]
+        self.assertEqual(rows[0]["city"], "Chicago")
+        self.assertEqual(rows[0]["country"], "USA")
+
+        films = [
+            row
+            for chunk in DIMENSION_SPECS["film"].iter_chunks(10_000, film_id=5001)
+            for row in chunk
+        ]
+        self.assertEqual(films[0]["language"], "English")
+        self.assertEqual(films[0]["rating"], "")
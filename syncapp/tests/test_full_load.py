@@ -1,11 +1,15 @@
+from io import StringIO
+
 from syncapp.models_source import Language, Film
 from django.utils import timezone
 from django.core.management import call_command
-from django.test import TestCase
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
 from syncapp.models import (
     DimFilm, DimActor, DimCategory, DimStore, DimCustomer,
     BridgeFilmActor, BridgeFilmCategory,
-    FactRental, FactPayment
+    FactRental, FactPayment, LoadCheckpoint
 )
 
 class FullLoadCommandTest(TestCase):
@@ -40,3 +44,89 @@ class FullLoadCommandTest(TestCase):
             DimFilm.objects.count(), 0,
             "FULL LOAD did not load films even though one exists in source DB."
         )
+
+    def test_full_load_streams_in_chunks(self):
+        Film.objects.using("source").update_or_create(
+            film_id=2,
+            defaults={
+                "title": "SECOND SEED MOVIE",
+                "description": "seed",
+                "release_year": 2024,
+                "language_id": 1,
+                "rental_duration": 3,
+                "rental_rate": 0.99,
+                "length": 100,
+                "replacement_cost": 20,
+                "last_update": timezone.now(),
+            },
+        )
+
+        # chunk size smaller than the table forces several keyset pages
+        call_command("full_load", chunk_size=1, verbosity=0)
+        self.assertEqual(
+            DimFilm.objects.count(),
+            Film.objects.using("source").count(),
+            "Chunked FULL LOAD did not load every film.",
+        )
+
+    def test_memory_is_traced_only_on_request(self):
+        out = StringIO()
+        call_command("full_load", stdout=out)
+        self.assertIn("process peak RSS", out.getvalue())
+        self.assertNotIn("peak traced memory", out.getvalue())
+
+        out = StringIO()
+        call_command("full_load", memory_report=True, stdout=out)
+        self.assertIn("dim_film: 1 rows", out.getvalue())
+        self.assertIn("peak traced memory", out.getvalue())
+
+
+class ShadowFullLoadTest(TransactionTestCase):
+    # shadow tables need DDL outside a transaction, so not under TestCase
+    databases = {"default", "source"}
+
+    def setUp(self):
+        FullLoadCommandTest.setUp(self)
+
+    def test_full_load_replaces_previous_warehouse(self):
+        call_command("full_load", verbosity=0)
+        Film.objects.using("source").filter(film_id=1).update(title="RENAMED SEED MOVIE")
+
+        call_command("full_load", verbosity=0)
+
+        self.assertEqual(
+            list(DimFilm.objects.values_list("title", flat=True)),
+            ["RENAMED SEED MOVIE"],
+            "Swapped-in warehouse does not match the source.",
+        )
+
+    def test_full_load_keeps_dimension_history(self):
+        now = timezone.now()
+        DimStore.objects.bulk_create([
+            DimStore(store_id=1, city="OLD", country="X", last_update=now, version=1,
+                     valid_to=now, is_current=False),
+            DimStore(store_id=1, city="NEW", country="X", last_update=now, version=2,
+                     valid_from=now),
+        ])
+
+        call_command("full_load", verbosity=0)
+
+        self.assertEqual(
+            list(DimStore.objects.order_by("version").values_list("city", "is_current")),
+            [("OLD", False), ("NEW", True)],
+            "Full load dropped earlier versions of a versioned dimension.",
+        )
+
+    def test_checkpointed_full_load_swaps_in_shadow_tables(self):
+        call_command("full_load", checkpointed=True, chunk_size=1, verbosity=0)
+
+        self.assertEqual(DimFilm.objects.count(), Film.objects.using("source").count())
+        self.assertFalse(LoadCheckpoint.objects.exists(), "Checkpoints left behind after swap.")
+        self.assertFalse(
+            [t for t in connection.introspection.table_names() if t.startswith("shadow_")],
+            "Shadow tables left behind after swap.",
+        )
+
+    def test_resume_without_interrupted_load_fails(self):
+        with self.assertRaises(CommandError):
+            call_command("full_load", resume=True, verbosity=0)
@@ -1,11 +1,20 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
 from django.test import TestCase
 from django.core.management import call_command
 from django.utils import timezone
 from datetime import timedelta
 
-from syncapp.models import DimFilm
+from syncapp.keymap import DimensionKeyMap
+from syncapp.management.commands import incremental
+from syncapp.models import BridgeFilmActor, DimFilm, DimStaff, DimStore, SyncState
 from syncapp.models_source import (
+    Actor,
     Film,
+    FilmActor,
     Language,
     Store,
     Staff,
@@ -146,3 +155,302 @@ class IncrementalSyncTest(TestCase):
             "UPDATED TITLE",
             "Incremental sync did NOT propagate film update.",
         )
+
+    # test that batched upserts handle more rows than one batch
+    def test_incremental_upserts_across_batches(self):
+        self.ensure_source_fks()
+        now = timezone.now()
+
+        for film_id in (4001, 4002, 4003):
+            Film.objects.using("source").update_or_create(
+                film_id=film_id,
+                defaults={
+                    "title": f"BATCH MOVIE {film_id}",
+                    "description": "batch",
+                    "release_year": 2025,
+                    "language_id": 1,
+                    "rental_duration": 3,
+                    "rental_rate": 0.99,
+                    "length": 100,
+                    "replacement_cost": 20,
+                    "last_update": now,
+                },
+            )
+
+        call_command("incremental", batch_size=2, verbosity=0)
+
+        self.assertEqual(
+            DimFilm.objects.filter(film_id__in=[4001, 4002, 4003]).count(),
+            3,
+            "Batched incremental sync did NOT load every new film.",
+        )
+
+    # test that the watermark breaks last_update ties by primary key
+    def test_incremental_watermark_uses_source_timestamps(self):
+        self.ensure_source_fks()
+        changed = timezone.now() - timedelta(days=3)
+
+        def create_film(film_id):
+            Film.objects.using("source").update_or_create(
+                film_id=film_id,
+                defaults={
+                    "title": f"TIED MOVIE {film_id}",
+                    "description": "tie",
+                    "release_year": 2025,
+                    "language_id": 1,
+                    "rental_duration": 3,
+                    "rental_rate": 0.99,
+                    "length": 100,
+                    "replacement_cost": 20,
+                    "last_update": changed,
+                },
+            )
+
+        for film_id in (5001, 5002, 5003):
+            create_film(film_id)
+
+        call_command("incremental", batch_size=2, verbosity=0)
+
+        state = SyncState.objects.get(table_name="film")
+        self.assertEqual(state.last_update, changed)
+        self.assertEqual(state.last_pk, 5003)
+
+        # same source timestamp as the watermark, higher pk: still picked up
+        create_film(5004)
+        call_command("incremental", batch_size=2, verbosity=0)
+
+        self.assertTrue(
+            DimFilm.objects.filter(film_id=5004).exists(),
+            "Incremental sync skipped a row sharing the watermark timestamp.",
+        )
+
+    # test that bridge links are inserted and deletions caught by the full diff
+    def test_incremental_syncs_bridge_links(self):
+        self.ensure_source_fks()
+        now = timezone.now()
+
+        Film.objects.using("source").update_or_create(
+            film_id=6001,
+            defaults={
+                "title": "LINKED MOVIE",
+                "description": "links",
+                "release_year": 2025,
+                "language_id": 1,
+                "rental_duration": 3,
+                "rental_rate": 0.99,
+                "length": 100,
+                "replacement_cost": 20,
+                "last_update": now,
+            },
+        )
+        for actor_id in (6001, 6002):
+            Actor.objects.using("source").update_or_create(
+                actor_id=actor_id,
+                defaults={"first_name": "LINK", "last_name": f"ACTOR {actor_id}", "last_update": now},
+            )
+            FilmActor.objects.using("source").create(
+                actor_id=actor_id, film_id=6001, last_update=now
+            )
+
+        call_command("incremental", verbosity=0)
+        links = BridgeFilmActor.objects.filter(film_key__film_id=6001)
+        self.assertEqual(links.count(), 2, "Incremental sync did NOT load film-actor links.")
+
+        FilmActor.objects.using("source").filter(actor_id=6002, film_id=6001).delete()
+        call_command("incremental", bridge_diff_hours=0, verbosity=0)
+
+        self.assertEqual(
+            list(links.values_list("actor_key__actor_id", flat=True)),
+            [6001],
+            "Bridge diff did NOT remove a deleted film-actor link.",
+        )
+
+    # test that a run stopped between batches of links sharing one
+    # last_update resumes with the rest of them
+    def test_bridge_links_resume_within_a_timestamp(self):
+        self.ensure_source_fks()
+        call_command("incremental", verbosity=0)  # first full diff
+        tied = timezone.now() - timedelta(hours=1)
+
+        Film.objects.using("source").update_or_create(
+            film_id=6101,
+            defaults={
+                "title": "TIED LINKS",
+                "description": "links",
+                "release_year": 2025,
+                "language_id": 1,
+                "rental_duration": 3,
+                "rental_rate": 0.99,
+                "length": 100,
+                "replacement_cost": 20,
+                "last_update": tied,
+            },
+        )
+        for actor_id in (6101, 6102, 6103):
+            Actor.objects.using("source").update_or_create(
+                actor_id=actor_id,
+                defaults={"first_name": "TIED", "last_name": f"ACTOR {actor_id}", "last_update": tied},
+            )
+            FilmActor.objects.using("source").create(actor_id=actor_id, film_id=6101, last_update=tied)
+
+        links = BridgeFilmActor.objects.filter(film_key__film_id=6101)
+
+        class StopAfterFirstBatch:
+            # stop as soon as the first batch of links has committed
+            def is_set(self):
+                return links.exists()
+
+        command = incremental.Command()
+        command.stop_requested = StopAfterFirstBatch()
+        call_command(command, batch_size=2, verbosity=0)
+        self.assertEqual(links.count(), 2)
+        state = SyncState.objects.get(table_name="film_actor")
+        self.assertEqual((state.last_update, state.last_pk, state.last_link_id), (tied, 6101, 6102))
+
+        call_command("incremental", batch_size=2, verbosity=0)
+        self.assertEqual(
+            sorted(links.values_list("actor_key__actor_id", flat=True)), [6101, 6102, 6103],
+            "Incremental sync skipped links sharing the watermark timestamp.",
+        )
+
+    # test that staff are synced into dim_staff with their home store
+    def test_incremental_syncs_staff_dimension(self):
+        self.ensure_source_fks()
+
+        call_command("incremental", verbosity=0)
+
+        staff = DimStaff.objects.get(staff_id=1)
+        self.assertEqual((staff.first_name, staff.store_id), ("Alice", 1))
+
+    # test that a replayed change feed inserts and deletes rows and links
+    def test_incremental_applies_change_feed(self):
+        self.ensure_source_fks()
+        now = timezone.now()
+
+        Film.objects.using("source").update_or_create(
+            film_id=7001,
+            defaults={
+                "title": "FEED MOVIE",
+                "description": "feed",
+                "release_year": 2025,
+                "language_id": 1,
+                "rental_duration": 3,
+                "rental_rate": 0.99,
+                "length": 100,
+                "replacement_cost": 20,
+                "last_update": now,
+            },
+        )
+        Actor.objects.using("source").update_or_create(
+            actor_id=7001,
+            defaults={"first_name": "FEED", "last_name": "ACTOR", "last_update": now},
+        )
+        FilmActor.objects.using("source").create(actor_id=7001, film_id=7001, last_update=now)
+
+        events = [
+            {"table": "film", "op": "insert", "row": {"film_id": 7001}},
+            {"table": "actor", "op": "insert", "row": {"actor_id": 7001}},
+            {"table": "film_actor", "op": "insert", "row": {"film_id": 7001, "actor_id": 7001}},
+        ]
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "changes.jsonl")
+
+        def write_events():
+            with open(path, "w") as changes:
+                changes.writelines(json.dumps(event) + "\n" for event in events)
+
+        write_events()
+        call_command("incremental", changes_file=path, verbosity=0)
+
+        self.assertTrue(DimFilm.objects.filter(film_id=7001).exists())
+        links = BridgeFilmActor.objects.filter(film_key__film_id=7001)
+        self.assertEqual(links.count(), 1, "Change feed did NOT insert the film-actor link.")
+
+        # the next run resumes after the lines already applied
+        FilmActor.objects.using("source").filter(actor_id=7001, film_id=7001).delete()
+        events.append({"table": "film_actor", "op": "delete", "row": {"film_id": 7001, "actor_id": 7001}})
+        write_events()
+        call_command("incremental", changes_file=path, verbosity=0)
+
+        self.assertEqual(links.count(), 0, "Change feed did NOT delete the film-actor link.")
+        self.assertEqual(SyncState.objects.get(table_name=f"changefeed:file:{path}").position, "4")
+
+    # test that feed links to rows missing from the warehouse are reported
+    def test_change_feed_reports_skipped_links(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "changes.jsonl")
+        with open(path, "w") as changes:
+            changes.write(json.dumps(
+                {"table": "film_actor", "op": "insert", "row": {"film_id": 7001, "actor_id": 7002}}
+            ) + "\n")
+
+        out = StringIO()
+        call_command("incremental", changes_file=path, stdout=out)
+
+        self.assertIn("1 film_actor links skipped: film or actor not in the warehouse.", out.getvalue())
+
+    # test that rows whose columns did not change are touched but not rewritten
+    def test_incremental_skips_rows_with_unchanged_fingerprint(self):
+        self.ensure_source_fks()
+        now = timezone.now()
+
+        film, _ = Film.objects.using("source").update_or_create(
+            film_id=9001,
+            defaults={
+                "title": "STABLE MOVIE",
+                "description": "hash",
+                "release_year": 2025,
+                "language_id": 1,
+                "rental_duration": 3,
+                "rental_rate": 0.99,
+                "length": 100,
+                "replacement_cost": 20,
+                "last_update": now - timedelta(days=1),
+            },
+        )
+        call_command("incremental", verbosity=0)
+        row_hash = DimFilm.objects.get(film_id=9001).row_hash
+
+        # only last_update moves (e.g. bumped by a trigger)
+        film.last_update = now
+        film.save(using="source")
+        out = StringIO()
+        call_command("incremental", stdout=out)
+
+        self.assertIn("1 films touched, 0 changed", out.getvalue())
+        self.assertEqual(DimFilm.objects.get(film_id=9001).row_hash, row_hash)
+
+        film.title = "RENAMED MOVIE"
+        film.last_update = now + timedelta(seconds=1)
+        film.save(using="source")
+        out = StringIO()
+        call_command("incremental", stdout=out)
+
+        self.assertIn("1 films touched, 1 changed", out.getvalue())
+        self.assertNotEqual(DimFilm.objects.get(film_id=9001).row_hash, row_hash)
+
+    # test that a changed store gets a new version and facts resolve by date
+    def test_incremental_versions_changed_store(self):
+        self.ensure_source_fks()
+        call_command("incremental", verbosity=0)
+        first = DimStore.objects.get(store_id=1)
+
+        moved = timezone.now() + timedelta(seconds=1)
+        City.objects.using("source").filter(city_id=1).update(city="Boston")
+        Store.objects.using("source").filter(store_id=1).update(last_update=moved)
+        call_command("incremental", verbosity=0)
+
+        versions = list(DimStore.objects.filter(store_id=1).order_by("version"))
+        self.assertEqual(
+            [(v.version, v.city, v.is_current) for v in versions],
+            [(1, "Chicago", False), (2, "Boston", True)],
+        )
+        self.assertEqual(versions[0].valid_to, moved)
+        self.assertEqual(versions[1].valid_from, moved)
+
+        keys = DimensionKeyMap()
+        self.assertEqual(keys.get_as_of("store", 1, moved - timedelta(days=1)), first.store_key)
+        self.assertEqual(keys.get_as_of("store", 1, moved), versions[1].store_key)
+        self.assertEqual(keys.get("store", 1), versions[1].store_key)
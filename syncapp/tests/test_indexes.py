@@ -0,0 +1,102 @@
+import os
+import time
+import unittest
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from syncapp.indexes import (
+    drop_secondary_indexes,
+    rebuild_indexes,
+    redundant_indexes,
+    secondary_indexes,
+)
+from syncapp.models import DimCustomer, DimDate, DimFilm, DimStaff, DimStore, FactRental
+
+
+class IndexAuditTest(TestCase):
+
+    def test_index_on_unique_column_is_redundant(self):
+        indexes = [
+            {"name": "film_id_uniq", "columns": ["film_id"], "unique": True, "origin": "u"},
+            {"name": "film_id_idx", "columns": ["film_id"], "unique": False, "origin": "c"},
+            {"name": "film_title_idx", "columns": ["film_id", "title"], "unique": False, "origin": "c"},
+            {"name": "title_idx", "columns": ["title"], "unique": False, "origin": "c"},
+        ]
+
+        self.assertEqual(redundant_indexes(indexes), {"film_id_idx": "film_id_uniq"})
+
+    def test_schema_has_no_redundant_indexes(self):
+        out = StringIO()
+        call_command("audit_indexes", stdout=out)
+
+        self.assertIn("fact_rental:", out.getvalue())
+        self.assertNotIn("REDUNDANT", out.getvalue())
+        self.assertIn("No redundant indexes found.", out.getvalue())
+
+    def test_dropped_indexes_are_rebuilt(self):
+        before = secondary_indexes("fact_rental")
+
+        dropped = drop_secondary_indexes([FactRental])
+        self.assertEqual(secondary_indexes("fact_rental"), [])
+
+        rebuild_indexes(dropped)
+        self.assertEqual(secondary_indexes("fact_rental"), before)
+
+
+@unittest.skipUnless(os.environ.get("SYNC_BENCHMARKS"), "set SYNC_BENCHMARKS=1 to run benchmarks")
+class DeferredIndexBenchmark(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        DimDate.objects.create(
+            date_key=20050524, date=date(2005, 5, 24), year=2005, quarter=2,
+            month=5, day_of_month=24, day_of_week=2, is_weekend=False,
+        )
+        self.film = DimFilm.objects.create(film_id=1, title="F", language="English", last_update=now)
+        self.store = DimStore.objects.create(store_id=1, city="C", country="X", last_update=now)
+        self.customer = DimCustomer.objects.create(
+            customer_id=1, first_name="A", last_name="B", active=True, city="C", country="X",
+            last_update=now,
+        )
+        self.staff = DimStaff.objects.create(
+            staff_id=1, first_name="A", last_name="B", store_id=1, active=True, last_update=now,
+        )
+
+    def load_facts(self, count):
+        started = time.perf_counter()
+        FactRental.objects.bulk_create(
+            [
+                FactRental(
+                    rental_id=i,
+                    date_key_rented_id=20050524,
+                    film_key=self.film,
+                    store_key=self.store,
+                    customer_key=self.customer,
+                    staff_key=self.staff,
+                )
+                for i in range(count)
+            ],
+            batch_size=2000,
+        )
+        return time.perf_counter() - started
+
+    def test_fact_load_with_and_without_deferred_indexes(self):
+        rows = 200_000
+        maintained = self.load_facts(rows)
+        FactRental.objects.all().delete()
+
+        started = time.perf_counter()
+        dropped = drop_secondary_indexes([FactRental])
+        self.load_facts(rows)
+        rebuild_indexes(dropped)
+        deferred = time.perf_counter() - started
+
+        print(
+            f"\n{rows} fact_rental rows: indexes maintained {maintained:.2f}s, "
+            f"dropped and rebuilt {deferred:.2f}s ({maintained / deferred:.1f}x)"
+        )
+        self.assertEqual(FactRental.objects.count(), rows)
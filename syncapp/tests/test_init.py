@@ -25,3 +25,10 @@ class InitCommandTest(TestCase):
             "payment",
         }
         self.assertTrue(expected.issubset(tables))
+
+    def test_init_date_range_is_configurable(self):
+        call_command(
+            "init", "--date-start", "2005-01-01", "--date-end", "2005-12-31", verbosity=0
+        )
+
+        self.assertEqual(DimDate.objects.count(), 365)
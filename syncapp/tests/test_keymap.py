@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from syncapp.keymap import DimensionKeyMap
+from syncapp.models import DimCustomer, DimFilm
+
+
+class DimensionKeyMapTest(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        DimFilm.objects.bulk_create([
+            DimFilm(film_id=i, title=f"FILM {i}", language="English", last_update=now)
+            for i in range(1, 51)
+        ])
+
+    def test_lookups_are_served_from_memory(self):
+        expected = dict(DimFilm.objects.values_list("film_id", "film_key"))
+        keys = DimensionKeyMap()
+
+        # one values_list() load, then no per-row queries
+        with self.assertNumQueries(1):
+            for film_id in range(1, 51):
+                self.assertEqual(keys.get("film", film_id), expected[film_id])
+
+        self.assertEqual(keys.stats()["film"]["hits"], 50)
+        self.assertEqual(keys.stats()["film"]["queries"], 1)
+
+    def test_miss_raises_does_not_exist_and_is_counted(self):
+        keys = DimensionKeyMap()
+
+        with self.assertRaises(DimFilm.DoesNotExist):
+            keys.get("film", 999)
+
+        self.assertEqual(keys.stats()["film"]["misses"], 1)
+
+    def test_map_is_updated_in_place(self):
+        keys = DimensionKeyMap()
+        keys.load("film")
+
+        new = DimFilm.objects.create(
+            film_id=51, title="NEW", language="English", last_update=timezone.now()
+        )
+        keys.set("film", new.film_id, new.film_key)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(keys.get("film", 51), new.film_key)
+
+    def test_versions_are_resolved_by_date(self):
+        now = timezone.now()
+        changes = [now - timedelta(days=20), now - timedelta(days=10)]
+        DimCustomer.objects.bulk_create([
+            DimCustomer(
+                customer_id=1, first_name="A", last_name="B", active=True, city=city,
+                country="X", last_update=now, version=version, valid_from=valid_from,
+                valid_to=valid_to, is_current=valid_to is None,
+            )
+            for version, city, valid_from, valid_to in [
+                (1, "OLD", None, changes[0]),
+                (2, "MID", changes[0], changes[1]),
+                (3, "NEW", changes[1], None),
+            ]
+        ])
+        keys = [v.customer_key for v in DimCustomer.objects.order_by("version")]
+        key_map = DimensionKeyMap()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(key_map.get_as_of("customer", 1, now - timedelta(days=30)), keys[0])
+            self.assertEqual(key_map.get_as_of("customer", 1, changes[0]), keys[1])
+            self.assertEqual(key_map.get_as_of("customer", 1, now - timedelta(days=15)), keys[1])
+            self.assertEqual(key_map.get_as_of("customer", 1, now), keys[2])
+            self.assertEqual(key_map.get("customer", 1), keys[2])
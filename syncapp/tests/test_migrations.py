@@ -0,0 +1,72 @@
+import subprocess
+import sys
+from datetime import date
+from pathlib import Path
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TransactionTestCase
+from django.utils import timezone
+
+
+class MigrationsTest(SimpleTestCase):
+
+    def test_models_match_migrations(self):
+        # a fresh process, since the test run itself imports the source models
+        result = subprocess.run(
+            [sys.executable, "manage.py", "makemigrations", "syncapp", "--check", "--dry-run"],
+            cwd=Path(__file__).resolve().parents[2],
+            capture_output=True,
+            text=True,
+        )
+
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+
+
+class DimStaffMigrationTest(TransactionTestCase):
+    databases = {"default", "source"}
+
+    before = [("syncapp", "0004_sync_state_last_reconciled")]
+    after = [("syncapp", "0005_dim_staff")]
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate(self.before)
+        self.executor.loader.build_graph()
+
+    def tearDown(self):
+        self.executor.loader.build_graph()
+        self.executor.migrate(self.executor.loader.graph.leaf_nodes("syncapp"))
+
+    def migrate(self, targets):
+        self.executor.loader.build_graph()
+        self.executor.migrate(targets)
+        return self.executor.loader.project_state(targets).apps
+
+    def test_staff_ids_survive_a_round_trip(self):
+        apps = self.executor.loader.project_state(self.before).apps
+        now = timezone.now()
+        apps.get_model("syncapp", "DimDate").objects.create(
+            date_key=20050524, date=date(2005, 5, 24), year=2005, quarter=2, month=5,
+            day_of_month=24, day_of_week=2, is_weekend=False,
+        )
+        film = apps.get_model("syncapp", "DimFilm").objects.create(
+            film_id=1, title="F", language="English", last_update=now,
+        )
+        store = apps.get_model("syncapp", "DimStore").objects.create(
+            store_id=1, city="C", country="X", last_update=now,
+        )
+        customer = apps.get_model("syncapp", "DimCustomer").objects.create(
+            customer_id=1, first_name="A", last_name="B", active=True, city="C", country="X",
+            last_update=now,
+        )
+        apps.get_model("syncapp", "FactRental").objects.create(
+            rental_id=1, staff_id=2, date_key_rented_id=20050524, film_key=film,
+            store_key=store, customer_key=customer,
+        )
+
+        apps = self.migrate(self.after)
+        self.assertEqual(apps.get_model("syncapp", "FactRental").objects.get().staff_key.staff_id, 2)
+
+        apps = self.migrate(self.before)
+        self.assertEqual(apps.get_model("syncapp", "FactRental").objects.get().staff_id, 2)
@@ -0,0 +1,147 @@
+import json
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import migrations
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from syncapp.dates import ensure_date_range
+from syncapp.indexes import secondary_indexes
+from syncapp.models import DimCustomer, DimFilm, DimStaff, DimStore, FactRental
+from syncapp.partitions import MonthlyPartitions, refuse_partitioned_migrations
+from syncapp.tests.test_full_load import FullLoadCommandTest
+
+
+class MonthlyPartitionsTest(TestCase):
+    databases = {"default", "source"}
+
+    def setUp(self):
+        now = timezone.now()
+        ensure_date_range(date(2005, 5, 1), date(2005, 7, 31))
+        self.film = DimFilm.objects.create(film_id=1, title="F", language="English", last_update=now)
+        self.store = DimStore.objects.create(store_id=1, city="C", country="X", last_update=now)
+        self.customer = DimCustomer.objects.create(
+            customer_id=1, first_name="A", last_name="B", active=True, city="C", country="X",
+            last_update=now,
+        )
+        self.staff = DimStaff.objects.create(
+            staff_id=1, first_name="A", last_name="B", store_id=1, active=True, last_update=now,
+        )
+        FactRental.objects.bulk_create([
+            self.rental(1, 20050524), self.rental(2, 20050530), self.rental(3, 20050601),
+        ])
+        self.partitions = MonthlyPartitions(FactRental)
+
+    def rental(self, rental_id, rented):
+        return FactRental(
+            rental_id=rental_id,
+            date_key_rented_id=rented,
+            film_key=self.film,
+            store_key=self.store,
+            customer_key=self.customer,
+            staff_key=self.staff,
+        )
+
+    def test_split_moves_rows_into_monthly_partitions_behind_a_view(self):
+        self.partitions.split()
+
+        self.assertTrue(self.partitions.enabled())
+        self.assertEqual(self.partitions.rows(), {200505: 2, 200506: 1})
+        self.assertEqual(FactRental.objects.count(), 3)
+        self.assertEqual(
+            list(FactRental.objects.filter(date_key_rented__gte=20050601).values_list("rental_id", flat=True)),
+            [3],
+        )
+
+    def test_upsert_routes_new_and_moved_rows(self):
+        self.partitions.split()
+
+        created, updated = self.partitions.upsert(
+            [self.rental(1, 20050702), self.rental(4, 20050703)], "rental_id",
+        )
+
+        self.assertEqual((created, updated), ([4], [1]))
+        self.assertEqual(self.partitions.rows(), {200505: 1, 200506: 1, 200507: 2})
+        keys = list(FactRental.objects.values_list("fact_rental_key", flat=True))
+        self.assertEqual(len(keys), len(set(keys)), "Surrogate keys collide across partitions.")
+
+        self.assertEqual(self.partitions.delete("rental_id", [1, 2]), 2)
+        self.assertEqual(sorted(FactRental.objects.values_list("rental_id", flat=True)), [3, 4])
+
+    def test_merge_restores_the_plain_table(self):
+        indexes = secondary_indexes("fact_rental")
+        self.partitions.split()
+        self.partitions.compact(200505)
+        self.partitions.merge()
+
+        self.assertFalse(self.partitions.enabled())
+        self.assertEqual(self.partitions.months(), [])
+        self.assertEqual(FactRental.objects.count(), 3)
+        self.assertEqual(secondary_indexes("fact_rental"), indexes)
+
+    def test_migrate_refuses_to_alter_partitioned_facts(self):
+        self.partitions.split()
+
+        # nothing to apply: init's migrate keeps working
+        call_command("migrate", "syncapp", verbosity=0)
+
+        with self.assertRaisesMessage(CommandError, "partition_facts --merge"):
+            call_command("migrate", "syncapp", "0011", verbosity=0)
+        self.assertTrue(self.partitions.enabled())
+
+    def test_migrate_allows_other_apps_code_migrations(self):
+        self.partitions.split()
+        migration = migrations.Migration("0002_backfill", "otherapp")
+        migration.operations = [migrations.RunPython(migrations.RunPython.noop)]
+
+        refuse_partitioned_migrations(None, using="default", plan=[(migration, False)])
+
+        migration.app_label = "syncapp"
+        with self.assertRaisesMessage(CommandError, "partition_facts --merge"):
+            refuse_partitioned_migrations(None, using="default", plan=[(migration, False)])
+
+    def test_validate_finds_ids_stored_in_two_partitions(self):
+        self.partitions.split()
+        out = StringIO()
+        call_command("validate", check=["unique_ids"], format="json", stdout=out)
+        self.assertTrue(json.loads(out.getvalue())["ok"])
+
+        # a row written around upsert() into another month's partition
+        self.partitions.ensure([200507])
+        partition = self.partitions.partition(200507)
+        partition.objects.bulk_create([self.partitions.cast(self.rental(1, 20050702), partition)])
+
+        out = StringIO()
+        call_command("validate", check=["unique_ids"], format="json", stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertFalse(report["ok"])
+        self.assertEqual(report["checks"][0]["details"]["fact_rental"]["ids"], [1])
+
+    def test_command_reports_partitions(self):
+        out = StringIO()
+        call_command("partition_facts", table=["fact_rental"], compact=["2005-05"], stdout=out)
+
+        self.assertIn("fact_rental: split into 2 monthly partitions", out.getvalue())
+        self.assertIn("fact_rental_p200505: 2 rows", out.getvalue())
+
+
+class PartitionedFullLoadTest(TransactionTestCase):
+    # shadow tables need DDL outside a transaction, so not under TestCase
+    databases = {"default", "source"}
+
+    def setUp(self):
+        FullLoadCommandTest.setUp(self)
+
+    def test_full_load_keeps_facts_partitioned(self):
+        call_command("partition_facts", verbosity=0, stdout=StringIO())
+        # later test cases flush plain tables
+        self.addCleanup(call_command, "partition_facts", merge=True, stdout=StringIO())
+
+        call_command("full_load", verbosity=0, stdout=StringIO())
+
+        self.assertTrue(MonthlyPartitions(FactRental).enabled())
+        self.assertEqual(FactRental.objects.count(), 0)
+        self.assertEqual(DimFilm.objects.count(), 1)
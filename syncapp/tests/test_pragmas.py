@@ -0,0 +1,65 @@
+import os
+import time
+import unittest
+from datetime import date
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+
+from syncapp.batching import batched
+from syncapp.dates import iter_dim_dates
+from syncapp.models import DimDate
+from syncapp.pragmas import PROFILES, pragma_profile
+
+
+def read_pragma(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+class PragmaProfileTest(TransactionTestCase):
+    # synchronous/journal_mode cannot change inside TestCase's transaction
+
+    def test_connections_use_configured_profile(self):
+        self.assertEqual(read_pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(read_pragma("temp_store"), 2)  # MEMORY
+        self.assertEqual(read_pragma("cache_size"), PROFILES["bulk"]["cache_size"])
+
+    def test_profile_is_restored_afterwards(self):
+        with pragma_profile("full_load_unsafe"):
+            self.assertEqual(read_pragma("synchronous"), 0)  # OFF
+            self.assertEqual(read_pragma("cache_size"), PROFILES["full_load_unsafe"]["cache_size"])
+
+        self.assertEqual(read_pragma("synchronous"), 1)
+        self.assertEqual(read_pragma("cache_size"), PROFILES["bulk"]["cache_size"])
+
+    def test_full_load_profile_keeps_syncing(self):
+        with pragma_profile("full_load"):
+            self.assertEqual(read_pragma("synchronous"), 1)  # NORMAL, safe under WAL
+            self.assertEqual(read_pragma("cache_size"), PROFILES["full_load"]["cache_size"])
+
+
+@unittest.skipUnless(os.environ.get("SYNC_BENCHMARKS"), "set SYNC_BENCHMARKS=1 to run benchmarks")
+class PragmaProfileBenchmark(TransactionTestCase):
+
+    def test_load_throughput_per_profile(self):
+        # ~100k rows committed 1000 at a time, like a chunked load
+        start, end = date(1800, 1, 1), date(2073, 12, 31)
+        results = {}
+
+        for name in ("default", "bulk", "full_load", "full_load_unsafe"):
+            DimDate.objects.all().delete()
+            with pragma_profile(name):
+                began = time.perf_counter()
+                rows = 0
+                for batch in batched(iter_dim_dates(start, end), 1000):
+                    with transaction.atomic():
+                        DimDate.objects.bulk_create(batch)
+                    rows += len(batch)
+                results[name] = rows / (time.perf_counter() - began)
+
+        print("\ndim_date load throughput: " + ", ".join(
+            f"{name} {rate:,.0f} rows/s" for name, rate in results.items()
+        ))
+        self.assertGreater(results["full_load"], results["default"])
@@ -0,0 +1,145 @@
+import os
+import signal
+import threading
+from io import StringIO
+
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from syncapp.keymap import DimensionKeyMap
+from syncapp.management.commands import sync_daemon
+from syncapp.models import BridgeFilmActor, DimActor, FactRental
+from syncapp.models_source import Actor, Customer, Film, FilmActor, Inventory, Language, Rental
+from syncapp.tests import test_incremental
+
+
+class SyncDaemonTest(TestCase):
+    databases = {"default", "source"}
+
+    def setUp(self):
+        call_command("init", verbosity=0)
+
+    def test_cycles_apply_changes_and_report_lag(self):
+        Actor.objects.using("source").update_or_create(
+            actor_id=8001,
+            defaults={"first_name": "DAEMON", "last_name": "ACTOR", "last_update": timezone.now()},
+        )
+        out = StringIO()
+
+        call_command("sync_daemon", interval=0, max_cycles=2, stdout=out)
+
+        self.assertTrue(DimActor.objects.filter(actor_id=8001).exists())
+        self.assertIn("lag: ", out.getvalue())
+        self.assertIn("actor 0s", out.getvalue())
+        self.assertIn("stopped after 2 cycle(s)", out.getvalue())
+
+    def test_cycles_share_one_key_map(self):
+        now = timezone.now()
+        Language.objects.using("source").update_or_create(
+            language_id=1, defaults={"name": "English", "last_update": now},
+        )
+        Film.objects.using("source").update_or_create(
+            film_id=8101,
+            defaults={
+                "title": "DAEMON MOVIE", "description": "daemon", "release_year": 2025,
+                "language_id": 1, "rental_duration": 3, "rental_rate": 0.99, "length": 100,
+                "replacement_cost": 20, "last_update": now,
+            },
+        )
+
+        def add_actor(actor_id):
+            Actor.objects.using("source").update_or_create(
+                actor_id=actor_id,
+                defaults={"first_name": "DAEMON", "last_name": f"ACTOR {actor_id}", "last_update": timezone.now()},
+            )
+            FilmActor.objects.using("source").create(actor_id=actor_id, film_id=8101, last_update=timezone.now())
+
+        class Daemon(sync_daemon.Command):
+            def run_cycle(self):
+                changed = super().run_cycle()
+                commands.append(self.command)
+                if len(commands) == 1:
+                    # changes arriving between two cycles
+                    add_actor(8102)
+                return changed
+
+        add_actor(8101)
+        commands = []
+        with mock.patch.object(DimensionKeyMap, "load", autospec=True, side_effect=DimensionKeyMap.load) as load:
+            call_command(Daemon(), interval=0, max_cycles=2, stdout=StringIO())
+
+        self.assertIs(commands[0], commands[1])
+        self.assertEqual(
+            sorted(BridgeFilmActor.objects.values_list("actor_key__actor_id", flat=True)), [8101, 8102],
+        )
+        # each dimension's full map is read once, later actors are refreshed in place
+        loaded = [name for call in load.call_args_list for name in call.args[1:]]
+        self.assertEqual(loaded.count("actor"), 1)
+
+    def test_full_load_between_cycles_reloads_the_key_maps(self):
+        test_incremental.IncrementalSyncTest.ensure_source_fks(self)
+        now = timezone.now()
+
+        def add_film(film_id):
+            Film.objects.using("source").update_or_create(
+                film_id=film_id,
+                defaults={
+                    "title": f"DAEMON MOVIE {film_id}", "description": "daemon", "release_year": 2025,
+                    "language_id": 1, "rental_duration": 3, "rental_rate": 0.99, "length": 100,
+                    "replacement_cost": 20, "last_update": timezone.now(),
+                },
+            )
+
+        def add_rental():
+            Customer.objects.using("source").update_or_create(
+                customer_id=8201,
+                defaults={
+                    "store_id": 1, "first_name": "DAEMON", "last_name": "CUSTOMER", "address_id": 1,
+                    "active": True, "create_date": now.date(), "last_update": now,
+                },
+            )
+            Inventory.objects.using("source").create(
+                inventory_id=8201, film_id=8202, store_id=1, last_update=now,
+            )
+            Rental.objects.using("source").create(
+                rental_id=8201, rental_date=timezone.now(), inventory_id=8201, customer_id=8201,
+                staff_id=1, last_update=timezone.now(),
+            )
+
+        class Daemon(sync_daemon.Command):
+            def run_cycle(self):
+                changed = super().run_cycle()
+                commands.append(self.command)
+                if len(commands) == 1:
+                    # film 8201 sorts first, so full_load gives it 8202's old key
+                    add_film(8201)
+                    call_command("full_load", verbosity=0, stdout=StringIO())
+                    add_rental()
+                return changed
+
+        add_film(8202)
+        commands = []
+        out = StringIO()
+        call_command(Daemon(), interval=0, max_cycles=2, stdout=out)
+
+        self.assertIsNot(commands[0], commands[1])
+        self.assertIn("reloading key maps", out.getvalue())
+        rental = FactRental.objects.get(rental_id=8201)
+        self.assertEqual(rental.film_key.film_id, 8202)
+        self.assertEqual(rental.customer_key.customer_id, 8201)
+
+    def test_sigterm_stops_the_daemon(self):
+        out = StringIO()
+        timer = threading.Timer(0.5, os.kill, (os.getpid(), signal.SIGTERM))
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        call_command("sync_daemon", interval=0.05, max_interval=0.1, stdout=out)
+
+        self.assertIn("stop requested", out.getvalue())
+        self.assertIn("Sync daemon stopped", out.getvalue())
+        # the daemon's handler is removed again
+        self.assertEqual(signal.getsignal(signal.SIGTERM), signal.SIG_DFL)
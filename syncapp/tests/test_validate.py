@@ -1,5 +1,18 @@
+import json
+from datetime import date
+from io import StringIO
+
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
+from django.utils import timezone
+
+from syncapp.controls import CONTROL_TOTALS
+from syncapp.dates import ensure_date_range
+from syncapp.models import ControlTotal, DimActor, DimCustomer, DimStaff, DimStore, FactPayment
+from syncapp.models_source import Actor
+from syncapp.reconcile import RECONCILE_SPECS, reconcile
+from syncapp.validation import CHECKS, register
 
 class ValidateCommandTest(TestCase):
 
@@ -8,3 +21,109 @@ class ValidateCommandTest(TestCase):
     def test_validate_runs_successfully(self):
         # should not raise errors
         call_command("validate")
+
+    def test_reconcile_finds_differing_keys(self):
+        now = timezone.now()
+        Actor.objects.using("source").bulk_create([
+            Actor(actor_id=i, first_name="A", last_name=f"ACTOR {i}", last_update=now)
+            for i in range(1, 101)
+        ])
+        call_command("full_load", verbosity=0)
+        self.assertFalse(reconcile(RECONCILE_SPECS["actor"]))
+
+        Actor.objects.using("source").filter(actor_id=42).update(last_name="DRIFTED")
+        Actor.objects.using("source").filter(actor_id=7).delete()
+        DimActor.objects.filter(actor_id=99).delete()
+
+        differences = reconcile(RECONCILE_SPECS["actor"], fanout=4)
+        self.assertEqual(
+            (differences.missing, differences.extra, differences.changed),
+            ([99], [7], [42]),
+        )
+
+        out = StringIO()
+        call_command("validate", reconcile=True, stdout=out)
+        self.assertIn("actor: 3 differing keys", out.getvalue())
+        self.assertIn("changed: 42", out.getvalue())
+
+    def create_payments(self, days):
+        now = timezone.now()
+        ensure_date_range(date(2005, 5, 1), date(2005, 6, 30))
+        customer = DimCustomer.objects.create(
+            customer_id=1, first_name="A", last_name="B", active=True, city="C", country="X",
+            last_update=now,
+        )
+        store = DimStore.objects.create(store_id=1, city="C", country="X", last_update=now)
+        staff = DimStaff.objects.create(
+            staff_id=1, first_name="A", last_name="B", store_id=1, active=True, last_update=now,
+        )
+        FactPayment.objects.bulk_create([
+            FactPayment(payment_id=i, date_key_paid_id=day, customer_key=customer, store_key=store,
+                        staff_key=staff, amount="2.99")
+            for i, day in enumerate(days)
+        ])
+
+    def test_validate_reports_diverging_days(self):
+        self.create_payments([20050524, 20050524, 20050530, 20050601])
+
+        out = StringIO()
+        call_command("validate", date_from=date(2005, 5, 1), date_to=date(2005, 5, 31), stdout=out)
+
+        self.assertIn("Payments mismatch on 2 day(s): SOURCE=0 rows TARGET=3 rows", out.getvalue())
+        self.assertIn("2005-05-24: SOURCE=0 rows TARGET=2 rows", out.getvalue())
+        self.assertIn("2005-05-30: SOURCE=$0.00 TARGET=$2.99", out.getvalue())
+
+    def test_window_must_not_be_reversed(self):
+        with self.assertRaises(CommandError):
+            call_command("validate", date_from=date(2005, 6, 1), date_to=date(2005, 5, 1))
+
+    def test_control_totals_check_only_changed_days(self):
+        self.create_payments([20050524, 20050524, 20050530])
+        controls = CONTROL_TOTALS[FactPayment]
+        controls.refresh([20050524, 20050530])
+
+        out = StringIO()
+        call_command("validate", control_totals=True, stdout=out)
+
+        # the source has no payments: both changed days differ and stay pending
+        self.assertIn("payment: 2 of 2 changed day(s) differ", out.getvalue())
+        self.assertIn("2005-05-24: SOURCE=0 rows/$0.00/checksum 0 TARGET=2 rows/$5.98", out.getvalue())
+        self.assertEqual(controls.pending(), [20050524, 20050530])
+
+        FactPayment.objects.all().delete()
+        controls.refresh([20050524, 20050530])
+        out = StringIO()
+        call_command("validate", control_totals=True, stdout=out)
+
+        self.assertIn("payment: 2 changed day(s) match (OK)", out.getvalue())
+        self.assertEqual(controls.pending(), [])
+        self.assertEqual(ControlTotal.objects.filter(table_name="payment", rows=0).count(), 2)
+
+    def test_json_report_of_selected_checks(self):
+        out = StringIO()
+        call_command("validate", check=["dim_date", "bridges"], format="json", stdout=out)
+
+        report = json.loads(out.getvalue())
+        self.assertTrue(report["ok"])
+        self.assertEqual([check["name"] for check in report["checks"]], ["bridges", "dim_date"])
+        self.assertEqual(report["checks"][0]["details"]["film_actor"], {"source": 0, "target": 0})
+        self.assertEqual(set(report["checks"][0]["queries"]), {"default", "source"})
+
+    def test_registered_check_runs_when_selected(self):
+        @register("always_fails", "Checking nothing...", default=False)
+        def always_fails(result, context):
+            result.write("   → about to fail")
+            raise ValueError("boom")
+        self.addCleanup(CHECKS.pop, "always_fails")
+
+        out = StringIO()
+        call_command("validate", stdout=out)
+        self.assertNotIn("Checking nothing", out.getvalue())
+
+        out = StringIO()
+        call_command("validate", check=["always_fails"], format="json", stdout=out)
+        report = json.loads(out.getvalue())
+
+        self.assertFalse(report["ok"])
+        self.assertEqual(report["checks"][0]["error"], "ValueError: boom")
+        self.assertEqual(report["checks"][0]["messages"][0], "→ about to fail")
@@ -0,0 +1,449 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from time import perf_counter
+
+from django.db import connections
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from syncapp.aggregates import AGGREGATES
+from syncapp.bridges import BRIDGE_SPECS
+from syncapp.controls import CONTROL_TOTALS, EMPTY_TOTALS
+from syncapp.dates import date_key, date_key_of, key_to_date, source_date_range
+from syncapp.models import (
+    DimActor,
+    DimCategory,
+    DimCustomer,
+    DimDate,
+    DimFilm,
+    DimStore,
+    FactPayment,
+    FactRental,
+)
+from syncapp.models_source import Actor, Category, Customer, Film, Payment, Rental, Store
+from syncapp.partitions import partitioned_facts
+from syncapp.reconcile import RECONCILE_SPECS, reconcile
+
+
+# diverging days listed per comparison
+MAX_DAYS = 20
+
+
+class Check:
+    """
+    One validation check. run(result, context) queries both databases and
+    reports into its CheckResult; it may run on a worker thread next to
+    other checks, so it only shares the (read-only) context with them.
+    """
+
+    def __init__(self, name, title, run, default=True):
+        self.name = name
+        self.title = title
+        self.run = run
+        self.default = default
+
+
+# name -> Check, in registration (and report) order
+CHECKS = {}
+
+
+def register(name, title, default=True):
+    """
+    Decorator registering run(result, context) as a validate check named
+    name. default=False checks only run when selected by name.
+    """
+    def decorator(run):
+        CHECKS[name] = Check(name, title, run, default=default)
+        return run
+    return decorator
+
+
+class CheckContext:
+    """What a validate run checks: the [start, end] window and listing limits."""
+
+    def __init__(self, start, end, max_keys=20):
+        self.start = start
+        self.end = end
+        self.max_keys = max_keys
+
+
+class CheckResult:
+    """
+    Outcome of one check: report lines (flagged when they are failures),
+    machine-readable details, wall time and queries run per database alias.
+    """
+
+    def __init__(self, check):
+        self.name = check.name
+        self.title = check.title
+        self.ok = True
+        self.lines = []  # (failed, text)
+        self.details = {}
+        self.error = None
+        self.seconds = 0.0
+        self.queries = {}
+
+    def write(self, text):
+        self.lines.append((False, text))
+
+    def fail(self, text):
+        self.ok = False
+        self.lines.append((True, text))
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "ok": self.ok,
+            "seconds": round(self.seconds, 4),
+            "queries": self.queries,
+            "messages": [text.strip() for _, text in self.lines],
+            "details": self.details,
+            "error": self.error,
+        }
+
+
+def run_checks(checks, context, workers=1):
+    """
+    Run checks and return their CheckResults in the same order. With
+    workers > 1 they run concurrently on a thread pool; every worker thread
+    opens its own source and analytics connections and closes them after
+    each check. Otherwise they run inline on the calling thread.
+    """
+    if workers <= 1:
+        return [run_check(check, context) for check in checks]
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="validate") as pool:
+        return list(pool.map(lambda check: run_check(check, context, close=True), checks))
+
+
+def run_check(check, context, close=False):
+    """Run one check, timing it and counting its queries; errors fail the check."""
+    result = CheckResult(check)
+    started = perf_counter()
+    try:
+        with counting_queries(result.queries):
+            check.run(result, context)
+    except Exception as exc:
+        result.error = f"{type(exc).__name__}: {exc}"
+        result.fail(f"   ✖ {check.name} check failed: {result.error}")
+    finally:
+        result.seconds = perf_counter() - started
+        if close:
+            # connections are per thread; release this worker's
+            connections.close_all()
+    return result
+
+
+@contextmanager
+def counting_queries(counts, aliases=("default", "source")):
+    """Count the queries this thread runs on each database alias into counts."""
+    def counter(alias):
+        def wrapper(execute, sql, params, many, context):
+            counts[alias] += 1
+            return execute(sql, params, many, context)
+        return wrapper
+
+    counts.update(dict.fromkeys(aliases, 0))
+    with ExitStack() as stack:
+        for alias in aliases:
+            # a fresh worker connection runs its setup PRAGMAs outside the count
+            connections[alias].ensure_connection()
+            stack.enter_context(connections[alias].execute_wrapper(counter(alias)))
+        yield counts
+
+
+# per-day totals
+def source_days(model, field, context, amount=None):
+    """
+    {date_key: (rows, amount sum)} of source rows whose datetime field
+    falls in the window, from one GROUP BY on the derived date key.
+    """
+    lower = datetime.combine(context.start, time.min, tzinfo=dt_timezone.utc)
+    upper = datetime.combine(context.end + timedelta(days=1), time.min, tzinfo=dt_timezone.utc)
+    rows = (
+        model.objects.using("source")
+        .filter(**{f"{field}__gte": lower, f"{field}__lt": upper})
+        .annotate(day=date_key_of(field))
+    )
+    return group_days(rows, "day", amount)
+
+
+def target_days(model, field, context, amount=None):
+    """
+    {date_key: (rows, amount sum)} of fact rows in the window: an integer
+    range on the fact's date key column, so the date key index is used and
+    dim_date is not joined.
+    """
+    # foreign keys have no __range lookup; >= / <= is the same index range
+    rows = model.objects.filter(**{
+        f"{field}__gte": date_key(context.start), f"{field}__lte": date_key(context.end),
+    })
+    return group_days(rows, f"{field}_id", amount)
+
+
+def group_days(rows, day, amount):
+    totals = rows.values(day).annotate(rows=Count("*"))
+    if amount:
+        totals = totals.annotate(total=Sum(amount))
+    return {
+        int(row[day]): (row["rows"], row.get("total") or 0)
+        for row in totals.order_by()
+    }
+
+
+def report_days(result, label, source, target, value, fmt=str):
+    """
+    Compare value(totals) day by day; report the window's total or the
+    days that diverge (at most MAX_DAYS), values formatted with fmt.
+    """
+    days = sorted(source.keys() | target.keys())
+    diverging = [
+        day for day in days
+        if not same(value(source.get(day, (0, 0))), value(target.get(day, (0, 0))))
+    ]
+    src = sum(value(totals) for totals in source.values())
+    tgt = sum(value(totals) for totals in target.values())
+    result.details[label] = {
+        "source": round(src, 2),
+        "target": round(tgt, 2),
+        "days": len(days),
+        "diverging_days": [key_to_date(day).isoformat() for day in diverging],
+    }
+
+    if not diverging:
+        result.write(f"   ✔ {label}: {fmt(src)} match over {len(days)} day(s) (OK)")
+        return
+
+    result.fail(
+        f"   ✖ {label} mismatch on {len(diverging)} day(s): SOURCE={fmt(src)} TARGET={fmt(tgt)}"
+    )
+    for day in diverging[:MAX_DAYS]:
+        result.write(
+            f"      {key_to_date(day)}: SOURCE={fmt(value(source.get(day, (0, 0))))} "
+            f"TARGET={fmt(value(target.get(day, (0, 0))))}"
+        )
+    if len(diverging) > MAX_DAYS:
+        result.write(f"      ... and {len(diverging) - MAX_DAYS} more day(s)")
+
+
+def report_count(result, label, src, tgt):
+    result.details[label] = {"source": src, "target": tgt}
+    if src == tgt:
+        result.write(f"   ✔ {label}: {src} rows (OK)")
+    else:
+        result.fail(f"   ✖ {label}: SOURCE={src} TARGET={tgt} (Mismatch!)")
+
+
+def same(a, b):
+    return abs(a - b) < 0.01
+
+
+def row_count(totals):
+    return totals[0]
+
+
+def format_rows(rows):
+    return f"{rows} rows"
+
+
+# checks
+@register("counts", "Checking dimension table counts...")
+def check_counts(result, context):
+    report_count(result, "Films", Film.objects.using("source").count(), DimFilm.objects.count())
+    report_count(result, "Actors", Actor.objects.using("source").count(), DimActor.objects.count())
+    report_count(
+        result, "Categories", Category.objects.using("source").count(), DimCategory.objects.count(),
+    )
+    report_count(
+        result, "Customers", Customer.objects.using("source").count(),
+        DimCustomer.objects.filter(is_current=True).count(),
+    )
+    report_count(
+        result, "Stores", Store.objects.using("source").count(),
+        DimStore.objects.filter(is_current=True).count(),
+    )
+
+
+@register("rentals", "📀 Checking rentals...")
+def check_rentals(result, context):
+    report_days(
+        result, "Rentals",
+        source_days(Rental, "rental_date", context),
+        target_days(FactRental, "date_key_rented", context),
+        value=row_count, fmt=format_rows,
+    )
+
+
+@register("payments", "💰 Checking payments and revenue totals...")
+def check_payments(result, context):
+    # one GROUP BY per side serves both comparisons
+    source = source_days(Payment, "payment_date", context, amount="amount")
+    target = target_days(FactPayment, "date_key_paid", context, amount="amount")
+
+    report_days(result, "Payments", source, target, value=row_count, fmt=format_rows)
+    report_days(
+        result, "Revenue totals", source, target,
+        value=lambda totals: totals[1],
+        fmt=lambda total: f"${total:.2f}",
+    )
+
+
+@register("bridges", "🔗 Checking bridge links...")
+def check_bridges(result, context):
+    for spec in BRIDGE_SPECS.values():
+        report_count(
+            result, spec.name, spec.source.objects.using("source").count(), spec.target.objects.count(),
+        )
+
+
+@register("dim_date", "📅 Checking dim_date coverage...")
+def check_dim_date(result, context):
+    bounds = source_date_range()
+    if bounds is None:
+        result.write("   ✔ dim_date: no source rentals or payments to cover (OK)")
+        return
+
+    first, last = bounds
+    days = (last - first).days + 1
+    present = DimDate.objects.filter(date_key__range=(date_key(first), date_key(last))).count()
+    result.details["dim_date"] = {
+        "first": first.isoformat(), "last": last.isoformat(), "days": days, "present": present,
+    }
+
+    if present == days:
+        result.write(f"   ✔ dim_date: covers {first} – {last} ({days} days) (OK)")
+    else:
+        result.fail(f"   ✖ dim_date: {days - present} of {days} days between {first} and {last} are missing")
+
+
+@register("unique_ids", "🔑 Checking fact natural keys across partitions...")
+def check_unique_ids(result, context):
+    partitioned = partitioned_facts()
+    for model, controls in CONTROL_TOTALS.items():
+        table, key = model._meta.db_table, controls.key
+        if model not in partitioned:
+            result.details[table] = {"partitioned": False, "duplicates": 0, "ids": []}
+            result.write(f"   ✔ {table}: {key} is a unique column (OK)")
+            continue
+
+        # the view's partitions each enforce uniqueness only for their month
+        duplicates = list(
+            model.objects.values(key).annotate(_rows=Count("*")).filter(_rows__gt=1)
+            .order_by(key).values_list(key, flat=True)
+        )
+        result.details[table] = {
+            "partitioned": True, "duplicates": len(duplicates), "ids": duplicates[:context.max_keys],
+        }
+        if not duplicates:
+            result.write(f"   ✔ {table}: {key} is unique across partitions (OK)")
+            continue
+
+        result.fail(f"   ✖ {table}: {len(duplicates)} {key}(s) stored in more than one partition")
+        listed = ", ".join(str(natural_id) for natural_id in duplicates[:context.max_keys])
+        more = f" (+{len(duplicates) - context.max_keys} more)" if len(duplicates) > context.max_keys else ""
+        result.write(f"      {listed}{more}")
+
+
+@register("control_totals", "🧾 Checking control totals of changed days...", default=False)
+def check_control_totals(result, context):
+    for controls in CONTROL_TOTALS.values():
+        days = controls.pending()
+        if not days:
+            result.write(f"   ✔ {controls.name}: no days changed since the last validation")
+            continue
+
+        checked_at = timezone.now()
+        target = controls.recorded(days)
+        source = controls.source_totals(days)
+        # a day with no rows has no group on either side
+        diverging = [
+            day for day in days
+            if source.get(day, EMPTY_TOTALS) != target.get(day, EMPTY_TOTALS)
+        ]
+        controls.verify([day for day in days if day not in diverging], checked_at)
+        result.details[controls.name] = {
+            "days": len(days),
+            "diverging_days": [key_to_date(day).isoformat() for day in diverging],
+        }
+
+        if not diverging:
+            result.write(f"   ✔ {controls.name}: {len(days)} changed day(s) match (OK)")
+            continue
+
+        result.fail(f"   ✖ {controls.name}: {len(diverging)} of {len(days)} changed day(s) differ")
+        for day in diverging[:MAX_DAYS]:
+            result.write(
+                f"      {key_to_date(day)}: SOURCE={format_totals(source.get(day, EMPTY_TOTALS))} "
+                f"TARGET={format_totals(target.get(day, EMPTY_TOTALS))}"
+            )
+        if len(diverging) > MAX_DAYS:
+            result.write(f"      ... and {len(diverging) - MAX_DAYS} more day(s)")
+
+
+def format_totals(totals):
+    rows, amount, checksum = totals
+    return f"{rows} rows/${amount:.2f}/checksum {checksum}"
+
+
+@register("checksums", "🧮 Reconciling rows by checksum...", default=False)
+def check_checksums(result, context):
+    for name, spec in RECONCILE_SPECS.items():
+        differences = reconcile(spec)
+        result.details[name] = {
+            "differing": len(differences),
+            "missing": differences.missing[:context.max_keys],
+            "extra": differences.extra[:context.max_keys],
+            "changed": differences.changed[:context.max_keys],
+            "digest_queries": differences.queries,
+        }
+        if not differences:
+            result.write(f"   ✔ {name}: checksums match ({differences.queries} digest queries)")
+            continue
+
+        result.fail(f"   ✖ {name}: {len(differences)} differing keys ({differences.queries} digest queries)")
+        for label, keys in (
+            ("missing in target", differences.missing),
+            ("extra in target", differences.extra),
+            ("changed", differences.changed),
+        ):
+            if keys:
+                listed = ", ".join(str(key) for key in keys[:context.max_keys])
+                more = f" (+{len(keys) - context.max_keys} more)" if len(keys) > context.max_keys else ""
+                result.write(f"      {label}: {listed}{more}")
+
+
+@register("aggregates", "📊 Checking aggregate tables against the facts...", default=False)
+def check_aggregates(result, context):
+    for name, aggregate in AGGREGATES.items():
+        expected = aggregate.read()
+        stored = aggregate.rows()
+        differing = sorted(
+            key for key in expected.keys() | stored.keys()
+            if expected.get(key, aggregate.zero) != stored.get(key, aggregate.zero)
+        )
+        result.details[name] = {
+            "groups": len(expected),
+            "differing": [list(key) for key in differing[:context.max_keys]],
+        }
+        if not differing:
+            result.write(f"   ✔ {aggregate.table}: {len(expected)} groups match the facts (OK)")
+            continue
+
+        result.fail(f"   ✖ {aggregate.table}: {len(differing)} of {len(expected.keys() | stored.keys())} groups differ")
+        for key in differing[:context.max_keys]:
+            result.write(
+                f"      {format_group(aggregate, key)}: "
+                f"FACTS={format_measures(aggregate, expected.get(key, aggregate.zero))} "
+                f"TABLE={format_measures(aggregate, stored.get(key, aggregate.zero))}"
+            )
+        if len(differing) > context.max_keys:
+            result.write(f"      ... and {len(differing) - context.max_keys} more group(s)")
+
+
+def format_group(aggregate, key):
+    return ", ".join(f"{name}={value}" for name, value in zip(aggregate.groups, key))
+
+
+def format_measures(aggregate, measures):
+    return "/".join(f"{value} {name}" for name, value in zip(aggregate.measures, measures))
@@ -0,0 +1,137 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from syncapp.models import SyncState
+from syncapp.models_source import (
+    Film,
+    Actor,
+    Category,
+    Store,
+    Customer,
+    Staff,
+    Rental,
+    Payment,
+    FilmActor,
+    FilmCategory,
+)
+
+
+# sync_state table name -> (source model, change timestamp column, primary key)
+# payment has no last_update in Sakila; payment_date is its change column.
+# Link tables have composite keys; their high-watermark is (timestamp,
+# film_id) and incremental sync also tracks the other side's id.
+WATERMARK_COLUMNS = {
+    "film": (Film, "last_update", "film_id"),
+    "actor": (Actor, "last_update", "actor_id"),
+    "category": (Category, "last_update", "category_id"),
+    "store": (Store, "last_update", "store_id"),
+    "customer": (Customer, "last_update", "customer_id"),
+    "staff": (Staff, "last_update", "staff_id"),
+    "rental": (Rental, "last_update", "rental_id"),
+    "payment": (Payment, "payment_date", "payment_id"),
+    "film_actor": (FilmActor, "last_update", "film_id"),
+    "film_category": (FilmCategory, "last_update", "film_id"),
+}
+
+
+# sync_state row whose last_update is when full_load last rebuilt the
+# warehouse, i.e. its load generation
+LOAD_GENERATION = "full_load"
+
+
+def get_watermark(table_name):
+    """
+    (last_update, last_pk) already synced for table_name, or None when the
+    table has never been synced; (last_update, last_pk, last_link_id) once
+    a bridge stored its full link key. States written before last_pk
+    existed resume after every row with that timestamp's lowest possible pk.
+    """
+    state = SyncState.objects.filter(table_name=table_name).first()
+    if state is None or state.last_update is None:
+        return None
+    if state.last_link_id is not None:
+        return state.last_update, state.last_pk or 0, state.last_link_id
+    return state.last_update, state.last_pk or 0
+
+
+def set_watermark(table_name, watermark):
+    """Store a (last_update, last_pk) or (last_update, film_id, link id) watermark."""
+    last_update, last_pk, *link = watermark
+    SyncState.objects.update_or_create(
+        table_name=table_name,
+        defaults={
+            "last_update": last_update,
+            "last_pk": last_pk,
+            "last_link_id": link[0] if link else None,
+        },
+    )
+
+
+def reconcile_due(table_name, interval):
+    """
+    Whether table_name was last fully diffed against the source more than
+    interval (a timedelta) ago. This is a schedule, so wall-clock time is fine.
+    """
+    state = SyncState.objects.filter(table_name=table_name).first()
+    if state is None or state.last_reconciled is None:
+        return True
+    return state.last_reconciled <= timezone.now() - interval
+
+
+def mark_reconciled(table_name):
+    SyncState.objects.update_or_create(
+        table_name=table_name, defaults={"last_reconciled": timezone.now()}
+    )
+
+
+def get_position(name):
+    """Resume point stored for the change feed `name`, or None."""
+    state = SyncState.objects.filter(table_name=name).first()
+    return state.position if state else None
+
+
+def set_position(name, position):
+    SyncState.objects.update_or_create(table_name=name, defaults={"position": position})
+
+
+def load_generation():
+    """
+    When full_load last replaced the warehouse, or None if it never ran.
+    A new generation means every surrogate key may have changed.
+    """
+    state = SyncState.objects.filter(table_name=LOAD_GENERATION).first()
+    return state.last_update if state else None
+
+
+def new_load_generation():
+    SyncState.objects.update_or_create(
+        table_name=LOAD_GENERATION, defaults={"last_update": timezone.now()}
+    )
+
+
+def source_high_watermark(table_name):
+    """Current max (change timestamp, pk) in the source table, or None if empty."""
+    model, ts_field, pk_field = WATERMARK_COLUMNS[table_name]
+    return (
+        model.objects.using("source")
+        .order_by(f"-{ts_field}", f"-{pk_field}")
+        .values_list(ts_field, pk_field)
+        .first()
+    )
+
+
+def replication_lag(tables=None):
+    """
+    {table: source max change timestamp minus the synced watermark} as
+    timedeltas, zero when caught up and None when never synced. Tables
+    whose source is empty are left out.
+    """
+    lag = {}
+    for table in tables or WATERMARK_COLUMNS:
+        source = source_high_watermark(table)
+        if source is None:
+            continue
+        synced = get_watermark(table)
+        lag[table] = None if synced is None else max(source[0] - synced[0], timedelta(0))
+    return lag
@@ -89,6 +89,13 @@ DATABASES = {
 
 }
 
+# SQLite pragma profile applied to every new connection, per database alias
+# (profiles are defined in syncapp/pragmas.py); full_load switches to its
+# own profile while loading and restores this one afterwards.
+SQLITE_CONNECTION_PROFILE = {
+    "default": "bulk",
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {